@@ -1,10 +1,44 @@
+import hashlib
+import json
+import os
+from typing import Dict, Tuple
+
 from research_town.configs import Config
 from research_town.dbs import LogDB, PaperDB, ProfileDB, ProgressDB
+from research_town.dbs.db_provider import DatabaseClientHandler
+from research_town.utils.retriever import preload_retriever
 
 config_file_path = 'configs'
 config = Config(config_file_path)
+# the demo streams tokens to the browser while agents write
+config.param.stream = True
+# finished runs are only reused while the config that produced them is unchanged
+config_hash = hashlib.sha256(
+    json.dumps(config.model_dump(), sort_keys=True, default=str).encode()
+).hexdigest()
+
+# load the retriever once here so that every forked request process shares it
+preload_retriever()
+
+_dbs: Dict[int, Tuple[ProfileDB, PaperDB, LogDB, ProgressDB]] = {}
+
 
-profile_db = ProfileDB(config.database)
-paper_db = PaperDB(config.database)
-log_db = LogDB(config.database)
-progress_db = ProgressDB(config.database)
+def get_dbs() -> Tuple[ProfileDB, PaperDB, LogDB, ProgressDB]:
+    """
+    Return the databases of the calling process, created on first use. Engine
+    workers are forked, so a client opened before the fork would be shared by
+    all of them; each worker opens its own read-only client instead, and the
+    job registry in the server process stays the only writer of the folder.
+    Runs do not add to these databases, their output is kept in the registry.
+    """
+    pid = os.getpid()
+    if pid not in _dbs:
+        DatabaseClientHandler.reset_client_instance()
+        database_config = config.database.model_copy(update={'read_only': True})
+        _dbs[pid] = (
+            ProfileDB(database_config),
+            PaperDB(database_config),
+            LogDB(database_config),
+            ProgressDB(database_config),
+        )
+    return _dbs[pid]
@@ -5,11 +5,12 @@ from research_town.data import Progress
 from research_town.engines import Engine
 from research_town.utils.paper_collector import get_paper_introduction
 
-from .extensions import config, log_db, paper_db, profile_db, progress_db
+from .extensions import config, get_dbs
 
 
 def run_engine(
     url: str,
+    project_name: str = 'research_town_demo',
 ) -> Generator[Tuple[Optional[Progress], Optional[Agent]], None, None]:
     try:
         intro = get_paper_introduction(url)
@@ -17,8 +18,9 @@ def run_engine(
             yield None, None
             return
 
+        profile_db, paper_db, log_db, progress_db = get_dbs()
         engine = Engine(
-            project_name='research_town_demo',
+            project_name=project_name,
             profile_db=profile_db,
             paper_db=paper_db,
             progress_db=progress_db,
@@ -33,12 +35,17 @@ def run_engine(
 
             if run_result:
                 for progress, agent in run_result:
+                    # the worker databases are read-only, so the job's jsonl in
+                    # the registry is the only store of what this run produced
                     yield progress, agent
                     engine.time_step += 1
 
             engine.transition()
     except Exception as e:
         print(f'Error occurred during engine execution: {e}')
+        # the worker reports it as an error item, so the job is recorded as
+        # failed and never served from the result cache
+        raise
 
     finally:
         print('Engine execution completed.')
@@ -0,0 +1,226 @@
+import asyncio
+import json
+import math
+import os
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+
+from .worker_pool import Job, WorkerPool
+
+FINAL_STATUSES = ['finished', 'failed', 'cancelled']
+# streamed text, relayed to live subscribers only
+DELTA_TYPES = ['delta', 'delta_reset']
+
+
+class JobRecord:
+    def __init__(
+        self,
+        job_id: str,
+        url: str,
+        config_hash: str = '',
+        status: str = 'running',
+        created_at: Optional[float] = None,
+        finished_at: Optional[float] = None,
+        items: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        self.id = job_id
+        self.url = url
+        self.config_hash = config_hash
+        self.status = status
+        self.created_at = created_at if created_at is not None else time.time()
+        self.finished_at = finished_at
+        # progress items carry their position in this list as 'offset'
+        self.items: List[Dict[str, Any]] = items or []
+        self.subscribers: Set[asyncio.Queue[Optional[Dict[str, Any]]]] = set()
+        self.cancelled = False
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINAL_STATUSES
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.id,
+            'url': self.url,
+            'status': self.status,
+            'num_items': len(self.items),
+        }
+
+
+class JobRegistry:
+    """
+    Engine runs as jobs that outlive the connection that started them. Progress
+    items are appended to <folder>/<job_id>.jsonl as they arrive, so a client can
+    reconnect and resume from any offset and finished runs survive a restart.
+    Token deltas are only relayed to live subscribers and are not stored.
+
+    Runs are keyed on (url, config hash): a request for a paper that is already
+    running joins that run, and one that finished less than cache_ttl seconds ago
+    is replayed from storage unless a fresh run is asked for.
+    """
+
+    def __init__(
+        self,
+        worker_pool: WorkerPool,
+        format_result: Callable[[Any], Dict[str, Any]],
+        folder_path: str,
+        config_hash: str = '',
+        cache_ttl: float = math.inf,
+    ) -> None:
+        self.worker_pool = worker_pool
+        self.format_result = format_result
+        self.folder_path = folder_path
+        self.config_hash = config_hash
+        self.cache_ttl = cache_ttl
+        self.records: Dict[str, JobRecord] = {}
+        self.tasks: Set[asyncio.Task[None]] = set()
+        os.makedirs(folder_path, exist_ok=True)
+        self.load()
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        return self.records.get(job_id)
+
+    def submit(self, url: str, fresh: bool = False) -> JobRecord:
+        url = url.strip()
+        # identical requests share one run, which is fresh by definition
+        record = self.find_running(url)
+        if record is None and not fresh:
+            record = self.find_finished(url)
+        if record is not None:
+            return record
+
+        job = self.worker_pool.submit(url)
+        record = JobRecord(job.id, url, self.config_hash)
+        self.records[record.id] = record
+        self.save_index()
+        task = asyncio.create_task(self.collect(job, record))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return record
+
+    def cancel(self, job_id: str) -> None:
+        record = self.records.get(job_id)
+        if record is not None and not record.finished:
+            record.cancelled = True
+            self.worker_pool.cancel(job_id)
+
+    def find_running(self, url: str) -> Optional[JobRecord]:
+        for record in self.records.values():
+            if (
+                record.url == url
+                and record.config_hash == self.config_hash
+                and not record.finished
+                and not record.cancelled
+            ):
+                return record
+        return None
+
+    def find_finished(self, url: str) -> Optional[JobRecord]:
+        now = time.time()
+        for record in reversed(list(self.records.values())):
+            if (
+                record.url == url
+                and record.config_hash == self.config_hash
+                and record.status == 'finished'
+                and record.finished_at is not None
+                and now - record.finished_at <= self.cache_ttl
+            ):
+                return record
+        return None
+
+    async def collect(self, job: Job, record: JobRecord) -> None:
+        failed = False
+        while True:
+            result = await job.results.get()
+            if result is None:
+                break
+            if isinstance(result, dict) and result.get('type') in DELTA_TYPES:
+                self.publish(record, result)
+                continue
+            item = result if isinstance(result, dict) else self.format_result(result)
+            failed = failed or item.get('type') == 'error'
+            self.append(record, item)
+
+        if record.cancelled:
+            record.status = 'cancelled'
+        else:
+            record.status = 'failed' if failed else 'finished'
+        record.finished_at = time.time()
+        self.save_index()
+        self.publish(record, None)
+
+    def append(self, record: JobRecord, item: Dict[str, Any]) -> None:
+        item = {**item, 'job_id': record.id, 'offset': len(record.items)}
+        record.items.append(item)
+        with open(self.items_path(record.id), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(item) + '\n')
+        self.publish(record, item)
+
+    def publish(self, record: JobRecord, item: Optional[Dict[str, Any]]) -> None:
+        for queue in record.subscribers:
+            queue.put_nowait(item)
+
+    async def stream(self, record: JobRecord, offset: int = 0) -> AsyncIterator[str]:
+        # replay what is stored, then follow the live run from where replay ended
+        while offset < len(record.items):
+            yield json.dumps(record.items[offset]) + '\n'
+            offset += 1
+        if record.finished:
+            return
+
+        queue: asyncio.Queue[Optional[Dict[str, Any]]] = asyncio.Queue()
+        record.subscribers.add(queue)
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                if 'offset' in item:
+                    if item['offset'] < offset:
+                        continue
+                    offset = item['offset'] + 1
+                yield json.dumps(item) + '\n'
+        finally:
+            record.subscribers.discard(queue)
+
+    def items_path(self, job_id: str) -> str:
+        return os.path.join(self.folder_path, f'{job_id}.jsonl')
+
+    def save_index(self) -> None:
+        index = {
+            record.id: {
+                'url': record.url,
+                'config_hash': record.config_hash,
+                'status': record.status,
+                'created_at': record.created_at,
+                'finished_at': record.finished_at,
+            }
+            for record in self.records.values()
+        }
+        tmp_path = os.path.join(self.folder_path, 'jobs.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, os.path.join(self.folder_path, 'jobs.json'))
+
+    def load(self) -> None:
+        index_path = os.path.join(self.folder_path, 'jobs.json')
+        if not os.path.exists(index_path):
+            return
+        with open(index_path, encoding='utf-8') as f:
+            index: Dict[str, Dict[str, Any]] = json.load(f)
+        for job_id, entry in index.items():
+            items = []
+            if os.path.exists(self.items_path(job_id)):
+                with open(self.items_path(job_id), encoding='utf-8') as f:
+                    items = [json.loads(line) for line in f if line.strip()]
+            # runs that were in flight when the server stopped cannot resume
+            status = entry['status'] if entry['status'] in FINAL_STATUSES else 'failed'
+            self.records[job_id] = JobRecord(
+                job_id,
+                entry['url'],
+                entry.get('config_hash', ''),
+                status,
+                entry.get('created_at'),
+                entry.get('finished_at'),
+                items,
+            )
@@ -0,0 +1,203 @@
+import asyncio
+import multiprocessing
+import threading
+import uuid
+from collections import deque
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from research_town.utils.rate_limiter import PRIORITY_INTERACTIVE, set_default_priority
+from research_town.utils.token_stream import StreamChunk, set_stream_sink
+
+# called with the url and the job id
+RunJob = Callable[[str, str], Iterator[Any]]
+
+
+def worker_main(run_job: RunJob, conn: Connection, cancel_event: Any) -> None:
+    # a user is waiting on every job, so its LLM calls jump the queue
+    set_default_priority(PRIORITY_INTERACTIVE)
+    current_job: List[Optional[str]] = [None]
+    send_lock = threading.Lock()
+
+    def send(message: Tuple[str, str, Any]) -> None:
+        # agents in env threads stream deltas while the main thread sends items
+        with send_lock:
+            conn.send(message)
+
+    def send_delta(chunk: StreamChunk) -> None:
+        # forward LLM tokens as they arrive instead of waiting for the whole progress,
+        # a reset tells the client to drop the text of a part that is being retried
+        job_id = current_job[0]
+        if job_id is not None and not cancel_event.is_set():
+            item = {
+                'type': 'delta_reset' if chunk.reset else 'delta',
+                'pk': chunk.pk,
+                'part': chunk.part,
+                'content': chunk.content,
+            }
+            send(('item', job_id, item))
+
+    set_stream_sink(send_delta)
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        job_id, url = message
+        current_job[0] = job_id
+        try:
+            generator = run_job(url, job_id)
+            for result in generator:
+                if cancel_event.is_set():
+                    break
+                send(('item', job_id, result))
+        except Exception as e:
+            send(('item', job_id, {'type': 'error', 'content': str(e)}))
+        finally:
+            current_job[0] = None
+            send(('done', job_id, None))
+
+
+class Job:
+    def __init__(self, job_id: str, url: str) -> None:
+        self.id = job_id
+        self.url = url
+        # None marks the end of the job
+        self.results: asyncio.Queue[Any] = asyncio.Queue()
+
+    def put(self, item: Any) -> None:
+        self.results.put_nowait(item)
+
+
+class Worker:
+    def __init__(self, run_job: RunJob) -> None:
+        context = multiprocessing.get_context('fork')
+        self.conn, child_conn = context.Pipe()
+        self.cancel_event = context.Event()
+        # forked from the parent, so models loaded at import are shared; every
+        # worker opens its own database clients after the fork
+        self.process = context.Process(
+            target=worker_main,
+            args=(run_job, child_conn, self.cancel_event),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.job: Optional[Job] = None
+
+
+class WorkerPool:
+    """
+    Pre-forked engine workers that stay warm between requests. Jobs wait in a
+    queue until a worker is idle, and their results are delivered to an
+    asyncio queue per job. Cancelling a job drops it from the queue, or stops
+    its worker at the next progress item without killing the process.
+
+    The pool lives on the event loop: worker pipes are watched with add_reader,
+    so results are pushed the moment they arrive and idle workers cost nothing.
+    """
+
+    def __init__(self, run_job: RunJob, num_workers: int = 2) -> None:
+        self.run_job = run_job
+        self.num_workers = num_workers
+        self.workers: List[Worker] = []
+        self.pending: Deque[Job] = deque()
+        self.jobs: Dict[str, Job] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        for _ in range(self.num_workers):
+            self.add_worker(Worker(self.run_job))
+
+    def submit(self, url: str) -> Job:
+        job = Job(str(uuid.uuid4()), url)
+        self.jobs[job.id] = job
+        self.pending.append(job)
+        self.dispatch()
+        return job
+
+    def cancel(self, job_id: str) -> None:
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+        if job in self.pending:
+            self.pending.remove(job)
+            self.finish(job)
+            return
+        for worker in self.workers:
+            if worker.job is job:
+                worker.cancel_event.set()
+
+    def shutdown(self) -> None:
+        for worker in self.workers:
+            self.remove_worker(worker)
+            try:
+                worker.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for worker in self.workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            worker.conn.close()
+        self.workers = []
+
+    def add_worker(self, worker: Worker) -> None:
+        assert self.loop is not None, 'WorkerPool.start() has not been called'
+        self.workers.append(worker)
+        self.loop.add_reader(worker.conn.fileno(), self.read_results, worker)
+
+    def remove_worker(self, worker: Worker) -> None:
+        if self.loop is not None:
+            self.loop.remove_reader(worker.conn.fileno())
+
+    def dispatch(self) -> None:
+        for worker in self.workers:
+            if not self.pending:
+                return
+            if worker.job is None:
+                job = self.pending.popleft()
+                worker.job = job
+                worker.cancel_event.clear()
+                worker.conn.send((job.id, job.url))
+
+    def finish(self, job: Job) -> None:
+        self.jobs.pop(job.id, None)
+        job.put(None)
+
+    def read_results(self, worker: Worker) -> None:
+        # drain everything that is already buffered, the worker sends whole messages
+        while True:
+            try:
+                if not worker.conn.poll():
+                    return
+                kind, job_id, item = worker.conn.recv()
+            except (EOFError, OSError):
+                self.replace(worker)
+                return
+            self.handle(worker, kind, job_id, item)
+
+    def handle(self, worker: Worker, kind: str, job_id: str, item: Any) -> None:
+        job = self.jobs.get(job_id)
+        if kind == 'item':
+            if job is not None and not worker.cancel_event.is_set():
+                job.put(item)
+            return
+        worker.job = None
+        if job is not None:
+            self.finish(job)
+        self.dispatch()
+
+    def replace(self, worker: Worker) -> None:
+        # the worker died, fail its job and fork a fresh one in its place
+        self.remove_worker(worker)
+        self.workers.remove(worker)
+        worker.conn.close()
+        if worker.job is not None:
+            worker.job.put({'type': 'error', 'content': 'Engine worker crashed.'})
+            self.finish(worker.job)
+        self.add_worker(Worker(self.run_job))
+        self.dispatch()
@@ -12,6 +12,8 @@ from research_bench.utils import load_benchmark
 from research_town.configs import Config
 from research_town.data import Profile
 from research_town.utils.logger import logger
+from research_town.utils.rate_limiter import PRIORITY_BATCH, set_default_priority
+from research_town.utils.retriever import preload_retriever
 
 
 def inference(
@@ -99,6 +101,8 @@ def main() -> None:
     args = parser.parse_args()
 
     config = Config(args.config_path)
+    # benchmark calls yield to interactive backend requests sharing the limits
+    set_default_priority(PRIORITY_BATCH)
     dataset = load_papers(args.input_path, args.output_path)
     logger.info(f'Processing {len(dataset)} papers')
 
@@ -125,6 +129,8 @@ def main() -> None:
         save_results(results, metrics, args.output_path, lock)
 
     lock = Lock()
+    # workers forked from here inherit the loaded retriever weights copy-on-write
+    preload_retriever()
     with Pool(processes=args.num_processes) as pool:
         tasks = [
             (
@@ -151,7 +157,7 @@ def main() -> None:
     for metric, scores in metrics_summary.items():
         if scores:
             average = sum(scores) / len(scores)
-            logger.info(f"Average {metric.replace('_', ' ').upper()}: {average:.4f}")
+            logger.info(f'Average {metric.replace("_", " ").upper()}: {average:.4f}')
 
 
 if __name__ == '__main__':
@@ -19,6 +19,7 @@ from ..utils.role_verifier import (
     reviewer_required,
 )
 from ..utils.serializer import Serializer
+from ..utils.token_stream import progress_streaming
 
 Role = Literal['reviewer', 'leader', 'member', 'chair'] | None
 
@@ -42,6 +43,7 @@ class Agent(object):
 
     @beartype
     @member_required
+    @progress_streaming
     def review_literature(
         self,
         contexts: List[str],
@@ -69,6 +71,7 @@ class Agent(object):
 
     @beartype
     @member_required
+    @progress_streaming
     def brainstorm_idea(
         self,
         insights: List[Insight],
@@ -95,6 +98,7 @@ class Agent(object):
 
     @beartype
     @member_required
+    @progress_streaming
     def summarize_idea(
         self, ideas: List[Idea], contexts: List[str], config: Config
     ) -> Idea:
@@ -116,6 +120,7 @@ class Agent(object):
 
     @beartype
     @member_required
+    @progress_streaming
     def write_proposal(
         self, idea: Idea, config: Config, papers: Optional[List[Paper]] = None
     ) -> Proposal:
@@ -161,6 +166,7 @@ class Agent(object):
 
     @beartype
     @reviewer_required
+    @progress_streaming
     def write_review(self, proposal: Proposal, config: Config) -> Review:
         serialized_proposal = self.serializer.serialize(proposal)
 
@@ -207,6 +213,7 @@ class Agent(object):
 
     @beartype
     @chair_required
+    @progress_streaming
     def write_metareview(
         self,
         proposal: Proposal,
@@ -263,6 +270,7 @@ class Agent(object):
 
     @beartype
     @leader_required
+    @progress_streaming
     def write_rebuttal(
         self,
         proposal: Proposal,
@@ -21,6 +21,8 @@ class ParamConfig(BaseModel):
     temperature: Optional[float] = None
     top_p: Optional[float] = None
     stream: Optional[bool] = None
+    # number of agent actions an env may run at once, 1 keeps envs sequential
+    max_concurrency: int = 1
 
 
 # EvalPromptTemplate for validation of eval-related prompts
@@ -155,6 +157,19 @@ class DatabaseProvider(Enum):
 
 class DatabaseConfig(BaseModel):
     provider: str
+    journal: bool = False
+    journal_compact_threshold: int = 1000
+    # load the folder but keep every change in memory, for processes that share
+    # the folder with the one that owns it
+    read_only: bool = False
+    # approximate search for embedding namespaces: None (exact), 'ivf' or 'hnsw'
+    ann_index: Optional[str] = None
+    ann_min_size: int = 10000
+    ann_nlist: int = 1024
+    ann_nprobe: int = 16
+    ann_m: int = 16
+    ann_ef_construction: int = 200
+    ann_ef_search: int = 64
 
 
 class Config(BaseModel):
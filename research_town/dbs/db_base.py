@@ -10,13 +10,19 @@ T = TypeVar('T', bound=Data)
 
 class BaseDB(Generic[T]):
     def __init__(
-        self, data_class: Type[T], config: DatabaseConfig, with_embeddings: bool = False
+        self,
+        data_class: Type[T],
+        config: DatabaseConfig,
+        with_embeddings: bool = False,
+        indexed_fields: Optional[List[str]] = None,
     ) -> None:
         self.project_name: Optional[str] = None
         self.data_class = data_class
         self.database_client = DatabaseClientHandler.get_client_instance(config)
         self.database_client.register_namespace(
-            self.data_class.__name__, with_embeddings=with_embeddings
+            self.data_class.__name__,
+            with_embeddings=with_embeddings,
+            indexed_fields=['project_name'] + (indexed_fields or []),
         )
 
     def set_project_name(self, project_name: str) -> None:
@@ -15,7 +15,11 @@ class ComplexDB:
 
     def register_class(self, data_class: Any, config: DatabaseConfig) -> None:
         class_name = data_class.__name__
-        db = BaseDB(data_class, config)
+        # references to other records are what get/count filter on
+        indexed_fields = [
+            field for field in data_class.model_fields if field.endswith('_pk')
+        ]
+        db = BaseDB(data_class, config, indexed_fields=indexed_fields)
         self.dbs[class_name] = db
 
     def set_project_name(self, project_name: str) -> None:
@@ -1,8 +1,6 @@
 import random
 from typing import Any, List, Optional, TypeVar
 
-from transformers import BertModel, BertTokenizer
-
 from ..configs import DatabaseConfig
 from ..data.data import Data, Paper
 from ..utils.logger import logger
@@ -16,18 +14,10 @@ T = TypeVar('T', bound=Data)
 class PaperDB(BaseDB[Paper]):
     def __init__(self, config: DatabaseConfig) -> None:
         super().__init__(Paper, config=config, with_embeddings=True)
-        self.retriever_tokenizer: Optional[BertTokenizer] = None
-        self.retriever_model: Optional[BertModel] = None
-
-    def _initialize_retriever(self) -> None:
-        if self.retriever_tokenizer is None or self.retriever_model is None:
-            self.retriever_tokenizer = BertTokenizer.from_pretrained(
-                'facebook/contriever'
-            )
-            self.retriever_model = BertModel.from_pretrained('facebook/contriever')
 
     def pull_papers(self, num: int, domain: Optional[str] = None) -> List[Paper]:
         papers = get_recent_papers(domain=domain, max_results=num)
+        self.embed_papers(papers)
         for paper in papers:
             self.add(paper)
         logger.info(f'Pulled {num} papers')
@@ -43,19 +33,14 @@ class PaperDB(BaseDB[Paper]):
         papers = get_related_papers(
             query=query, domain=domain, author=author, num_results=num
         )
+        self.embed_papers(papers)
         for paper in papers:
             self.add(paper)
         logger.info(f'Searched {num} papers')
         return papers
 
     def match(self, query: str, num: int = 1, **conditions: Any) -> List[Paper]:
-        self._initialize_retriever()
-
-        query_embed = get_embed(
-            instructions=[query],
-            retriever_tokenizer=self.retriever_tokenizer,
-            retriever_model=self.retriever_model,
-        )
+        query_embed = get_embed(instructions=[query])
         query_embeddings = [t.numpy(force=True).squeeze() for t in query_embed]
 
         match_papers_data = self.database_client.search(
@@ -71,10 +56,16 @@ class PaperDB(BaseDB[Paper]):
         random.shuffle(papers)
         return papers[:num]
 
+    def embed_papers(self, papers: List[Paper]) -> None:
+        # one batched forward pass instead of one per paper in add()
+        papers = [paper for paper in papers if paper.embed is None]
+        if not papers:
+            return
+        embeddings = get_embed([paper.abstract for paper in papers])
+        for paper, embed in zip(papers, embeddings):
+            paper.embed = embed
+
     def add(self, data: Paper) -> None:
-        self._initialize_retriever()
         if data.embed is None:
-            data.embed = get_embed(
-                [data.abstract], self.retriever_tokenizer, self.retriever_model
-            )[0]
+            data.embed = get_embed([data.abstract])[0]
         super().add(data)
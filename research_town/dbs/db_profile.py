@@ -1,8 +1,6 @@
 import random
 from typing import List, Literal, Optional, TypeVar
 
-from transformers import BertModel, BertTokenizer
-
 from ..configs import Config, DatabaseConfig
 from ..data.data import Data, Profile
 from ..utils.logger import logger
@@ -21,16 +19,18 @@ Role = Literal['reviewer', 'leader', 'member', 'chair'] | None
 
 class ProfileDB(BaseDB[Profile]):
     def __init__(self, config: DatabaseConfig) -> None:
-        super().__init__(Profile, config=config, with_embeddings=True)
-        self.retriever_tokenizer: Optional[BertTokenizer] = None
-        self.retriever_model: Optional[BertModel] = None
-
-    def _initialize_retriever(self) -> None:
-        if not self.retriever_tokenizer or not self.retriever_model:
-            self.retriever_tokenizer = BertTokenizer.from_pretrained(
-                'facebook/contriever'
-            )
-            self.retriever_model = BertModel.from_pretrained('facebook/contriever')
+        super().__init__(
+            Profile,
+            config=config,
+            with_embeddings=True,
+            indexed_fields=[
+                'name',
+                'is_leader_candidate',
+                'is_member_candidate',
+                'is_reviewer_candidate',
+                'is_chair_candidate',
+            ],
+        )
 
     def pull_profiles(
         self,
@@ -72,12 +72,7 @@ class ProfileDB(BaseDB[Profile]):
                 pub_abstracts=pub_abstracts,
             )
             profiles.append(profile)
-        self._initialize_retriever()
-        embeddings = get_embed(
-            [profile.bio for profile in profiles],
-            self.retriever_tokenizer,
-            self.retriever_model,
-        )
+        embeddings = get_embed([profile.bio for profile in profiles])
         for profile, emb in zip(profiles, embeddings):
             profile.embed = emb
             self.add(profile)
@@ -85,13 +80,7 @@ class ProfileDB(BaseDB[Profile]):
         return [profile.pk for profile in profiles]
 
     def match(self, query: str, role: Role, num: int = 1) -> List[Profile]:
-        self._initialize_retriever()
-
-        query_embed = get_embed(
-            instructions=[query],
-            retriever_tokenizer=self.retriever_tokenizer,
-            retriever_model=self.retriever_model,
-        )
+        query_embed = get_embed(instructions=[query])
         query_embeddings = [t.numpy(force=True).squeeze() for t in query_embed]
 
         match_profile_data = self.database_client.search(
@@ -121,9 +110,6 @@ class ProfileDB(BaseDB[Profile]):
             self.update(pk=profile.pk, updates=profile.model_dump())
 
     def add(self, data: Profile) -> None:
-        self._initialize_retriever()
         if data.embed is None:
-            data.embed = get_embed(
-                [data.bio], self.retriever_tokenizer, self.retriever_model
-            )[0]
+            data.embed = get_embed([data.bio])[0]
         super().add(data)
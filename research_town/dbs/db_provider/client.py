@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import numpy as np
 import numpy.typing as npt
@@ -7,13 +7,20 @@ import numpy.typing as npt
 
 class DatabaseClient(ABC):
     @abstractmethod
-    def register_namespace(self, namespace: str, with_embeddings: bool) -> None:
+    def register_namespace(
+        self,
+        namespace: str,
+        with_embeddings: bool,
+        indexed_fields: Optional[List[str]] = None,
+    ) -> None:
         """
         Register a namespace in the database.
 
         :param namespace: The namespace to register.
         :param with_embeddings: Whether to store embeddings in the namespace
                                 and perform search operations.
+        :param indexed_fields: Fields to keep a hash index on, so that equality
+                               conditions on them in get and count avoid a scan.
         """
 
     @abstractmethod
@@ -96,3 +103,24 @@ class DatabaseClient(ABC):
                 are closest to the query embeddings.
                 Each list corresponds to the records closest to the corresponding query embeddings.
         """
+
+    @abstractmethod
+    def search_with_scores(
+        self,
+        namespace: str,
+        query_embeddings: List[npt.NDArray[np.float32]],
+        num: int = 1,
+        **conditions: Union[str, int, float, List[int], None],
+    ) -> List[List[Tuple[Dict[str, Any], float]]]:
+        """
+        Same as `search`, but pairs every returned record with its cosine similarity
+            to the query embedding.
+
+        :param namespace: The namespace to search records from.
+        :param query_embeddings: The embeddings to search for.
+        :param num: The number of records to return.
+        :param conditions: Conditions to filter the records.
+
+        :return: The list of list of (record, score) tuples sorted by descending score.
+                Each list corresponds to the records closest to the corresponding query embeddings.
+        """
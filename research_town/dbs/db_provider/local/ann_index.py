@@ -0,0 +1,332 @@
+import os
+from abc import ABC, abstractmethod
+from typing import Any, List, Optional
+
+import numpy as np
+import numpy.typing as npt
+
+from ....configs import DatabaseConfig
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+
+class ANNIndex(ABC):
+    """
+    Approximate nearest-neighbour index over the rows of an EmbeddingStore.
+
+    The index only proposes candidate rows for a query; the client scores the
+    candidates exactly against the store, so an index never has to keep its
+    own copy of the vectors. Rows are normalized, inner product is cosine.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    @property
+    @abstractmethod
+    def is_trained(self) -> bool:
+        pass
+
+    @abstractmethod
+    def train(
+        self, matrix: npt.NDArray[np.float32], rows: npt.NDArray[np.int64]
+    ) -> None:
+        """
+        Build the index from the given rows of the embedding matrix.
+        """
+
+    @abstractmethod
+    def add(self, row: int, vector: npt.NDArray[np.float32]) -> None:
+        """
+        Insert or replace a row. Rows added before training are picked up by train.
+        """
+
+    @abstractmethod
+    def remove(self, row: int) -> None:
+        pass
+
+    @abstractmethod
+    def candidates(
+        self, query: npt.NDArray[np.float32], num: int
+    ) -> npt.NDArray[np.int64]:
+        """
+        Return the rows worth scoring for a normalized query vector.
+        """
+
+    @abstractmethod
+    def save(self) -> None:
+        pass
+
+    @abstractmethod
+    def load(self, dim: int) -> bool:
+        pass
+
+
+class IVFIndex(ANNIndex):
+    """
+    Inverted file index with flat lists, trained by spherical k-means.
+
+    Every row belongs to the list of its nearest centroid; a query scans the
+    `nprobe` lists whose centroids are closest to it. Recall grows and speed
+    drops with `nprobe`, `nprobe == nlist` is an exhaustive search.
+    """
+
+    def __init__(
+        self,
+        path_prefix: str,
+        nlist: int = 1024,
+        nprobe: int = 16,
+        train_iters: int = 10,
+        seed: int = 0,
+    ) -> None:
+        super().__init__(f'{path_prefix}.ivf.npz')
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_iters = train_iters
+        self.seed = seed
+        self.centroids: Optional[npt.NDArray[np.float32]] = None
+        # list id of every row, -1 for rows that are not indexed
+        self.assignment: npt.NDArray[np.int32] = np.full(0, -1, dtype=np.int32)
+        self.lists: List[List[int]] = []
+        self.list_arrays: List[Optional[npt.NDArray[np.int64]]] = []
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def train(
+        self, matrix: npt.NDArray[np.float32], rows: npt.NDArray[np.int64]
+    ) -> None:
+        nlist = max(1, min(self.nlist, len(rows)))
+        rng = np.random.default_rng(self.seed)
+        # k-means on a sample is enough to place the centroids
+        sample_size = min(len(rows), nlist * 64)
+        sample = np.asarray(
+            matrix[np.sort(rng.choice(rows, size=sample_size, replace=False))]
+        )
+        centroids = sample[rng.choice(sample_size, size=nlist, replace=False)].copy()
+        for _ in range(self.train_iters):
+            labels = self.assign(sample, centroids)
+            counts = np.bincount(labels, minlength=nlist)
+            starts = np.cumsum(counts) - counts
+            empty = counts == 0
+            sums = np.zeros_like(centroids)
+            sums[~empty] = np.add.reduceat(
+                sample[np.argsort(labels, kind='stable')], starts[~empty], axis=0
+            )
+            # reseed empty clusters so that every list stays usable
+            sums[empty] = sample[rng.choice(sample_size, size=int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.maximum(norms, 1e-12)
+
+        self.centroids = centroids.astype(np.float32)
+        self.assignment = np.full(
+            int(rows.max()) + 1 if len(rows) else 0, -1, dtype=np.int32
+        )
+        for start in range(0, len(rows), 65536):
+            chunk = rows[start : start + 65536]
+            self.assignment[chunk] = self.assign(matrix[chunk], self.centroids)
+        self.rebuild_lists()
+
+    def add(self, row: int, vector: npt.NDArray[np.float32]) -> None:
+        if self.centroids is None:
+            return
+        self.remove(row)
+        if row >= len(self.assignment):
+            size = max(row + 1, 2 * len(self.assignment))
+            self.assignment = np.concatenate(
+                [
+                    self.assignment,
+                    np.full(size - len(self.assignment), -1, dtype=np.int32),
+                ]
+            )
+        list_id = int(np.argmax(self.centroids @ vector))
+        self.assignment[row] = list_id
+        self.lists[list_id].append(row)
+        self.list_arrays[list_id] = None
+
+    def remove(self, row: int) -> None:
+        if row >= len(self.assignment) or self.assignment[row] < 0:
+            return
+        list_id = int(self.assignment[row])
+        self.lists[list_id].remove(row)
+        self.list_arrays[list_id] = None
+        self.assignment[row] = -1
+
+    def candidates(
+        self, query: npt.NDArray[np.float32], num: int
+    ) -> npt.NDArray[np.int64]:
+        if self.centroids is None:
+            return np.zeros(0, dtype=np.int64)
+        scores = self.centroids @ query
+        if self.nprobe < len(scores):
+            probe = np.argpartition(-scores, self.nprobe - 1)[: self.nprobe]
+        else:
+            probe = np.arange(len(scores))
+        return np.concatenate([self.list_array(int(i)) for i in probe])
+
+    def list_array(self, list_id: int) -> npt.NDArray[np.int64]:
+        array = self.list_arrays[list_id]
+        if array is None:
+            array = np.asarray(self.lists[list_id], dtype=np.int64)
+            self.list_arrays[list_id] = array
+        return array
+
+    def rebuild_lists(self) -> None:
+        assert self.centroids is not None
+        rows = np.flatnonzero(self.assignment >= 0)
+        rows = rows[np.argsort(self.assignment[rows], kind='stable')]
+        bounds = np.searchsorted(
+            self.assignment[rows], np.arange(len(self.centroids) + 1)
+        )
+        arrays = [
+            rows[start:end].astype(np.int64) for start, end in zip(bounds, bounds[1:])
+        ]
+        self.lists = [array.tolist() for array in arrays]
+        self.list_arrays = list(arrays)
+
+    def save(self) -> None:
+        if self.centroids is None:
+            return
+        with open(f'{self.path}.tmp', 'wb') as f:
+            np.savez(f, centroids=self.centroids, assignment=self.assignment)
+        os.replace(f'{self.path}.tmp', self.path)
+
+    def load(self, dim: int) -> bool:
+        if not os.path.exists(self.path):
+            return False
+        with np.load(self.path) as saved:
+            if saved['centroids'].shape[1] != dim:
+                return False
+            self.centroids = saved['centroids']
+            self.assignment = saved['assignment']
+        self.rebuild_lists()
+        return True
+
+    @staticmethod
+    def assign(
+        vectors: npt.NDArray[np.float32], centroids: npt.NDArray[np.float32]
+    ) -> npt.NDArray[np.int32]:
+        labels: npt.NDArray[np.int32] = np.argmax(vectors @ centroids.T, axis=1).astype(
+            np.int32
+        )
+        return labels
+
+
+class HNSWIndex(ANNIndex):
+    """
+    Hierarchical navigable small world graph backed by the optional hnswlib.
+
+    `ef_search` is the size of the candidate list kept while walking the graph,
+    larger values trade latency for recall. Deleted rows are only marked, a row
+    reused by the store replaces its old vector in the graph.
+    """
+
+    def __init__(
+        self,
+        path_prefix: str,
+        m: int = 16,
+        ef_construction: int = 200,
+        ef_search: int = 64,
+    ) -> None:
+        if hnswlib is None:
+            raise ValueError(
+                "HNSW index requires the optional 'hnswlib' package: pip install hnswlib"
+            )
+        super().__init__(f'{path_prefix}.hnsw.bin')
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.index: Optional[Any] = None
+        self.live: npt.NDArray[np.bool_] = np.zeros(0, dtype=bool)
+
+    @property
+    def is_trained(self) -> bool:
+        return self.index is not None
+
+    def train(
+        self, matrix: npt.NDArray[np.float32], rows: npt.NDArray[np.int64]
+    ) -> None:
+        self.index = hnswlib.Index(space='ip', dim=matrix.shape[1])
+        self.index.init_index(
+            max_elements=max(2 * len(rows), 1024),
+            ef_construction=self.ef_construction,
+            M=self.m,
+        )
+        self.index.set_ef(self.ef_search)
+        self.live = np.zeros(int(rows.max()) + 1 if len(rows) else 0, dtype=bool)
+        for start in range(0, len(rows), 65536):
+            chunk = rows[start : start + 65536]
+            self.index.add_items(np.asarray(matrix[chunk]), chunk)
+            self.live[chunk] = True
+
+    def add(self, row: int, vector: npt.NDArray[np.float32]) -> None:
+        if self.index is None:
+            return
+        if self.index.get_current_count() >= self.index.get_max_elements():
+            self.index.resize_index(2 * self.index.get_max_elements())
+        self.index.add_items(vector.reshape(1, -1), [row])
+        if row >= len(self.live):
+            size = max(row + 1, 2 * len(self.live))
+            self.live = np.concatenate(
+                [self.live, np.zeros(size - len(self.live), dtype=bool)]
+            )
+        self.live[row] = True
+
+    def remove(self, row: int) -> None:
+        if self.index is None or row >= len(self.live) or not self.live[row]:
+            return
+        self.index.mark_deleted(row)
+        self.live[row] = False
+
+    def candidates(
+        self, query: npt.NDArray[np.float32], num: int
+    ) -> npt.NDArray[np.int64]:
+        live = int(self.live.sum())
+        if self.index is None or live == 0:
+            return np.zeros(0, dtype=np.int64)
+        try:
+            labels, _ = self.index.knn_query(
+                query.reshape(1, -1), k=min(max(num, self.ef_search), live)
+            )
+        except RuntimeError:
+            # the graph could not produce k results, let the exact path answer
+            return np.zeros(0, dtype=np.int64)
+        rows: npt.NDArray[np.int64] = labels[0].astype(np.int64)
+        return rows
+
+    def save(self) -> None:
+        if self.index is None:
+            return
+        self.index.save_index(f'{self.path}.tmp')
+        os.replace(f'{self.path}.tmp', self.path)
+        np.save(f'{self.path}.live.npy', self.live)
+
+    def load(self, dim: int) -> bool:
+        if not os.path.exists(self.path) or not os.path.exists(f'{self.path}.live.npy'):
+            return False
+        self.index = hnswlib.Index(space='ip', dim=dim)
+        self.index.load_index(self.path)
+        self.index.set_ef(self.ef_search)
+        self.live = np.load(f'{self.path}.live.npy')
+        return True
+
+
+def create_ann_index(
+    config: Optional[DatabaseConfig], path_prefix: str
+) -> Optional[ANNIndex]:
+    if config is None or config.ann_index is None:
+        return None
+    if config.ann_index == 'ivf':
+        return IVFIndex(path_prefix, nlist=config.ann_nlist, nprobe=config.ann_nprobe)
+    if config.ann_index == 'hnsw':
+        return HNSWIndex(
+            path_prefix,
+            m=config.ann_m,
+            ef_construction=config.ann_ef_construction,
+            ef_search=config.ann_ef_search,
+        )
+    raise ValueError(f'Unsupported ANN index: {config.ann_index}')
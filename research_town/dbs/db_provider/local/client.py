@@ -1,25 +1,71 @@
 import json
 import os
 import pickle
-from typing import Any, Dict, List, Set, TypeVar, Union
+import threading
+from functools import wraps
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 import numpy as np
 import numpy.typing as npt
 from dotenv import load_dotenv
 
+from ....configs import DatabaseConfig
 from ....data.data import Data
 from ..client import DatabaseClient
+from .ann_index import create_ann_index
+from .embedding_store import EmbeddingStore
+from .field_index import FieldIndex
 
 load_dotenv()
 
 T = TypeVar('T', bound=Data)
+F = TypeVar('F', bound=Callable[..., Any])
+
+
+def synchronized(method: F) -> F:
+    # environments run agents in threads that share one client
+    @wraps(method)
+    def wrapper(self: 'LocalDatabaseClient', *args: Any, **kwargs: Any) -> Any:
+        with self.lock:
+            return method(self, *args, **kwargs)
+
+    return wrapper  # type: ignore[return-value]
 
 
 class LocalDatabaseClient(DatabaseClient):
-    def __init__(self) -> None:
+    def __init__(self, config: Optional[DatabaseConfig] = None) -> None:
         self.data: Dict[str, Dict[str, Any]] = {}
-        self.data_embed: Dict[str, Dict[str, npt.NDArray[np.float32]]] = {}
+        self.data_embed: Dict[str, EmbeddingStore] = {}
+        self.indexes: Dict[str, FieldIndex] = {}
         self.registered_namespaces: Set[str] = set()
+        self.lock = threading.RLock()
+
+        # In journal mode every mutation is appended to <namespace>.log and the
+        # <namespace>.json snapshot is only rewritten when the log is compacted.
+        self.journal = config.journal if config is not None else False
+        self.journal_compact_threshold = (
+            config.journal_compact_threshold if config is not None else 1000
+        )
+        self.journal_size: Dict[str, int] = {}
+        # a read-only client loads the folder but never writes to it
+        self.read_only = config.read_only if config is not None else False
+        if self.read_only:
+            self.journal = False
+
+        # embedding namespaces of at least ann_min_size candidates are searched
+        # through an approximate index when one is configured
+        self.config = config
+        self.ann_min_size = config.ann_min_size if config is not None else 10000
 
         folder_path = os.getenv('DATABASE_FOLDER_PATH')
         if folder_path is None:
@@ -32,23 +78,31 @@ class LocalDatabaseClient(DatabaseClient):
         self.folder_path = folder_path
         self.load()
 
-    def register_namespace(self, namespace: str, with_embeddings: bool) -> None:
+    @synchronized
+    def register_namespace(
+        self,
+        namespace: str,
+        with_embeddings: bool,
+        indexed_fields: Optional[List[str]] = None,
+    ) -> None:
         if namespace not in self.registered_namespaces:
             self.registered_namespaces.add(namespace)
             self.data[namespace] = {}
+            self.indexes[namespace] = FieldIndex()
             if with_embeddings:
-                self.data_embed[namespace] = {}
+                self.data_embed[namespace] = self.create_store(namespace)
             self.save_manifest()
+        # indexes live in memory only, a loaded namespace builds them here once
+        for field in indexed_fields or []:
+            self.indexes[namespace].add_field(field, self.data[namespace])
 
+    @synchronized
     def count(self, namespace: str, **conditions: Union[str, int, float]) -> int:
         if conditions is None or not conditions:
             return len(self.data[namespace])
-        result = 0
-        for data in self.data[namespace].values():
-            if all(data[key] == value for key, value in conditions.items()):
-                result += 1
-        return result
+        return len(self.match(namespace, **conditions))
 
+    @synchronized
     def add(
         self,
         namespace: str,
@@ -65,50 +119,110 @@ class LocalDatabaseClient(DatabaseClient):
 
         if with_embed:
             for data_item, embedding in zip(data, embeddings, strict=True):
-                self.data_embed[namespace][data_item['pk']] = embedding
-                self.data[namespace][data_item['pk']] = data_item
+                self.data_embed[namespace].put(data_item['pk'], embedding)
+                self.data_embed[namespace].set_fields(data_item['pk'], data_item)
+                self.put_record(namespace, data_item)
         else:
             for data_item in data:
-                self.data[namespace][data_item['pk']] = data_item
-
-        self.save_namespace(namespace, with_embed=with_embed)
+                self.put_record(namespace, data_item)
+
+        if self.journal:
+            self.append_journal(
+                namespace,
+                [
+                    {
+                        'op': 'add',
+                        'data': data_item,
+                        'embedding': (
+                            np.asarray(embedding).tolist() if with_embed else None
+                        ),
+                    }
+                    for data_item, embedding in zip(
+                        data, embeddings if with_embed else [None] * len(data)
+                    )
+                ],
+            )
+        else:
+            self.save_namespace(namespace, with_embed=with_embed)
 
+    @synchronized
     def update(self, namespace: str, pk: str, updates: Dict[str, Any]) -> bool:
         if namespace in self.data and pk in self.data[namespace]:
             with_embed = False
+            self.indexes[namespace].discard(pk, self.data[namespace][pk])
             for key, value in updates.items():
                 if value is not None:
                     if key == 'embedding' and namespace in self.data_embed:
-                        self.data_embed[namespace][pk] = value
+                        self.data_embed[namespace].put(pk, value)
                         with_embed = True
                     else:
                         self.data[namespace][pk][key] = value
-            self.save_namespace(namespace, with_embed=with_embed)
+            self.indexes[namespace].insert(pk, self.data[namespace][pk])
+            if namespace in self.data_embed:
+                self.data_embed[namespace].set_fields(pk, self.data[namespace][pk])
+            if self.journal:
+                journal_updates = {
+                    key: np.asarray(value).tolist() if key == 'embedding' else value
+                    for key, value in updates.items()
+                    if value is not None
+                }
+                self.append_journal(
+                    namespace, [{'op': 'update', 'pk': pk, 'updates': journal_updates}]
+                )
+            else:
+                self.save_namespace(namespace, with_embed=with_embed)
             return True
         return False
 
+    @synchronized
     def delete(self, namespace: str, pk: str) -> bool:
         if namespace in self.data and pk in self.data[namespace]:
-            self.data[namespace].pop(pk)
-            if namespace in self.data_embed and pk in self.data_embed[namespace]:
-                self.data_embed[namespace].pop(pk)
+            self.indexes[namespace].remove(pk, self.data[namespace].pop(pk))
+            if namespace in self.data_embed and self.data_embed[namespace].remove(pk):
                 with_embed = True
             else:
                 with_embed = False
-            self.save_namespace(namespace, with_embed=with_embed)
+            if self.journal:
+                self.append_journal(namespace, [{'op': 'delete', 'pk': pk}])
+            else:
+                self.save_namespace(namespace, with_embed=with_embed)
             return True
         return False
 
+    @synchronized
     def get(
         self, namespace: str, **conditions: Union[str, int, float, List[int], None]
     ) -> List[Dict[str, Any]]:
         if conditions is None or not conditions:
             return list(self.data[namespace].values())
-        result = []
-        for data in self.data[namespace].values():
-            if all(data[key] == value for key, value in conditions.items()):
-                result.append(data)
-        return result
+        return self.match(namespace, **conditions)
+
+    def match(
+        self, namespace: str, **conditions: Union[str, int, float, List[int], None]
+    ) -> List[Dict[str, Any]]:
+        records = self.data[namespace]
+        if 'pk' in conditions:
+            pk = conditions['pk']
+            record = records.get(pk) if isinstance(pk, str) else None
+            candidates = [record] if record is not None else []
+        else:
+            pks = self.indexes[namespace].lookup(conditions)
+            candidates = (
+                list(records.values()) if pks is None else [records[pk] for pk in pks]
+            )
+        # candidates from an index still pass through the remaining conditions
+        return [
+            data
+            for data in candidates
+            if all(data[key] == value for key, value in conditions.items())
+        ]
+
+    def put_record(self, namespace: str, data_item: Dict[str, Any]) -> None:
+        index = self.indexes[namespace]
+        if data_item['pk'] in self.data[namespace]:
+            index.discard(data_item['pk'], self.data[namespace][data_item['pk']])
+        self.data[namespace][data_item['pk']] = data_item
+        index.insert(data_item['pk'], data_item)
 
     def search(
         self,
@@ -117,45 +231,108 @@ class LocalDatabaseClient(DatabaseClient):
         num: int = 1,
         **conditions: Union[str, int, float, List[int], None],
     ) -> List[List[Dict[str, Any]]]:
+        matches = self.search_with_scores(
+            namespace, query_embeddings, num=num, **conditions
+        )
+        return [[data for data, _ in match] for match in matches]
+
+    @synchronized
+    def search_with_scores(
+        self,
+        namespace: str,
+        query_embeddings: List[npt.NDArray[np.float32]],
+        num: int = 1,
+        **conditions: Union[str, int, float, List[int], None],
+    ) -> List[List[Tuple[Dict[str, Any], float]]]:
         if namespace not in self.data_embed:
             raise ValueError(
                 f'Embedding search not available for namespace: {namespace}'
             )
-        # Filter candidates based on conditions
-        candidates = self.get(namespace, **conditions)
-        if not candidates:
+        store = self.data_embed[namespace]
+        mask = self.condition_mask(namespace, **conditions)
+        rows = np.flatnonzero(mask)
+        if len(rows) == 0 or num <= 0:
             return [[] for _ in range(len(query_embeddings))]
 
-        # Fetch embeddings for candidates
-        pks = [data['pk'] for data in candidates]
-        candidate_embeddings = np.asarray(
-            [self.data_embed[namespace][pk] for pk in pks], dtype=np.float32
-        )
-        candidate_embeddings = candidate_embeddings / np.linalg.norm(
-            candidate_embeddings, axis=1, keepdims=True
-        )
-
         q_embeddings = np.asarray(query_embeddings, dtype=np.float32)
         q_embeddings = q_embeddings / np.linalg.norm(
             q_embeddings, axis=1, keepdims=True
         )
 
-        # Calculate cosine similarity
-        similarities = q_embeddings @ candidate_embeddings.T
+        if store.ann is not None and len(rows) >= self.ann_min_size:
+            store.train_ann()
+            matches = []
+            for q_embedding in q_embeddings:
+                candidates = store.ann.candidates(q_embedding, num)
+                candidates = candidates[mask[candidates]]
+                if len(candidates) < num:
+                    # the probed part of the index cannot fill k, answer exactly
+                    candidates = rows
+                similarities = (store.view()[candidates] @ q_embedding)[None, :]
+                matches += self.rank_rows(namespace, candidates, similarities, num)
+            return matches
+
+        # Calculate cosine similarity, stored embeddings are already normalized.
+        # Gathering candidate rows copies them, so only do it for narrow filters
+        # and otherwise run the matmul over the zero-copy view of the matrix.
+        if len(rows) * 2 < store.size:
+            similarities = q_embeddings @ store.view()[rows].T
+        else:
+            similarities = (q_embeddings @ store.view().T)[:, rows]
+        return self.rank_rows(namespace, rows, similarities, num)
+
+    def rank_rows(
+        self,
+        namespace: str,
+        rows: npt.NDArray[np.int64],
+        similarities: npt.NDArray[np.float32],
+        num: int,
+    ) -> List[List[Tuple[Dict[str, Any], float]]]:
+        store = self.data_embed[namespace]
+        # Get top matches, only the selected k columns are fully sorted
+        if num < len(rows):
+            top_indices = np.argpartition(-similarities, num - 1, axis=1)[:, :num]
+        else:
+            top_indices = np.tile(np.arange(len(rows)), (len(similarities), 1))
+        top_scores = np.take_along_axis(similarities, top_indices, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        top_indices = np.take_along_axis(top_indices, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
 
-        # Get top matches
         matches = []
-        for sorted_indices in np.argsort(similarities, axis=1):
-            sorted_indices = sorted_indices[::-1][:num]
-            matches.append([candidates[i] for i in sorted_indices])
+        for indices, scores in zip(top_indices, top_scores):
+            matches.append(
+                [
+                    (self.data[namespace][str(store.row_pks[rows[i]])], float(score))
+                    for i, score in zip(indices, scores)
+                ]
+            )
         return matches
 
+    def condition_mask(
+        self, namespace: str, **conditions: Union[str, int, float, List[int], None]
+    ) -> npt.NDArray[np.bool_]:
+        store = self.data_embed[namespace]
+        mask = store.valid_mask().copy()
+        for key, value in conditions.items():
+            column = store.column(key, self.data[namespace])
+            if isinstance(value, list):
+                mask &= np.fromiter(
+                    (item == value for item in column), dtype=bool, count=len(column)
+                )
+            else:
+                mask &= column == value
+        return mask
+
+    @synchronized
     def save(self, with_embed: bool = False) -> None:
         for namespace in self.data:
-            self.save_namespace(namespace, with_embed=with_embed)
+            self.save_namespace(namespace, with_embed=with_embed or self.journal)
         self.save_manifest()
 
     def save_manifest(self) -> None:
+        if self.read_only:
+            return
         manifest = {
             'namespaces': list(self.registered_namespaces),
             'embedding_namespaces': list(self.data_embed.keys()),
@@ -166,26 +343,105 @@ class LocalDatabaseClient(DatabaseClient):
             json.dump(manifest, f, indent=2)
 
     def save_namespace(self, namespace: str, with_embed: bool = False) -> None:
+        if self.read_only:
+            return
         file_name = f'{namespace}.json'
 
         if with_embed and namespace in self.data_embed:
             self.save_embeddings(namespace=namespace)
 
-        with open(
-            os.path.join(self.folder_path, file_name), 'w', encoding='utf-8'
-        ) as f:
+        # write to a temporary file first so that a crash never leaves a
+        # truncated snapshot next to a journal that has already been dropped
+        file_path = os.path.join(self.folder_path, file_name)
+        with open(f'{file_path}.tmp', 'w', encoding='utf-8') as f:
             json.dump(
                 self.data[namespace],
                 f,
                 indent=2,
             )
+        os.replace(f'{file_path}.tmp', file_path)
+        self.truncate_journal(namespace)
+
+    def append_journal(self, namespace: str, entries: List[Dict[str, Any]]) -> None:
+        file_name = f'{namespace}.log'
+        with open(
+            os.path.join(self.folder_path, file_name), 'a', encoding='utf-8'
+        ) as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + '\n')
+        self.journal_size[namespace] = self.journal_size.get(namespace, 0) + len(
+            entries
+        )
+
+        # compacting only once the log outgrows the snapshot keeps writes O(1) amortized
+        if self.journal_size[namespace] >= max(
+            self.journal_compact_threshold, len(self.data[namespace])
+        ):
+            self.save_namespace(namespace, with_embed=namespace in self.data_embed)
+
+    def truncate_journal(self, namespace: str) -> None:
+        file_name = f'{namespace}.log'
+        if os.path.exists(os.path.join(self.folder_path, file_name)):
+            os.remove(os.path.join(self.folder_path, file_name))
+        self.journal_size[namespace] = 0
+
+    def replay_journal(self, namespace: str) -> None:
+        file_path = os.path.join(self.folder_path, f'{namespace}.log')
+        if not os.path.exists(file_path):
+            return
+
+        with_embed = namespace in self.data_embed
+        replayed = 0
+        good_offset = 0
+        with open(file_path, 'rb') as f:
+            for line in f:
+                # a torn write can only affect the last line of the log
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    entry = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    break
+                good_offset += len(line)
+                if entry['op'] == 'add':
+                    pk = entry['data']['pk']
+                    self.data[namespace][pk] = entry['data']
+                    if with_embed and entry.get('embedding') is not None:
+                        self.data_embed[namespace].put(
+                            pk, np.asarray(entry['embedding'], dtype=np.float32)
+                        )
+                        self.data_embed[namespace].set_fields(pk, entry['data'])
+                elif entry['op'] == 'update':
+                    pk = entry['pk']
+                    if pk not in self.data[namespace]:
+                        continue
+                    for key, value in entry['updates'].items():
+                        if key == 'embedding' and with_embed:
+                            self.data_embed[namespace].put(
+                                pk, np.asarray(value, dtype=np.float32)
+                            )
+                        else:
+                            self.data[namespace][pk][key] = value
+                    if with_embed:
+                        self.data_embed[namespace].set_fields(
+                            pk, self.data[namespace][pk]
+                        )
+                elif entry['op'] == 'delete':
+                    self.data[namespace].pop(entry['pk'], None)
+                    if with_embed:
+                        self.data_embed[namespace].remove(entry['pk'])
+                replayed += 1
+        self.journal_size[namespace] = replayed
+
+        # drop the torn tail, or entries appended after it would be lost on reload
+        if good_offset < os.path.getsize(file_path) and not self.read_only:
+            with open(file_path, 'r+b') as f:
+                f.truncate(good_offset)
 
     def save_embeddings(self, namespace: str) -> None:
         if namespace not in self.data_embed:
             return
-        file_name = f'{namespace}.pkl'
-        with open(os.path.join(self.folder_path, file_name), 'wb') as pkl_file:
-            pickle.dump(self.data_embed[namespace], pkl_file)
+        self.data_embed[namespace].save()
 
     def load(self) -> None:
         if not os.path.exists(os.path.join(self.folder_path, 'manifest.json')):
@@ -212,11 +468,29 @@ class LocalDatabaseClient(DatabaseClient):
             with open(os.path.join(self.folder_path, file_name), encoding='utf-8') as f:
                 data = json.load(f)
         self.data[namespace] = data
+        self.replay_journal(namespace)
+        self.indexes[namespace] = FieldIndex()
+        self.indexes[namespace].build(self.data[namespace])
+
+    def create_store(self, namespace: str) -> EmbeddingStore:
+        path_prefix = os.path.join(self.folder_path, namespace)
+        return EmbeddingStore(
+            path_prefix,
+            ann=create_ann_index(self.config, path_prefix),
+            read_only=self.read_only,
+        )
 
     def load_embeddings(self, namespace: str) -> None:
+        store = self.create_store(namespace)
+        self.data_embed[namespace] = store
+        if store.load():
+            return
+
+        # migrate embeddings pickled by earlier versions into the memmap store
         file_name = f'{namespace}.pkl'
-        if not os.path.exists(os.path.join(self.folder_path, file_name)):
-            self.data_embed[namespace] = {}
-        else:
+        if os.path.exists(os.path.join(self.folder_path, file_name)):
             with open(os.path.join(self.folder_path, file_name), 'rb') as pkl_file:
-                self.data_embed[namespace] = pickle.load(pkl_file)
+                embeddings: Dict[str, npt.NDArray[np.float32]] = pickle.load(pkl_file)
+            for pk, embedding in embeddings.items():
+                store.put(pk, embedding)
+            store.save()
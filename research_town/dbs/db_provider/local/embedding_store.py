@@ -0,0 +1,214 @@
+import json
+import os
+from typing import Any, Dict, Iterable, List, Literal, Optional
+
+import numpy as np
+import numpy.typing as npt
+
+from .ann_index import ANNIndex
+
+
+class EmbeddingStore:
+    """
+    Contiguous float32 embedding matrix backed by an np.memmap file.
+
+    Every row is L2-normalized on insert so that cosine similarity is a single
+    matmul over `view()`. Rows of deleted records go to a free-list and are
+    reused by later inserts; `row_pks` maps each row back to its primary key.
+    Record fields used as search conditions are mirrored into row-aligned
+    columns so that filtering is a boolean mask instead of a scan over dicts.
+    An optional ANN index is kept in sync with the rows and saved alongside.
+    A read-only store maps the file copy-on-write and never writes it back.
+    """
+
+    def __init__(
+        self,
+        path_prefix: str,
+        initial_capacity: int = 1024,
+        ann: Optional[ANNIndex] = None,
+        read_only: bool = False,
+    ) -> None:
+        self.matrix_path = f'{path_prefix}.emb'
+        self.index_path = f'{path_prefix}.emb.json'
+        self.initial_capacity = initial_capacity
+        self.ann = ann
+        self.read_only = read_only
+
+        self.dim: Optional[int] = None
+        self.capacity = 0
+        self.size = 0
+        self.rows: Dict[str, int] = {}
+        self.row_pks: List[Optional[str]] = []
+        self.free_rows: List[int] = []
+        self.matrix: Optional[npt.NDArray[np.float32]] = None
+        self.valid: npt.NDArray[np.bool_] = np.zeros(0, dtype=bool)
+        self.columns: Dict[str, npt.NDArray[np.object_]] = {}
+
+    def __contains__(self, pk: str) -> bool:
+        return pk in self.rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def get(self, pk: str) -> npt.NDArray[np.float32]:
+        assert self.matrix is not None
+        return np.array(self.matrix[self.rows[pk]])
+
+    def put(self, pk: str, embedding: npt.NDArray[np.float32]) -> None:
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector = vector / norm
+
+        if self.matrix is None:
+            self.dim = vector.shape[0]
+            self._resize(self.initial_capacity)
+        elif vector.shape[0] != self.dim:
+            raise ValueError(
+                f'Embedding dimension {vector.shape[0]} does not match store dimension {self.dim}'
+            )
+
+        if pk in self.rows:
+            row = self.rows[pk]
+        elif self.free_rows:
+            row = self.free_rows.pop()
+        else:
+            if self.size == self.capacity:
+                self._resize(self.capacity * 2)
+            row = self.size
+            self.size += 1
+            self.row_pks.append(None)
+
+        assert self.matrix is not None
+        self.matrix[row] = vector
+        self.valid[row] = True
+        self.rows[pk] = row
+        self.row_pks[row] = pk
+        if self.ann is not None:
+            self.ann.add(row, vector)
+
+    def remove(self, pk: str) -> bool:
+        if pk not in self.rows:
+            return False
+        row = self.rows.pop(pk)
+        assert self.matrix is not None
+        self.matrix[row] = 0.0
+        self.valid[row] = False
+        self.row_pks[row] = None
+        for column in self.columns.values():
+            column[row] = None
+        self.free_rows.append(row)
+        if self.ann is not None:
+            self.ann.remove(row)
+        return True
+
+    def view(self) -> npt.NDArray[np.float32]:
+        if self.matrix is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        return self.matrix[: self.size]
+
+    def valid_mask(self) -> npt.NDArray[np.bool_]:
+        return self.valid[: self.size]
+
+    def train_ann(self) -> None:
+        if self.ann is not None and not self.ann.is_trained:
+            self.ann.train(self.view(), np.flatnonzero(self.valid_mask()))
+
+    def column(
+        self, key: str, records: Dict[str, Dict[str, Any]]
+    ) -> npt.NDArray[np.object_]:
+        if key not in self.columns:
+            column = np.empty(self.capacity, dtype=object)
+            for pk, row in self.rows.items():
+                column[row] = records[pk].get(key)
+            self.columns[key] = column
+        return self.columns[key][: self.size]
+
+    def set_fields(self, pk: str, record: Dict[str, Any]) -> None:
+        row = self.rows.get(pk)
+        if row is None:
+            return
+        for key, column in self.columns.items():
+            column[row] = record.get(key)
+
+    def get_rows(self, pks: Iterable[str]) -> npt.NDArray[np.int64]:
+        return np.fromiter(
+            (self.rows[pk] for pk in pks if pk in self.rows), dtype=np.int64
+        )
+
+    def save(self) -> None:
+        if self.read_only:
+            return
+        if isinstance(self.matrix, np.memmap):
+            self.matrix.flush()
+        index = {
+            'dim': self.dim,
+            'capacity': self.capacity,
+            'size': self.size,
+            'row_pks': self.row_pks,
+            'free_rows': self.free_rows,
+        }
+        with open(f'{self.index_path}.tmp', 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(f'{self.index_path}.tmp', self.index_path)
+        if self.ann is not None:
+            self.ann.save()
+
+    def load(self) -> bool:
+        if not os.path.exists(self.index_path) or not os.path.exists(self.matrix_path):
+            return False
+        with open(self.index_path, encoding='utf-8') as f:
+            index = json.load(f)
+        self.dim = index['dim']
+        self.capacity = index['capacity']
+        self.size = index['size']
+        self.row_pks = index['row_pks']
+        self.free_rows = index['free_rows']
+        self.rows = {pk: row for row, pk in enumerate(self.row_pks) if pk is not None}
+        self.valid = np.zeros(self.capacity, dtype=bool)
+        self.valid[list(self.rows.values())] = True
+        if self.dim is not None and self.capacity > 0:
+            self.matrix = np.memmap(
+                self.matrix_path,
+                dtype=np.float32,
+                mode='c' if self.read_only else 'r+',
+                shape=(self.capacity, self.dim),
+            )
+            if self.ann is not None:
+                self.ann.load(self.dim)
+        return True
+
+    def _resize(self, capacity: int) -> None:
+        assert self.dim is not None
+        if self.read_only:
+            # grow a private copy, the file on disk keeps its size and content
+            matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+            if self.matrix is not None:
+                matrix[: len(self.matrix)] = self.matrix
+            self.matrix = matrix
+        else:
+            self.resize_file(capacity)
+        self.valid = np.concatenate(
+            [self.valid, np.zeros(capacity - len(self.valid), dtype=bool)]
+        )
+        for key, column in self.columns.items():
+            self.columns[key] = np.concatenate(
+                [column, np.empty(capacity - len(column), dtype=object)]
+            )
+        self.capacity = capacity
+
+    def resize_file(self, capacity: int) -> None:
+        assert self.dim is not None
+        if isinstance(self.matrix, np.memmap):
+            self.matrix.flush()
+        self.matrix = None
+        mode: Literal['r+', 'w+'] = 'r+' if os.path.exists(self.matrix_path) else 'w+'
+        if mode == 'r+':
+            with open(self.matrix_path, 'r+b') as f:
+                f.truncate(capacity * self.dim * np.dtype(np.float32).itemsize)
+        self.matrix = np.memmap(
+            self.matrix_path,
+            dtype=np.float32,
+            mode=mode,
+            shape=(capacity, self.dim),
+        )
@@ -0,0 +1,75 @@
+from typing import Any, Dict, List, Optional
+
+
+def is_hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+class FieldIndex:
+    """
+    Hash indexes from field values to primary keys for one namespace.
+
+    Each indexed field maps a value to the pks holding it, so equality lookups
+    cost O(matches) instead of a scan over the namespace. `order` remembers when
+    each pk was first inserted so that results keep the namespace order.
+    """
+
+    def __init__(self) -> None:
+        self.buckets: Dict[str, Dict[Any, Dict[str, None]]] = {}
+        self.order: Dict[str, int] = {}
+        self.next_order = 0
+
+    def build(self, records: Dict[str, Dict[str, Any]]) -> None:
+        for pk, record in records.items():
+            self.insert(pk, record)
+
+    def add_field(self, field: str, records: Dict[str, Dict[str, Any]]) -> None:
+        if field in self.buckets:
+            return
+        buckets: Dict[Any, Dict[str, None]] = {}
+        for pk, record in records.items():
+            value = record.get(field)
+            if is_hashable(value):
+                buckets.setdefault(value, {})[pk] = None
+        self.buckets[field] = buckets
+
+    def insert(self, pk: str, record: Dict[str, Any]) -> None:
+        if pk not in self.order:
+            self.order[pk] = self.next_order
+            self.next_order += 1
+        for field, buckets in self.buckets.items():
+            value = record.get(field)
+            if is_hashable(value):
+                buckets.setdefault(value, {})[pk] = None
+
+    def discard(self, pk: str, record: Dict[str, Any]) -> None:
+        for field, buckets in self.buckets.items():
+            value = record.get(field)
+            if is_hashable(value) and value in buckets:
+                buckets[value].pop(pk, None)
+                if not buckets[value]:
+                    del buckets[value]
+
+    def remove(self, pk: str, record: Dict[str, Any]) -> None:
+        self.discard(pk, record)
+        self.order.pop(pk, None)
+
+    def lookup(self, conditions: Dict[str, Any]) -> Optional[List[str]]:
+        """
+        Return the pks of the smallest bucket matching an indexed condition,
+        or None when no condition can be answered from an index.
+        """
+        best: Optional[Dict[str, None]] = None
+        for field, value in conditions.items():
+            if field not in self.buckets or not is_hashable(value):
+                continue
+            bucket = self.buckets[field].get(value, {})
+            if best is None or len(bucket) < len(best):
+                best = bucket
+        if best is None:
+            return None
+        return sorted(best, key=self.order.__getitem__)
@@ -1,5 +1,17 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
 from beartype import beartype
-from beartype.typing import Any, Dict, Generator, List, Tuple
+from beartype.typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterator,
+    List,
+    Tuple,
+    TypeVar,
+)
 
 from ..agents import Agent, AgentManager
 from ..configs import Config
@@ -8,6 +20,8 @@ from ..dbs import LogDB, PaperDB, ProgressDB
 from ..utils.sampler import sample_ideas
 from .env_base import BaseEnv
 
+T = TypeVar('T')
+
 
 class ProposalWritingwithRAGEnv(BaseEnv):
     def __init__(
@@ -58,17 +72,10 @@ class ProposalWritingwithRAGEnv(BaseEnv):
         researchers = self.members + [self.leader]
 
         # Step 1: Researchers review literature and gather insights
-        for researcher in researchers:
-            related_papers = self.paper_db.search_papers(
-                query=';'.join(self.contexts),
-                num=self.config.param.related_paper_num,
-            )
-            summary, keywords, insight = researcher.review_literature(
-                papers=related_papers,
-                contexts=self.contexts,
-                config=self.config,
-            )
-
+        for researcher, (keywords, insight) in zip(
+            researchers,
+            self.map_researchers(self.review_literature, researchers),
+        ):
             yield insight, researcher
             insights.append(insight)
             all_keywords.extend(keywords)
@@ -77,16 +84,15 @@ class ProposalWritingwithRAGEnv(BaseEnv):
         top_keyword = sorted(all_keywords, key=lambda x: x[1], reverse=True)[0]
 
         # Step 3: Researchers brainstorm ideas based on their insights and related papers
-        for researcher in researchers:
-            related_papers = self.paper_db.search_papers(
-                query=insight.content,
-                author=researcher.profile.name,
-                domain=top_keyword,
-                num=self.config.param.related_paper_num,
-            )
-            idea = researcher.brainstorm_idea(
-                papers=related_papers, insights=insights, config=self.config
-            )
+        for researcher, idea in zip(
+            researchers,
+            self.map_researchers(
+                partial(
+                    self.brainstorm_idea, insights=insights, top_keyword=top_keyword
+                ),
+                researchers,
+            ),
+        ):
             yield idea, researcher
             ideas.append(idea)
 
@@ -109,3 +115,51 @@ class ProposalWritingwithRAGEnv(BaseEnv):
             )
             yield proposal, self.leader
             self.proposals.append(proposal)
+
+    def map_researchers(
+        self, func: Callable[[Agent], T], researchers: List[Agent]
+    ) -> Iterator[T]:
+        # Researchers work independently within a step, so with max_concurrency > 1
+        # their searches and LLM calls overlap. Results still come back in
+        # researcher order, which keeps the progress stream identical.
+        max_concurrency = self.config.param.max_concurrency
+        if max_concurrency <= 1 or len(researchers) <= 1:
+            for researcher in researchers:
+                yield func(researcher)
+            return
+
+        with ThreadPoolExecutor(
+            max_workers=min(max_concurrency, len(researchers))
+        ) as executor:
+            futures = [executor.submit(func, researcher) for researcher in researchers]
+            try:
+                for future in futures:
+                    yield future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def review_literature(self, researcher: Agent) -> Tuple[List[str], Insight]:
+        related_papers = self.paper_db.search_papers(
+            query=';'.join(self.contexts),
+            num=self.config.param.related_paper_num,
+        )
+        summary, keywords, insight = researcher.review_literature(
+            papers=related_papers,
+            contexts=self.contexts,
+            config=self.config,
+        )
+        return keywords, insight
+
+    def brainstorm_idea(
+        self, researcher: Agent, insights: List[Insight], top_keyword: str
+    ) -> Idea:
+        related_papers = self.paper_db.search_papers(
+            query=insights[-1].content,
+            author=researcher.profile.name,
+            domain=top_keyword,
+            num=self.config.param.related_paper_num,
+        )
+        return researcher.brainstorm_idea(
+            papers=related_papers, insights=insights, config=self.config
+        )
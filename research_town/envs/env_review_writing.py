@@ -1,9 +1,12 @@
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
+
 from beartype import beartype
-from beartype.typing import Any, Dict, Generator, List, Tuple
+from beartype.typing import Any, Dict, Generator, List, Tuple, Union
 
 from ..agents import Agent, AgentManager
 from ..configs import Config
-from ..data import MetaReview, Progress, Rebuttal, Review
+from ..data import MetaReview, Progress, Proposal, Rebuttal, Review
 from ..dbs import LogDB, PaperDB, ProgressDB
 from .env_base import BaseEnv
 
@@ -59,6 +62,10 @@ class ReviewWritingEnv(BaseEnv):
     @beartype
     def run(self) -> Generator[Tuple[Progress, Agent], None, None]:
         self.metareviews: List[MetaReview] = []
+        if self.config.param.max_concurrency > 1:
+            yield from self.run_concurrently()
+            return None
+
         for proposal in self.proposals:
             # Review Writing
             self.reviews: List[Review] = []
@@ -91,3 +98,82 @@ class ReviewWritingEnv(BaseEnv):
             yield metareview, self.chair
 
         return None
+
+    def run_concurrently(self) -> Generator[Tuple[Progress, Agent], None, None]:
+        # Proposals are reviewed in parallel pipelines whose agent actions share
+        # one bounded pool. Each pipeline reports through its own queue and the
+        # queues are drained in proposal order, so the yield order and the
+        # reviews, rebuttals and metareviews left on the env are the same as in
+        # the sequential run.
+        executor = ThreadPoolExecutor(max_workers=self.config.param.max_concurrency)
+        pipelines = ThreadPoolExecutor(max_workers=max(len(self.proposals), 1))
+        queues: List[Queue[Union[Tuple[Progress, Agent], BaseException, None]]] = [
+            Queue() for _ in self.proposals
+        ]
+        try:
+            for proposal, queue in zip(self.proposals, queues):
+                pipelines.submit(self.review_proposal, executor, proposal, queue)
+            for queue in queues:
+                self.reviews = []
+                self.rebuttals = []
+                while True:
+                    item = queue.get()
+                    if item is None:
+                        break
+                    if isinstance(item, BaseException):
+                        raise item
+                    progress, agent = item
+                    if isinstance(progress, Review):
+                        self.reviews.append(progress)
+                    elif isinstance(progress, Rebuttal):
+                        self.rebuttals.append(progress)
+                    elif isinstance(progress, MetaReview):
+                        self.metareviews.append(progress)
+                    yield progress, agent
+        finally:
+            # on an early close, queued agent actions are dropped and the ones
+            # already running are waited for, so no pipeline outlives the run
+            executor.shutdown(wait=True, cancel_futures=True)
+            pipelines.shutdown(wait=True)
+
+    def review_proposal(
+        self,
+        executor: ThreadPoolExecutor,
+        proposal: Proposal,
+        queue: Queue[Union[Tuple[Progress, Agent], BaseException, None]],
+    ) -> None:
+        try:
+            review_futures = [
+                executor.submit(
+                    reviewer.write_review, proposal=proposal, config=self.config
+                )
+                for reviewer in self.reviewers
+            ]
+            reviews: List[Review] = []
+            rebuttal_futures = []
+            for reviewer, review_future in zip(self.reviewers, review_futures):
+                review = review_future.result()
+                reviews.append(review)
+                queue.put((review, reviewer))
+                # a rebuttal only needs its own review
+                rebuttal_futures.append(
+                    executor.submit(
+                        self.leader.write_rebuttal,
+                        proposal=proposal,
+                        review=review,
+                        config=self.config,
+                    )
+                )
+            for rebuttal_future in rebuttal_futures:
+                queue.put((rebuttal_future.result(), self.leader))
+
+            metareview = executor.submit(
+                self.chair.write_metareview,
+                proposal=proposal,
+                reviews=reviews,
+                config=self.config,
+            ).result()
+            queue.put((metareview, self.chair))
+            queue.put(None)
+        except BaseException as e:
+            queue.put(e)
@@ -76,6 +76,11 @@ class BaseQualityEvaluator:
             overall_score=overall_score, dimension_scores=dimension_scores
         )
 
+    def parse_score(self, raw_output: str) -> float:
+        # with return_num > 1, prefer a candidate that parses over a retry
+        self.parse(raw_output, type(self.parsed_output))
+        return 1.0
+
 
 class InsightQualityEvaluator(BaseQualityEvaluator):
     def __init__(
@@ -97,6 +102,7 @@ class InsightQualityEvaluator(BaseQualityEvaluator):
             temperature=self.config.param.temperature if self.config else None,
             top_p=self.config.param.top_p if self.config else None,
             stream=self.config.param.stream if self.config else None,
+            scorer=self.parse_score,
             prompt_template=self.config.eval_prompt_template.insight_quality,
         )
         self.parsed_output = self.parse(raw_output, InsightEvalOutput)
@@ -127,6 +133,7 @@ class IdeaQualityEvaluator(BaseQualityEvaluator):
             temperature=self.config.param.temperature if self.config else None,
             top_p=self.config.param.top_p if self.config else None,
             stream=self.config.param.stream if self.config else None,
+            scorer=self.parse_score,
             prompt_template=self.config.eval_prompt_template.idea_quality,
         )
         self.parsed_output = self.parse(raw_output, IdeaEvalOutput)
@@ -158,6 +165,7 @@ class ProposalQualityEvaluator(BaseQualityEvaluator):
             temperature=self.config.param.temperature if self.config else None,
             top_p=self.config.param.top_p if self.config else None,
             stream=self.config.param.stream if self.config else None,
+            scorer=self.parse_score,
             prompt_template=self.config.eval_prompt_template.proposal_quality,
         )
         self.parsed_output = self.parse(raw_output, ProposalEvalOutput)
@@ -190,6 +198,7 @@ class ReviewQualityEvaluator(BaseQualityEvaluator):
             temperature=self.config.param.temperature if self.config else None,
             top_p=self.config.param.top_p if self.config else None,
             stream=self.config.param.stream if self.config else None,
+            scorer=self.parse_score,
             prompt_template=self.config.eval_prompt_template.review_quality,
         )
         self.parsed_output = self.parse(raw_output, ReviewEvalOutput)
@@ -223,6 +232,7 @@ class RebuttalQualityEvaluator(BaseQualityEvaluator):
             temperature=self.config.param.temperature if self.config else None,
             top_p=self.config.param.top_p if self.config else None,
             stream=self.config.param.stream if self.config else None,
+            scorer=self.parse_score,
             prompt_template=self.config.eval_prompt_template.rebuttal_quality,
         )
         self.parsed_output = self.parse(raw_output, RebuttalEvalOutput)
@@ -257,6 +267,7 @@ class MetaReviewQualityEvaluator(BaseQualityEvaluator):
             temperature=self.config.param.temperature if self.config else None,
             top_p=self.config.param.top_p if self.config else None,
             stream=self.config.param.stream if self.config else None,
+            scorer=self.parse_score,
             prompt_template=self.config.eval_prompt_template.metareview_quality,
         )
         self.parsed_output = self.parse(raw_output, MetaReviewEvalOutput)
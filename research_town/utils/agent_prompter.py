@@ -1,9 +1,11 @@
+import contextvars
 import re
+from concurrent.futures import ThreadPoolExecutor
 
 from beartype import beartype
 from beartype.typing import Dict, List, Optional, Tuple, Union
 
-from .model_prompting import model_prompting
+from .model_prompting import best_of_n, model_prompting
 from .prompt_constructor import openai_format_prompt_construct
 from .string_mapper import (
     map_idea_list_to_str,
@@ -14,6 +16,47 @@ from .string_mapper import (
     map_review_list_to_str,
     map_review_to_str,
 )
+from .token_stream import set_stream_part
+
+
+@beartype
+def concurrent_model_prompting(
+    model_name: str,
+    messages_list: List[List[Dict[str, str]]],
+    return_num: Optional[int] = 1,
+    max_token_num: Optional[int] = 512,
+    temperature: Optional[float] = 0.0,
+    top_p: Optional[float] = None,
+    stream: Optional[bool] = None,
+    parts: Optional[List[str]] = None,
+) -> List[str]:
+    """
+    Run prompts that do not depend on each other in parallel threads and return
+    the first response of each, in the order of messages_list. Text streamed by
+    each prompt is tagged with its name in parts, or with its index.
+    """
+    parts = parts or [str(i) for i in range(len(messages_list))]
+
+    def prompt_part(part: str, messages: List[Dict[str, str]]) -> List[str]:
+        set_stream_part(part)
+        return model_prompting(
+            model_name,
+            messages,
+            return_num,
+            max_token_num,
+            temperature,
+            top_p,
+            stream,
+        )
+
+    with ThreadPoolExecutor(max_workers=max(len(messages_list), 1)) as executor:
+        # each thread runs in a copy of the caller's context, so streamed text
+        # stays tagged with the progress being written and keeps its priority
+        futures = [
+            executor.submit(contextvars.copy_context().run, prompt_part, part, messages)
+            for part, messages in zip(parts, messages_list, strict=True)
+        ]
+        return [future.result()[0] for future in futures]
 
 
 @beartype
@@ -37,7 +80,7 @@ def review_literature_prompting(
     }
     messages = openai_format_prompt_construct(prompt_template, template_input)
 
-    insight = model_prompting(
+    insights = model_prompting(
         model_name,
         messages,
         return_num,
@@ -45,7 +88,7 @@ def review_literature_prompting(
         temperature,
         top_p,
         stream,
-    )[0]
+    )
 
     summary_pattern = r'Summary of Target Paper:(.*?)Keywords of Target Paper:'
     keywords_pattern = (
@@ -53,6 +96,15 @@ def review_literature_prompting(
     )
     valuable_points_pattern = r'Valuable Points from Target Paper:(.*)'
 
+    # keep the candidate with the most sections in the expected format
+    insight = best_of_n(
+        insights,
+        lambda text: sum(
+            re.search(pattern, text, re.DOTALL) is not None
+            for pattern in [summary_pattern, keywords_pattern, valuable_points_pattern]
+        ),
+    )
+
     summary_match = re.search(summary_pattern, insight, re.DOTALL)
     keywords_match = re.search(keywords_pattern, insight, re.DOTALL)
     valuable_points_match = re.search(valuable_points_pattern, insight, re.DOTALL)
@@ -139,7 +191,7 @@ def write_proposal_prompting(
     template_input = {'idea': idea_str, 'papers': papers_str}
     messages = openai_format_prompt_construct(prompt_template, template_input)
 
-    proposal = model_prompting(
+    proposals = model_prompting(
         model_name,
         messages,
         return_num=return_num,
@@ -147,9 +199,14 @@ def write_proposal_prompting(
         temperature=temperature,
         top_p=top_p,
         stream=stream,
-    )[0]
+    )
 
     pattern = r'\[Question (\d+)\](.*?)(?=\[Question \d+\]|\Z)'
+    # keep the candidate that answers the most of the five questions
+    proposal = best_of_n(
+        proposals,
+        lambda text: len({match[0] for match in re.findall(pattern, text, re.DOTALL)}),
+    )
     matches = re.findall(pattern, proposal, re.DOTALL)
     q5_result = {}
 
@@ -215,33 +272,17 @@ def write_review_prompting(
         ethical_prompt_template, ethical_template_input
     )
 
-    strength = model_prompting(
+    # strength, weakness and ethical concern only depend on the summary
+    strength, weakness, ethical_concern = concurrent_model_prompting(
         model_name,
-        strength_messages,
+        [strength_messages, weakness_messages, ethical_messages],
         return_num,
         max_token_num,
         temperature,
         top_p,
         stream,
-    )[0]
-    weakness = model_prompting(
-        model_name,
-        weakness_messages,
-        return_num,
-        max_token_num,
-        temperature,
-        top_p,
-        stream,
-    )[0]
-    ethical_concern = model_prompting(
-        model_name,
-        ethical_messages,
-        return_num,
-        max_token_num,
-        temperature,
-        top_p,
-        stream,
-    )[0]
+        parts=['strength', 'weakness', 'ethical_concern'],
+    )
 
     score_template_input = {
         'proposal': proposal_str,
@@ -356,33 +397,17 @@ def write_metareview_prompting(
         ethical_prompt_template, ethical_template_input
     )
 
-    strength = model_prompting(
-        model_name,
-        strength_messages,
-        return_num,
-        max_token_num,
-        temperature,
-        top_p,
-        stream,
-    )[0]
-    weakness = model_prompting(
+    # strength, weakness and ethical concern only depend on the summary
+    strength, weakness, ethical_concern = concurrent_model_prompting(
         model_name,
-        weakness_messages,
+        [strength_messages, weakness_messages, ethical_messages],
         return_num,
         max_token_num,
         temperature,
         top_p,
         stream,
-    )[0]
-    ethical_concern = model_prompting(
-        model_name,
-        ethical_messages,
-        return_num,
-        max_token_num,
-        temperature,
-        top_p,
-        stream,
-    )[0]
+        parts=['strength', 'weakness', 'ethical_concern'],
+    )
 
     decision_template_input = {
         'proposal': proposal_str,
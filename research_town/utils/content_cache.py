@@ -0,0 +1,325 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+from beartype.typing import Any, Dict, List, Optional, Tuple, Union
+from dotenv import load_dotenv
+
+from .http_client import get_http_client
+
+load_dotenv()
+
+# responses worth keeping
+CACHEABLE_STATUS_CODES = [200, 203, 404, 410]
+# a missing page is kept for negative_max_age only, arXiv renders the HTML of a
+# new paper some time after it is announced
+NEGATIVE_STATUS_CODES = [404, 410]
+
+
+class CachedResponse:
+    def __init__(
+        self, status_code: int, content: bytes, from_cache: bool = False
+    ) -> None:
+        self.status_code = status_code
+        self.content = content
+        self.from_cache = from_cache
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+
+class ContentCache:
+    """
+    Size-bounded on-disk cache shared by the paper collectors. It holds raw HTTP
+    responses and parsed results, such as section dicts, in one SQLite file.
+
+    Responses younger than max_age seconds are served without any network I/O.
+    Older ones are revalidated with If-None-Match / If-Modified-Since and kept on
+    a 304. Negative results, a 404 or 410 response or a parsed None, are only
+    kept for negative_max_age seconds. Once the stored bodies exceed max_bytes,
+    the least recently used entries are evicted.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_bytes: int = 2 * 1024**3,
+        max_age: Optional[float] = 7 * 24 * 3600,
+        negative_max_age: Optional[float] = 3600,
+    ) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.negative_max_age = negative_max_age
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.connection: Optional[sqlite3.Connection] = None
+        if path is not None:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            # WAL lets benchmark worker processes read while one of them writes
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            # the total body size lives in a meta row kept current by triggers, so
+            # that every process writing the file sees it without a full scan
+            self.connection.executescript(
+                'BEGIN IMMEDIATE;'
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'key TEXT PRIMARY KEY, kind TEXT, status_code INTEGER, body BLOB, '
+                'etag TEXT, last_modified TEXT, size INTEGER, '
+                'fetched_at REAL, accessed_at REAL);'
+                'CREATE INDEX IF NOT EXISTS entries_accessed_at '
+                'ON entries (accessed_at);'
+                'CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER);'
+                # files written before the meta row existed are summed up once
+                'INSERT OR IGNORE INTO meta '
+                "SELECT 'total_size', COALESCE(SUM(size), 0) FROM entries;"
+                'CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries '
+                "BEGIN UPDATE meta SET value = value + new.size WHERE name = 'total_size';"
+                'END;'
+                'CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries '
+                "BEGIN UPDATE meta SET value = value - old.size WHERE name = 'total_size';"
+                'END;'
+                'CREATE TRIGGER IF NOT EXISTS entries_update '
+                'AFTER UPDATE OF size ON entries '
+                'BEGIN UPDATE meta SET value = value + new.size - old.size '
+                "WHERE name = 'total_size'; END;"
+                'COMMIT;'
+            )
+
+    @staticmethod
+    def key(kind: str, **request: Any) -> str:
+        canonical = json.dumps(
+            {'kind': kind, **request},
+            sort_keys=True,
+            separators=(',', ':'),
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def get(self, url: str, **kwargs: Any) -> Union[CachedResponse, requests.Response]:
+        """
+        GET through the shared HTTP client, answered from the cache when possible.
+        Takes the keyword arguments of requests.get; params are part of the key.
+        """
+        if self.connection is None:
+            return get_http_client().get(url, **kwargs)
+
+        key = self.key('response', url=url, params=kwargs.get('params'))
+        entry = self.lookup(key)
+        now = time.time()
+        if entry is not None and entry['status_code'] in NEGATIVE_STATUS_CODES:
+            # a missing page has nothing to revalidate, it is simply fetched again
+            if not self.is_fresh(entry, self.negative_max_age, now):
+                entry = None
+        if entry is not None and self.is_fresh(entry, self.max_age, now):
+            with self.lock:
+                self.hits += 1
+            return CachedResponse(entry['status_code'], entry['body'], True)
+
+        headers = dict(kwargs.pop('headers', None) or {})
+        if entry is not None and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry is not None and entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        response = get_http_client().get(url, headers=headers, **kwargs)
+
+        if entry is not None and response.status_code == 304:
+            with self.lock:
+                self.revalidated += 1
+                self.execute(
+                    'UPDATE entries SET fetched_at = ? WHERE key = ?', (now, key)
+                )
+            return CachedResponse(entry['status_code'], entry['body'], True)
+        with self.lock:
+            self.misses += 1
+        if response.status_code in CACHEABLE_STATUS_CODES:
+            self.store(
+                key,
+                'response',
+                response.status_code,
+                response.content,
+                response.headers.get('ETag'),
+                response.headers.get('Last-Modified'),
+            )
+        # decoded the same way as a later hit, so reruns parse identical text
+        return CachedResponse(response.status_code, response.content)
+
+    def load(self, kind: str, name: str) -> Tuple[bool, Any]:
+        """
+        Return whether a parsed result is stored and its value, which may be None.
+        """
+        # parsed results never expire, the response they came from is versioned,
+        # but a None is a negative result and kept as long as a missing page
+        entry = self.lookup(self.key(kind, name=name))
+        if entry is None:
+            return False, None
+        value = json.loads(entry['body'])
+        if value is None and not self.is_fresh(
+            entry, self.negative_max_age, time.time()
+        ):
+            return False, None
+        return True, value
+
+    def save(self, kind: str, name: str, value: Any) -> None:
+        if self.connection is None:
+            return
+        self.store(
+            self.key(kind, name=name),
+            kind,
+            None,
+            json.dumps(value, ensure_ascii=False).encode('utf-8'),
+            None,
+            None,
+        )
+
+    @staticmethod
+    def is_fresh(entry: Dict[str, Any], max_age: Optional[float], now: float) -> bool:
+        return max_age is None or now - entry['fetched_at'] <= max_age
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.connection is None:
+            return None
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT status_code, body, etag, last_modified, fetched_at '
+                'FROM entries WHERE key = ?',
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self.execute(
+                'UPDATE entries SET accessed_at = ? WHERE key = ?', (time.time(), key)
+            )
+        return dict(
+            zip(['status_code', 'body', 'etag', 'last_modified', 'fetched_at'], row)
+        )
+
+    def store(
+        self,
+        key: str,
+        kind: str,
+        status_code: Optional[int],
+        body: bytes,
+        etag: Optional[str],
+        last_modified: Optional[str],
+    ) -> None:
+        if self.connection is None:
+            return
+        now = time.time()
+        with self.lock:
+            # an upsert rather than INSERT OR REPLACE, whose implicit delete would
+            # skip the size trigger
+            self.execute(
+                'INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET kind = excluded.kind, '
+                'status_code = excluded.status_code, body = excluded.body, '
+                'etag = excluded.etag, last_modified = excluded.last_modified, '
+                'size = excluded.size, fetched_at = excluded.fetched_at, '
+                'accessed_at = excluded.accessed_at',
+                (
+                    key,
+                    kind,
+                    status_code,
+                    body,
+                    etag,
+                    last_modified,
+                    len(body),
+                    now,
+                    now,
+                ),
+            )
+            self.evict()
+
+    def total_size(self) -> int:
+        # must be called with the lock held
+        assert self.connection is not None
+        row = self.connection.execute(
+            "SELECT value FROM meta WHERE name = 'total_size'"
+        ).fetchone()
+        return int(row[0])
+
+    def evict(self, batch_size: int = 64) -> None:
+        # must be called with the lock held
+        assert self.connection is not None
+        total_size = self.total_size()
+        while total_size > self.max_bytes:
+            # the accessed_at index hands over just the oldest entries
+            rows = self.connection.execute(
+                'SELECT key, size FROM entries ORDER BY accessed_at LIMIT ?',
+                (batch_size,),
+            ).fetchall()
+            if not rows:
+                break
+            evicted: List[Tuple[str]] = []
+            for key, size in rows:
+                if total_size <= self.max_bytes:
+                    break
+                evicted.append((key,))
+                total_size -= size
+            self.connection.executemany('DELETE FROM entries WHERE key = ?', evicted)
+        self.connection.commit()
+
+    def execute(self, sql: str, parameters: Tuple[Any, ...]) -> None:
+        assert self.connection is not None
+        self.connection.execute(sql, parameters)
+        self.connection.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            if self.connection is None:
+                entries, size = 0, 0
+            else:
+                entries = self.connection.execute(
+                    'SELECT COUNT(*) FROM entries'
+                ).fetchone()[0]
+                size = self.total_size()
+            return {
+                'hits': self.hits,
+                'revalidated': self.revalidated,
+                'misses': self.misses,
+                'entries': entries,
+                'bytes': size,
+            }
+
+    def clear(self) -> None:
+        with self.lock:
+            if self.connection is not None:
+                self.execute('DELETE FROM entries', ())
+            self.hits = self.revalidated = self.misses = 0
+
+
+_content_cache: Optional[ContentCache] = None
+_content_cache_lock = threading.Lock()
+
+
+def get_content_cache() -> ContentCache:
+    """
+    Return the process-wide content cache. It is configured through the
+    CONTENT_CACHE_PATH, CONTENT_CACHE_MAX_BYTES, CONTENT_CACHE_MAX_AGE and
+    CONTENT_CACHE_NEGATIVE_MAX_AGE env variables and is off unless
+    CONTENT_CACHE_PATH is set.
+    """
+    global _content_cache
+    with _content_cache_lock:
+        if _content_cache is None:
+            max_bytes = os.getenv('CONTENT_CACHE_MAX_BYTES')
+            max_age = os.getenv('CONTENT_CACHE_MAX_AGE')
+            negative_max_age = os.getenv('CONTENT_CACHE_NEGATIVE_MAX_AGE')
+            _content_cache = ContentCache(
+                os.getenv('CONTENT_CACHE_PATH'),
+                max_bytes=int(max_bytes) if max_bytes else 2 * 1024**3,
+                max_age=float(max_age) if max_age else 7 * 24 * 3600,
+                negative_max_age=float(negative_max_age) if negative_max_age else 3600,
+            )
+        return _content_cache
@@ -0,0 +1,129 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import numpy.typing as npt
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache keyed by (model name, sha256 of the text).
+
+    A bounded in-memory LRU sits in front of an optional directory with one .npy
+    file per embedding, so identical abstracts and bios are embedded once across
+    simulation runs. Files are written atomically, which makes the directory
+    safe to share between worker processes.
+    """
+
+    def __init__(
+        self, cache_dir: Optional[str] = None, max_memory_items: int = 4096
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.max_memory_items = max_memory_items
+        self.memory: OrderedDict[Tuple[str, str], npt.NDArray[np.float32]] = (
+            OrderedDict()
+        )
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, model_name: str, text: str) -> Optional[npt.NDArray[np.float32]]:
+        key = (model_name, self.text_hash(text))
+        embedding: Optional[npt.NDArray[np.float32]]
+        with self.lock:
+            embedding = self.memory.get(key)
+            if embedding is not None:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return embedding
+
+        path = self.path(*key)
+        if path is not None and os.path.exists(path):
+            try:
+                embedding = np.load(path).astype(np.float32, copy=False)
+            except (OSError, ValueError):
+                embedding = None
+            if embedding is not None:
+                with self.lock:
+                    self.disk_hits += 1
+                    self.remember(key, embedding)
+                return embedding
+
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(
+        self, model_name: str, text: str, embedding: npt.NDArray[np.float32]
+    ) -> None:
+        key = (model_name, self.text_hash(text))
+        embedding = np.array(embedding, dtype=np.float32)
+        with self.lock:
+            self.remember(key, embedding)
+
+        path = self.path(*key)
+        if path is not None and not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                np.save(f, embedding)
+            os.replace(tmp_path, path)
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'memory_items': len(self.memory),
+            }
+
+    def clear(self) -> None:
+        with self.lock:
+            self.memory.clear()
+            self.hits = self.disk_hits = self.misses = 0
+
+    def remember(
+        self, key: Tuple[str, str], embedding: npt.NDArray[np.float32]
+    ) -> None:
+        self.memory[key] = embedding
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory_items:
+            self.memory.popitem(last=False)
+
+    def path(self, model_name: str, text_hash: str) -> Optional[str]:
+        if self.cache_dir is None:
+            return None
+        return os.path.join(
+            self.cache_dir,
+            model_name.replace('/', '--'),
+            text_hash[:2],
+            f'{text_hash}.npy',
+        )
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """
+    Return the process-wide embedding cache. It persists to EMBEDDING_CACHE_PATH
+    when that env variable is set and is memory-only otherwise.
+    """
+    global _embedding_cache
+    with _embedding_cache_lock:
+        if _embedding_cache is None:
+            _embedding_cache = EmbeddingCache(os.getenv('EMBEDDING_CACHE_PATH'))
+        return _embedding_cache
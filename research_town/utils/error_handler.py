@@ -1,87 +1,344 @@
+import asyncio
 import math
+import random
 import time
+from email.utils import parsedate_to_datetime
 from functools import wraps
 
-from beartype.typing import Any, Callable, Optional, TypeVar, cast
+from beartype.typing import Any, Awaitable, Callable, Optional, TypeVar, cast
 from pydantic import BaseModel
 
+from .logger import logger
+
 INF = float(math.inf)
 
 T = TypeVar('T', bound=Callable[..., Any])
+TAsync = TypeVar('TAsync', bound=Callable[..., Awaitable[Any]])
+
+# request timeouts, conflicts, rate limits and server errors are worth retrying,
+# any other status (bad request, auth, context window exceeded ...) is final
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429}
+
+
+class RetryMetrics(BaseModel):
+    function: str
+    attempts: int
+    wait_time: float
+    succeeded: bool
+    error: Optional[str] = None
+
+
+MetricsHook = Callable[[RetryMetrics], None]
+
+_metrics_hook: Optional[MetricsHook] = None
+
+
+def set_retry_metrics_hook(hook: Optional[MetricsHook]) -> None:
+    """
+    Register a hook that receives the retry count and total backoff time of every
+    call that went through one of the backoff decorators.
+    """
+    global _metrics_hook
+    _metrics_hook = hook
+
+
+def report_retry_metrics(
+    hook: Optional[MetricsHook],
+    function: str,
+    attempts: int,
+    wait_time: float,
+    error: Optional[BaseException],
+) -> None:
+    hook = hook or _metrics_hook
+    if hook is not None:
+        hook(
+            RetryMetrics(
+                function=function,
+                attempts=attempts,
+                wait_time=wait_time,
+                succeeded=error is None,
+                error=None if error is None else repr(error),
+            )
+        )
+
+
+def is_retryable(error: BaseException) -> bool:
+    status_code = getattr(error, 'status_code', None)
+    if isinstance(status_code, int):
+        return status_code in RETRYABLE_STATUS_CODES or status_code >= 500
+    # errors without a status code are network failures or parsing errors
+    return True
+
+
+def get_retry_after(error: BaseException) -> Optional[float]:
+    """
+    Read the Retry-After header, in seconds or as an HTTP date, from a litellm or
+    httpx error.
+    """
+    headers = getattr(error, 'litellm_response_headers', None) or getattr(
+        getattr(error, 'response', None), 'headers', None
+    )
+    if not headers:
+        return None
+    retry_after_ms = headers.get('retry-after-ms') or headers.get('Retry-After-Ms')
+    if retry_after_ms is not None:
+        try:
+            return float(retry_after_ms) / 1000
+        except (TypeError, ValueError):
+            pass
+    retry_after = headers.get('retry-after') or headers.get('Retry-After')
+    if retry_after is None:
+        return None
+    try:
+        return float(retry_after)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_wait_time(
+    attempts: int,
+    base_wait_time: float,
+    error: BaseException,
+    jitter: bool = True,
+    max_wait_time: float = INF,
+) -> float:
+    wait_time = min(base_wait_time * (2**attempts), max_wait_time)
+    if jitter:
+        # full jitter spreads out callers that failed on the same rate limit
+        wait_time = random.uniform(0, wait_time)
+    # the server knows best, a Retry-After is never cut short
+    retry_after = get_retry_after(error)
+    if retry_after is not None:
+        wait_time = max(wait_time, retry_after)
+    return float(wait_time)
+
+
+def retry_or_raise(
+    function: str,
+    error: Exception,
+    attempts: int,
+    retries: int,
+    base_wait_time: float,
+    max_wait_time: float,
+) -> float:
+    """
+    Return how long to wait before the next attempt, or re-raise the error once it
+    is not retryable or the retries are used up.
+    """
+    if attempts >= retries or not is_retryable(error):
+        logger.error(f"'{function}' failed after {attempts} attempt(s): {error}")
+        raise error
+    wait_time = backoff_wait_time(
+        attempts - 1, base_wait_time, error, max_wait_time=max_wait_time
+    )
+    logger.warning(
+        f"Attempt {attempts} of '{function}' failed: {error}, "
+        f'retrying in {wait_time:.2f} seconds'
+    )
+    return wait_time
+
+
+def call_with_backoff(
+    func: Callable[..., Any],
+    args: Any,
+    kwargs: Any,
+    retries: int,
+    base_wait_time: float,
+    max_wait_time: float,
+    metrics_hook: Optional[MetricsHook],
+) -> Any:
+    attempts = 0
+    total_wait_time = 0.0
+    while True:
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            attempts += 1
+            try:
+                wait_time = retry_or_raise(
+                    func.__name__, e, attempts, retries, base_wait_time, max_wait_time
+                )
+            except Exception:
+                report_retry_metrics(
+                    metrics_hook, func.__name__, attempts, total_wait_time, e
+                )
+                raise
+            time.sleep(wait_time)
+            total_wait_time += wait_time
+        else:
+            report_retry_metrics(
+                metrics_hook, func.__name__, attempts, total_wait_time, None
+            )
+            return result
+
+
+async def async_call_with_backoff(
+    func: Callable[..., Awaitable[Any]],
+    args: Any,
+    kwargs: Any,
+    retries: int,
+    base_wait_time: float,
+    max_wait_time: float,
+    metrics_hook: Optional[MetricsHook],
+) -> Any:
+    attempts = 0
+    total_wait_time = 0.0
+    while True:
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as e:
+            attempts += 1
+            try:
+                wait_time = retry_or_raise(
+                    func.__name__, e, attempts, retries, base_wait_time, max_wait_time
+                )
+            except Exception:
+                report_retry_metrics(
+                    metrics_hook, func.__name__, attempts, total_wait_time, e
+                )
+                raise
+            # the event loop keeps serving other tasks while this one waits
+            await asyncio.sleep(wait_time)
+            total_wait_time += wait_time
+        else:
+            report_retry_metrics(
+                metrics_hook, func.__name__, attempts, total_wait_time, None
+            )
+            return result
 
 
 def api_calling_error_exponential_backoff(
-    retries: int = 5, base_wait_time: int = 1
+    retries: int = 5,
+    base_wait_time: float = 1,
+    max_wait_time: float = 60,
+    metrics_hook: Optional[MetricsHook] = None,
 ) -> Callable[[T], T]:
     """
-    Decorator for applying exponential backoff to a function.
-    :param retries: Maximum number of retries.
+    Decorator for applying jittered exponential backoff to a function. Retry-After
+    headers are honoured, errors that cannot succeed on retry are raised at once,
+    and the last error is raised once the retries are used up.
+    :param retries: Maximum number of attempts.
     :param base_wait_time: Base wait time in seconds for the exponential backoff.
+    :param max_wait_time: Upper bound in seconds for a single backoff wait.
+    :param metrics_hook: Receives retry counts and time spent waiting.
     :return: The wrapped function with exponential backoff applied.
     """
 
     def decorator(func: T) -> T:
         @wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> Any:
-            error_handler_mode = kwargs.get('mode', None)
-            if error_handler_mode == 'TEST':
-                modified_retries = 1
-                modified_base_wait_time = 1
-            else:
-                modified_retries = retries
-                modified_base_wait_time = base_wait_time
-
-            attempts = 0
-            while attempts < modified_retries:
-                try:
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    wait_time = modified_base_wait_time * (2**attempts)
-                    print(f'Attempt {attempts + 1} failed: {e}')
-                    print(f'Waiting {wait_time} seconds before retrying...')
-                    time.sleep(wait_time)
-                    attempts += 1
-            print(
-                f"Failed to execute '{func.__name__}' after {modified_retries} retries."
+            modified_retries = 1 if kwargs.get('mode', None) == 'TEST' else retries
+            return call_with_backoff(
+                func,
+                args,
+                kwargs,
+                modified_retries,
+                base_wait_time,
+                max_wait_time,
+                metrics_hook,
             )
-            return None
 
         return cast(T, wrapper)
 
     return cast(Callable[[T], T], decorator)
 
 
+def async_api_calling_error_exponential_backoff(
+    retries: int = 5,
+    base_wait_time: float = 1,
+    max_wait_time: float = 60,
+    metrics_hook: Optional[MetricsHook] = None,
+) -> Callable[[TAsync], TAsync]:
+    """
+    Coroutine version of api_calling_error_exponential_backoff, which waits with
+    asyncio.sleep instead of blocking the event loop.
+    :param retries: Maximum number of attempts.
+    :param base_wait_time: Base wait time in seconds for the exponential backoff.
+    :param max_wait_time: Upper bound in seconds for a single backoff wait.
+    :param metrics_hook: Receives retry counts and time spent waiting.
+    :return: The wrapped coroutine function with exponential backoff applied.
+    """
+
+    def decorator(func: TAsync) -> TAsync:
+        @wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            modified_retries = 1 if kwargs.get('mode', None) == 'TEST' else retries
+            return await async_call_with_backoff(
+                func,
+                args,
+                kwargs,
+                modified_retries,
+                base_wait_time,
+                max_wait_time,
+                metrics_hook,
+            )
+
+        return cast(TAsync, wrapper)
+
+    return cast(Callable[[TAsync], TAsync], decorator)
+
+
 TBaseModel = TypeVar('TBaseModel', bound=Callable[..., BaseModel])
+TAsyncBaseModel = TypeVar('TAsyncBaseModel', bound=Callable[..., Awaitable[BaseModel]])
 
 
 def parsing_error_exponential_backoff(
-    retries: int = 5, base_wait_time: int = 1
+    retries: int = 5,
+    base_wait_time: float = 1,
+    max_wait_time: float = 60,
+    metrics_hook: Optional[MetricsHook] = None,
 ) -> Callable[[TBaseModel], TBaseModel]:
     """
-    Decorator for retrying a function that returns a BaseModel with exponential backoff.
-    :param retries: Maximum number of retries.
+    Decorator for retrying a function that returns a BaseModel with jittered
+    exponential backoff. The last error is raised once the retries are used up.
+    :param retries: Maximum number of attempts.
     :param base_wait_time: Base wait time in seconds for the exponential backoff.
+    :param max_wait_time: Upper bound in seconds for a single backoff wait.
+    :param metrics_hook: Receives retry counts and time spent waiting.
     :return: The wrapped function with retry logic applied.
     """
 
     def decorator(func: TBaseModel) -> TBaseModel:
         @wraps(func)
-        def wrapper(self: Any, *args: Any, **kwargs: Any) -> Optional[BaseModel]:
-            attempts = 0
-            while attempts < retries:
-                try:
-                    return func(self, *args, **kwargs)
-                except Exception as e:
-                    wait_time = base_wait_time * (2**attempts)
-                    print(f'Attempt {attempts + 1} failed: {e}')
-                    print(f'Waiting {wait_time} seconds before retrying...')
-                    time.sleep(wait_time)
-                    attempts += 1
-            print(
-                f'Failed to get valid input from {func.__name__} after {retries} retries.'
+        def wrapper(*args: Any, **kwargs: Any) -> BaseModel:
+            result: BaseModel = call_with_backoff(
+                func, args, kwargs, retries, base_wait_time, max_wait_time, metrics_hook
             )
-            return None
+            return result
 
         return cast(TBaseModel, wrapper)
 
     return cast(Callable[[TBaseModel], TBaseModel], decorator)
+
+
+def async_parsing_error_exponential_backoff(
+    retries: int = 5,
+    base_wait_time: float = 1,
+    max_wait_time: float = 60,
+    metrics_hook: Optional[MetricsHook] = None,
+) -> Callable[[TAsyncBaseModel], TAsyncBaseModel]:
+    """
+    Coroutine version of parsing_error_exponential_backoff, which waits with
+    asyncio.sleep instead of blocking the event loop.
+    :param retries: Maximum number of attempts.
+    :param base_wait_time: Base wait time in seconds for the exponential backoff.
+    :param max_wait_time: Upper bound in seconds for a single backoff wait.
+    :param metrics_hook: Receives retry counts and time spent waiting.
+    :return: The wrapped coroutine function with retry logic applied.
+    """
+
+    def decorator(func: TAsyncBaseModel) -> TAsyncBaseModel:
+        @wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> BaseModel:
+            result: BaseModel = await async_call_with_backoff(
+                func, args, kwargs, retries, base_wait_time, max_wait_time, metrics_hook
+            )
+            return result
+
+        return cast(TAsyncBaseModel, wrapper)
+
+    return cast(Callable[[TAsyncBaseModel], TAsyncBaseModel], decorator)
@@ -1,7 +1,7 @@
 from beartype import beartype
-from beartype.typing import Dict, List, Optional, Union
+from beartype.typing import Callable, Dict, List, Optional, Union
 
-from .model_prompting import model_prompting
+from .model_prompting import best_of_n, model_prompting
 from .prompt_constructor import openai_format_prompt_construct
 from .string_mapper import (
     map_idea_to_str,
@@ -26,10 +26,11 @@ def research_insight_quality_eval_prompting(
     temperature: Optional[float] = 0.0,
     top_p: Optional[float] = None,
     stream: Optional[bool] = None,
+    scorer: Optional[Callable[[str], float]] = None,
 ) -> str:
     input_data = {'insight': map_insight_to_str(insight)}
     messages = openai_format_prompt_construct(prompt_template, input_data)
-    insight_eval = model_prompting(
+    insight_evals = model_prompting(
         model_name,
         messages,
         return_num=return_num,
@@ -37,8 +38,8 @@ def research_insight_quality_eval_prompting(
         temperature=temperature,
         top_p=top_p,
         stream=stream,
-    )[0]
-    return insight_eval
+    )
+    return best_of_n(insight_evals, scorer)
 
 
 @beartype
@@ -52,13 +53,14 @@ def research_idea_quality_eval_prompting(
     temperature: Optional[float] = 0.0,
     top_p: Optional[float] = None,
     stream: Optional[bool] = None,
+    scorer: Optional[Callable[[str], float]] = None,
 ) -> str:
     input_data = {
         'idea': map_idea_to_str(idea),
         'insights': map_insight_list_to_str(insights),
     }
     messages = openai_format_prompt_construct(prompt_template, input_data)
-    idea_eval = model_prompting(
+    idea_evals = model_prompting(
         model_name,
         messages,
         return_num=return_num,
@@ -66,8 +68,8 @@ def research_idea_quality_eval_prompting(
         temperature=temperature,
         top_p=top_p,
         stream=stream,
-    )[0]
-    return idea_eval
+    )
+    return best_of_n(idea_evals, scorer)
 
 
 @beartype
@@ -82,6 +84,7 @@ def research_proposal_quality_eval_prompting(
     temperature: Optional[float] = 0.0,
     top_p: Optional[float] = None,
     stream: Optional[bool] = None,
+    scorer: Optional[Callable[[str], float]] = None,
 ) -> str:
     input_data = {
         'insights': map_insight_list_to_str(insights),
@@ -89,7 +92,7 @@ def research_proposal_quality_eval_prompting(
         'paper': map_paper_to_str(paper),
     }
     messages = openai_format_prompt_construct(prompt_template, input_data)
-    paper_eval = model_prompting(
+    paper_evals = model_prompting(
         model_name,
         messages,
         return_num=return_num,
@@ -97,8 +100,8 @@ def research_proposal_quality_eval_prompting(
         temperature=temperature,
         top_p=top_p,
         stream=stream,
-    )[0]
-    return paper_eval
+    )
+    return best_of_n(paper_evals, scorer)
 
 
 def research_review_quality_eval_prompting(
@@ -113,6 +116,7 @@ def research_review_quality_eval_prompting(
     temperature: Optional[float] = 0.0,
     top_p: Optional[float] = None,
     stream: Optional[bool] = None,
+    scorer: Optional[Callable[[str], float]] = None,
 ) -> str:
     input_data = {
         'idea': map_idea_to_str(idea),
@@ -121,7 +125,7 @@ def research_review_quality_eval_prompting(
         'review': map_review_to_str(review),
     }
     messages = openai_format_prompt_construct(prompt_template, input_data)
-    review_eval = model_prompting(
+    review_evals = model_prompting(
         model_name,
         messages,
         return_num=return_num,
@@ -129,8 +133,8 @@ def research_review_quality_eval_prompting(
         temperature=temperature,
         top_p=top_p,
         stream=stream,
-    )[0]
-    return review_eval
+    )
+    return best_of_n(review_evals, scorer)
 
 
 def research_rebuttal_quality_eval_prompting(
@@ -146,6 +150,7 @@ def research_rebuttal_quality_eval_prompting(
     temperature: Optional[float] = 0.0,
     top_p: Optional[float] = None,
     stream: Optional[bool] = None,
+    scorer: Optional[Callable[[str], float]] = None,
 ) -> str:
     input_data = {
         'idea': map_idea_to_str(idea),
@@ -155,7 +160,7 @@ def research_rebuttal_quality_eval_prompting(
         'rebuttal': map_rebuttal_to_str(rebuttal),
     }
     messages = openai_format_prompt_construct(prompt_template, input_data)
-    rebuttal_eval = model_prompting(
+    rebuttal_evals = model_prompting(
         model_name,
         messages,
         return_num=return_num,
@@ -163,8 +168,8 @@ def research_rebuttal_quality_eval_prompting(
         temperature=temperature,
         top_p=top_p,
         stream=stream,
-    )[0]
-    return rebuttal_eval
+    )
+    return best_of_n(rebuttal_evals, scorer)
 
 
 def research_metareview_quality_eval_prompting(
@@ -181,6 +186,7 @@ def research_metareview_quality_eval_prompting(
     temperature: Optional[float] = 0.0,
     top_p: Optional[float] = None,
     stream: Optional[bool] = None,
+    scorer: Optional[Callable[[str], float]] = None,
 ) -> str:
     input_data = {
         'insights': map_insight_list_to_str(insights),
@@ -191,7 +197,7 @@ def research_metareview_quality_eval_prompting(
         'metareview': map_metareview_to_str(metareview),
     }
     messages = openai_format_prompt_construct(prompt_template, input_data)
-    metareview_eval = model_prompting(
+    metareview_evals = model_prompting(
         model_name,
         messages,
         return_num=return_num,
@@ -199,5 +205,5 @@ def research_metareview_quality_eval_prompting(
         temperature=temperature,
         top_p=top_p,
         stream=stream,
-    )[0]
-    return metareview_eval
+    )
+    return best_of_n(metareview_evals, scorer)
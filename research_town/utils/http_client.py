@@ -0,0 +1,110 @@
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from beartype.typing import Any, Dict, Optional
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+load_dotenv()
+
+# a short gap keeps paper collection from bursting at arXiv without serializing
+# it; bulk harvesters can opt into the 3 seconds arXiv asks of them through
+# HTTP_POLITENESS_DELAYS='{"arxiv.org": 3}'
+DEFAULT_POLITENESS_DELAYS = {'arxiv.org': 0.5}
+
+
+class HostLimiter:
+    def __init__(self, max_connections: int, delay: float) -> None:
+        self.semaphore = threading.BoundedSemaphore(max_connections)
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.next_request_time = 0.0
+
+    def wait_turn(self) -> None:
+        # requests to the host start at least `delay` seconds apart
+        with self.lock:
+            now = time.monotonic()
+            start_time = max(now, self.next_request_time)
+            self.next_request_time = start_time + self.delay
+        if start_time > now:
+            time.sleep(start_time - now)
+
+
+class HttpClient:
+    """
+    Keep-alive connection pool shared by every thread of the process. At most
+    max_connections_per_host requests are in flight per host, and requests to a
+    host with a politeness delay start at least that many seconds apart. A delay
+    set for a domain also applies to its subdomains. Without politeness_delays,
+    DEFAULT_POLITENESS_DELAYS are used.
+    """
+
+    def __init__(
+        self,
+        max_connections_per_host: int = 4,
+        politeness_delays: Optional[Dict[str, float]] = None,
+        timeout: float = 60,
+    ) -> None:
+        self.max_connections_per_host = max_connections_per_host
+        self.politeness_delays = (
+            DEFAULT_POLITENESS_DELAYS
+            if politeness_delays is None
+            else politeness_delays
+        )
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=max_connections_per_host)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.hosts: Dict[str, HostLimiter] = {}
+        self.lock = threading.Lock()
+
+    def politeness_delay(self, host: str) -> float:
+        for domain, delay in self.politeness_delays.items():
+            if host == domain or host.endswith('.' + domain):
+                return delay
+        return 0.0
+
+    def host_limiter(self, host: str) -> HostLimiter:
+        with self.lock:
+            if host not in self.hosts:
+                self.hosts[host] = HostLimiter(
+                    self.max_connections_per_host, self.politeness_delay(host)
+                )
+            return self.hosts[host]
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout)
+        limiter = self.host_limiter(urlsplit(url).hostname or '')
+        with limiter.semaphore:
+            limiter.wait_turn()
+            return self.session.get(url, **kwargs)
+
+
+_http_client: Optional[HttpClient] = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """
+    Return the process-wide HTTP client, configured by the HTTP_MAX_CONNECTIONS_PER_HOST
+    and HTTP_POLITENESS_DELAYS env variables. The delays, e.g. '{"arxiv.org": 5}'
+    in seconds, are applied on top of DEFAULT_POLITENESS_DELAYS.
+    """
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = HttpClient(
+                max_connections_per_host=int(
+                    os.getenv('HTTP_MAX_CONNECTIONS_PER_HOST') or 4
+                ),
+                politeness_delays={
+                    **DEFAULT_POLITENESS_DELAYS,
+                    **json.loads(os.getenv('HTTP_POLITENESS_DELAYS') or '{}'),
+                },
+            )
+        return _http_client
@@ -0,0 +1,144 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+import numpy.typing as npt
+import torch
+from beartype.typing import Any, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from keybert import KeyBERT
+from keybert.backend import BaseEmbedder
+
+from .retriever import DEFAULT_RETRIEVER, get_embed, get_retriever
+
+load_dotenv()
+
+Keywords = List[Tuple[str, float]]
+
+
+class RetrieverEmbedder(BaseEmbedder):  # type: ignore[misc]
+    """
+    KeyBERT backend that embeds documents and candidate phrases with the shared
+    retriever, so keyword extraction loads no model of its own.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_RETRIEVER) -> None:
+        super().__init__()
+        self.model_name = model_name
+
+    def embed(self, documents: List[str], verbose: bool = False) -> npt.NDArray[Any]:
+        tokenizer, model = get_retriever(self.model_name)
+        # candidate n-grams are too many and too short-lived for the embedding cache
+        embeddings = get_embed(documents, tokenizer, model, use_cache=False)
+        return np.asarray(torch.cat(embeddings, 0).numpy(), dtype=np.float32)
+
+
+class KeywordExtractor:
+    """
+    Process-wide KeyBERT extractor. The model is created on first use, a batch of
+    queries is embedded together, and results for repeated queries are served
+    from a bounded in-memory LRU. A query that another thread is extracting is
+    waited for rather than extracted twice.
+    """
+
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        keyphrase_ngram_range: Tuple[int, int] = (1, 3),
+        max_memory_items: int = 1024,
+    ) -> None:
+        # None reuses the retriever, a name loads that sentence-transformers model
+        self.model_name = model_name
+        self.keyphrase_ngram_range = keyphrase_ngram_range
+        self.max_memory_items = max_memory_items
+        self.kw_model: Optional[KeyBERT] = None
+        self.memory: OrderedDict[str, Keywords] = OrderedDict()
+        self.in_flight: Dict[str, Future[Keywords]] = {}
+        # guards the memo only, extraction runs outside it so threads overlap
+        self.lock = threading.Lock()
+        self.model_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_model(self) -> KeyBERT:
+        with self.model_lock:
+            if self.kw_model is None:
+                self.kw_model = KeyBERT(
+                    model=self.model_name
+                    if self.model_name is not None
+                    else RetrieverEmbedder()
+                )
+            return self.kw_model
+
+    def extract_keywords(self, query: str) -> Keywords:
+        return self.extract_keywords_batch([query])[0]
+
+    def extract_keywords_batch(self, queries: List[str]) -> List[Keywords]:
+        keywords_by_query: Dict[str, Keywords] = {}
+        pending: Dict[str, Future[Keywords]] = {}
+        missing: List[str] = []
+        with self.lock:
+            for query in dict.fromkeys(queries):
+                if query in self.memory:
+                    self.memory.move_to_end(query)
+                    keywords_by_query[query] = self.memory[query]
+                elif query in self.in_flight:
+                    pending[query] = self.in_flight[query]
+                else:
+                    missing.append(query)
+                    self.in_flight[query] = Future()
+            self.hits += len(queries) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            try:
+                results = self.get_model().extract_keywords(
+                    missing,
+                    keyphrase_ngram_range=self.keyphrase_ngram_range,
+                    stop_words='english',
+                )
+                # KeyBERT returns a flat list for a single document
+                if len(missing) == 1:
+                    results = [results]
+            except Exception as e:
+                with self.lock:
+                    futures = [self.in_flight.pop(query) for query in missing]
+                for future in futures:
+                    future.set_exception(e)
+                raise
+            keywords_by_query.update(zip(missing, results))
+            with self.lock:
+                for query, keywords in zip(missing, results):
+                    self.remember(query, keywords)
+                futures = [self.in_flight.pop(query) for query in missing]
+            for future, keywords in zip(futures, results):
+                future.set_result(keywords)
+        # our own queries are settled first, so two batches never wait on each other
+        for query, future in pending.items():
+            keywords_by_query[query] = future.result()
+        return [list(keywords_by_query[query]) for query in queries]
+
+    def remember(self, query: str, keywords: Keywords) -> None:
+        # must be called with the lock held
+        self.memory[query] = keywords
+        self.memory.move_to_end(query)
+        while len(self.memory) > self.max_memory_items:
+            self.memory.popitem(last=False)
+
+
+_keyword_extractor: Optional[KeywordExtractor] = None
+_keyword_extractor_lock = threading.Lock()
+
+
+def get_keyword_extractor() -> KeywordExtractor:
+    """
+    Return the process-wide keyword extractor. It embeds with the shared retriever
+    unless the KEYWORD_MODEL env variable names a sentence-transformers model.
+    """
+    global _keyword_extractor
+    with _keyword_extractor_lock:
+        if _keyword_extractor is None:
+            _keyword_extractor = KeywordExtractor(os.getenv('KEYWORD_MODEL') or None)
+        return _keyword_extractor
@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LLM_CACHE_MODES = ['off', 'read_through', 'write_only', 'replay']
+
+
+class LLMCache:
+    """
+    SQLite-backed cache of LLM responses keyed by a canonical hash of the request.
+
+    Modes:
+    - off: the cache is bypassed.
+    - read_through: serve hits, call the model on a miss and store the answer.
+    - write_only: always call the model and store the answer, e.g. to record a run.
+    - replay: serve hits and fail on a miss, for offline reproduction.
+
+    Entries older than ttl seconds are treated as misses. Once the table grows
+    past max_entries, the least recently used entries are evicted. In
+    read_through mode, sampled requests (temperature > 0) are not served from
+    the cache unless cache_sampled is set, so that a retry gets a new sample.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        mode: str = 'read_through',
+        ttl: Optional[float] = None,
+        max_entries: Optional[int] = 100000,
+        cache_sampled: bool = False,
+    ) -> None:
+        if mode not in LLM_CACHE_MODES:
+            raise ValueError(
+                f'LLMCache: unknown mode {mode}, expected one of {LLM_CACHE_MODES}'
+            )
+        self.path = path
+        self.mode = mode if path is not None else 'off'
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.cache_sampled = cache_sampled
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.connection: Optional[sqlite3.Connection] = None
+        if self.mode != 'off' and path is not None:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            # WAL lets benchmark worker processes read while one of them writes
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, model TEXT, response TEXT, '
+                'created_at REAL, accessed_at REAL)'
+            )
+            self.connection.execute(
+                'CREATE INDEX IF NOT EXISTS responses_accessed_at '
+                'ON responses (accessed_at)'
+            )
+            self.connection.commit()
+
+    @property
+    def readable(self) -> bool:
+        return self.mode in ['read_through', 'replay']
+
+    @property
+    def writable(self) -> bool:
+        return self.mode in ['read_through', 'write_only']
+
+    @staticmethod
+    def key(**request: Any) -> str:
+        # sorted keys and fixed separators make the hash independent of dict order
+        canonical = json.dumps(
+            request, sort_keys=True, separators=(',', ':'), ensure_ascii=False
+        )
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def get(self, key: str, sampled: bool = False) -> Optional[List[str]]:
+        if self.connection is None or not self.readable:
+            return None
+        if sampled and self.mode == 'read_through' and not self.cache_sampled:
+            return None
+        now = time.time()
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT response, created_at FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                self.connection.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self.connection.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.connection.execute(
+                'UPDATE responses SET accessed_at = ? WHERE key = ?', (now, key)
+            )
+            self.connection.commit()
+            self.hits += 1
+        response: List[str] = json.loads(row[0])
+        return response
+
+    def put(self, key: str, model: str, response: List[str]) -> None:
+        if self.connection is None or not self.writable:
+            return
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)',
+                (key, model, json.dumps(response), now, now),
+            )
+            if self.max_entries is not None:
+                self.connection.execute(
+                    'DELETE FROM responses WHERE key IN ('
+                    'SELECT key FROM responses ORDER BY accessed_at DESC '
+                    'LIMIT -1 OFFSET ?)',
+                    (self.max_entries,),
+                )
+            self.connection.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            entries = (
+                self.connection.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+                if self.connection is not None
+                else 0
+            )
+            return {'hits': self.hits, 'misses': self.misses, 'entries': entries}
+
+    def clear(self) -> None:
+        with self.lock:
+            if self.connection is not None:
+                self.connection.execute('DELETE FROM responses')
+                self.connection.commit()
+            self.hits = self.misses = 0
+
+
+_llm_cache: Optional[LLMCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    """
+    Return the process-wide LLM response cache. It is configured through the
+    LLM_CACHE_PATH, LLM_CACHE_MODE, LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES and
+    LLM_CACHE_SAMPLED env variables and is off unless LLM_CACHE_PATH is set.
+    """
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            ttl = os.getenv('LLM_CACHE_TTL')
+            max_entries = os.getenv('LLM_CACHE_MAX_ENTRIES')
+            _llm_cache = LLMCache(
+                os.getenv('LLM_CACHE_PATH'),
+                mode=os.getenv('LLM_CACHE_MODE', 'read_through'),
+                ttl=float(ttl) if ttl else None,
+                max_entries=int(max_entries) if max_entries else 100000,
+                cache_sampled=os.getenv('LLM_CACHE_SAMPLED', '').lower()
+                in ['1', 'true'],
+            )
+        return _llm_cache
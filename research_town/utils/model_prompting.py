@@ -1,12 +1,14 @@
 import litellm
 from beartype import beartype
-from beartype.typing import Dict, List, Optional
+from beartype.typing import Callable, Dict, Generator, List, Optional
 
 from .error_handler import api_calling_error_exponential_backoff
+from .llm_cache import get_llm_cache
+from .rate_limiter import estimate_tokens, get_rate_limiter
+from .token_stream import emit_delta, emit_reset
 
 
 @beartype
-@api_calling_error_exponential_backoff(retries=5, base_wait_time=1)
 def model_prompting(
     llm_model: str,
     messages: List[Dict[str, str]],
@@ -18,8 +20,75 @@ def model_prompting(
     mode: Optional[str] = None,
 ) -> List[str]:
     """
-    Select model via router in LiteLLM.
+    Select model via router in LiteLLM, answering from the LLM response cache
+    when one is configured.
     """
+    cache = get_llm_cache()
+    key = cache.key(
+        model=llm_model,
+        messages=messages,
+        n=return_num,
+        max_tokens=max_token_num,
+        temperature=temperature,
+        top_p=top_p,
+    )
+    # a sampled answer is only reused when the cache is told to, otherwise a
+    # caller retrying on bad output would get the same bad output back; the
+    # provider default temperature and several choices are sampled too
+    sampled = temperature is None or temperature > 0 or (return_num or 1) > 1
+    cached = cache.get(key, sampled=sampled)
+    if cached is not None:
+        if stream:
+            emit_delta(cached[0])
+        return cached
+    if cache.mode == 'replay':
+        raise ValueError(f'LLM cache replay: no cached response for {llm_model}')
+
+    content_l = completion_prompting(
+        llm_model,
+        messages,
+        return_num,
+        max_token_num,
+        temperature,
+        top_p,
+        stream,
+        mode=mode,
+    )
+    cache.put(key, llm_model, content_l)
+    return content_l
+
+
+@api_calling_error_exponential_backoff(retries=5, base_wait_time=1)
+def completion_prompting(
+    llm_model: str,
+    messages: List[Dict[str, str]],
+    return_num: Optional[int] = 1,
+    max_token_num: Optional[int] = 512,
+    temperature: Optional[float] = 0.0,
+    top_p: Optional[float] = None,
+    stream: Optional[bool] = None,
+    mode: Optional[str] = None,
+) -> List[str]:
+    if stream:
+        # callers still get the full text, deltas reach the stream sink on the way
+        content = ''
+        try:
+            for delta in stream_model_prompting(
+                llm_model, messages, max_token_num, temperature, top_p
+            ):
+                emit_delta(delta)
+                content += delta
+        except Exception:
+            # the retry streams the text again from the start
+            if content:
+                emit_reset()
+            raise
+        return [content]
+
+    # every attempt, retries included, spends from the model's rate limit budget
+    rate_limiter = get_rate_limiter()
+    estimated_tokens = estimate_tokens(messages, max_token_num, return_num)
+    rate_limiter.acquire(llm_model, estimated_tokens)
     completion = litellm.completion(
         model=llm_model,
         messages=messages,
@@ -30,6 +99,71 @@ def model_prompting(
         temperature=temperature,
         stream=stream,
     )
-    content = completion.choices[0].message.content
-    content_l = [content]
+    total_tokens = getattr(getattr(completion, 'usage', None), 'total_tokens', None)
+    if isinstance(total_tokens, int):
+        rate_limiter.record_usage(llm_model, estimated_tokens, total_tokens)
+    # all n choices were paid for, callers pick one with best_of_n
+    content_l = [choice.message.content for choice in completion.choices]
     return content_l
+
+
+@beartype
+def stream_model_prompting(
+    llm_model: str,
+    messages: List[Dict[str, str]],
+    max_token_num: Optional[int] = 512,
+    temperature: Optional[float] = 0.0,
+    top_p: Optional[float] = None,
+) -> Generator[str, None, None]:
+    """
+    Yield the text deltas of a single completion as the model produces them.
+    """
+    rate_limiter = get_rate_limiter()
+    estimated_tokens = estimate_tokens(messages, max_token_num)
+    rate_limiter.acquire(llm_model, estimated_tokens)
+    completion = litellm.completion(
+        model=llm_model,
+        messages=messages,
+        max_tokens=max_token_num,
+        top_p=top_p,
+        temperature=temperature,
+        stream=True,
+        stream_options={'include_usage': True},
+    )
+    total_tokens = None
+    content_length = 0
+    for chunk in completion:
+        usage_tokens = getattr(getattr(chunk, 'usage', None), 'total_tokens', None)
+        if isinstance(usage_tokens, int):
+            total_tokens = usage_tokens
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            content_length += len(delta)
+            yield delta
+    if total_tokens is None:
+        # the provider did not report usage, settle on the prompt and streamed text
+        total_tokens = estimate_tokens(messages) + content_length // 4
+    rate_limiter.record_usage(llm_model, estimated_tokens, total_tokens)
+
+
+@beartype
+def best_of_n(
+    candidates: List[str], scorer: Optional[Callable[[str], float]] = None
+) -> str:
+    """
+    Pick the candidate with the highest score, the earliest one on ties. Without
+    a scorer, or when every candidate fails to score, the first one is returned.
+    """
+    if scorer is None or len(candidates) == 1:
+        return candidates[0]
+    best_candidate, best_score = candidates[0], float('-inf')
+    for candidate in candidates:
+        try:
+            score = scorer(candidate)
+        except Exception:
+            continue
+        if score > best_score:
+            best_candidate, best_score = candidate, score
+    return best_candidate
@@ -1,16 +1,30 @@
+import itertools
 import re
 import time
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 
 import arxiv
 import requests
-from beartype.typing import Any, Dict, List, Optional, Set
-from bs4 import BeautifulSoup
-from keybert import KeyBERT
+from beartype.typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+from bs4 import BeautifulSoup, Tag
 from PyPDF2 import PdfReader
 from tqdm import tqdm
 
 from ..data.data import Paper
+from .content_cache import get_content_cache
+from .keyword_extractor import get_keyword_extractor
 
 
 def perform_arxiv_search(
@@ -45,10 +59,7 @@ def get_related_papers(
     keyword = ''
 
     if query is not None:
-        kw_model = KeyBERT()
-        extraction_results = kw_model.extract_keywords(
-            query, keyphrase_ngram_range=(1, 3), stop_words='english'
-        )
+        extraction_results = get_keyword_extractor().extract_keywords(query)
         keyword = ' '.join([word for word, _ in extraction_results])
 
     arxiv_query_parts = []
@@ -78,33 +89,7 @@ def get_related_papers(
     # Use the independent arXiv search function with retry logic
     results = perform_arxiv_search(search)
 
-    papers_list = []
-
-    for result in tqdm(results, desc='Collecting related papers', unit='Paper'):
-        paper_title = result.title
-        paper_url = result.entry_id
-        paper_abstract = result.summary.replace('\n', ' ')
-        paper_authors = [author.name for author in result.authors]
-        paper_domain = result.primary_category
-        publish_time = result.published
-        paper_timestamp = int(publish_time.timestamp())
-
-        paper_sections = get_paper_content_from_html(paper_url)
-        paper_bibliography = get_paper_bibliography_from_html(paper_url)
-
-        paper = Paper(
-            title=paper_title,
-            abstract=paper_abstract,
-            authors=paper_authors,
-            url=paper_url,
-            domain=paper_domain,
-            timestamp=paper_timestamp,
-            sections=paper_sections,
-            bibliography=paper_bibliography,
-        )
-        papers_list.append(paper)
-
-    return papers_list
+    return collect_papers(results, desc='Collecting related papers')
 
 
 def get_recent_papers(
@@ -125,35 +110,41 @@ def get_recent_papers(
     # Use the independent arXiv search function with retry logic
     results = perform_arxiv_search(search)
 
-    papers_list = []
+    return collect_papers(results, desc=f'Collecting recent papers in "{domain}"')
+
+
+def collect_papers(
+    results: Iterable[arxiv.Result], desc: str, max_workers: int = 16
+) -> List[Paper]:
+    # pages are fetched in parallel, the http client bounds the load per host
+    results = list(results)
 
-    for result in tqdm(
-        results, desc=f'Collecting recent papers in "{domain}"', unit='Paper'
-    ):
-        paper_title = result.title
+    def collect_paper(result: arxiv.Result) -> Paper:
         paper_url = result.entry_id
-        paper_abstract = result.summary.replace('\n', ' ')
-        paper_authors = [author.name for author in result.authors]
-        paper_domain = result.primary_category
-        publish_time = result.published
-        paper_timestamp = int(publish_time.timestamp())
-
-        paper_sections = get_paper_content_from_html(paper_url)
-        paper_bibliography = get_paper_bibliography_from_html(paper_url)
-
-        paper = Paper(
-            title=paper_title,
-            abstract=paper_abstract,
-            authors=paper_authors,
+        # one download and parse for both the sections and the bibliography
+        paper_content = fetch_and_parse_paper(paper_url, ['sections', 'bibliography'])
+        return Paper(
+            title=result.title,
+            abstract=result.summary.replace('\n', ' '),
+            authors=[author.name for author in result.authors],
             url=paper_url,
-            domain=paper_domain,
-            timestamp=paper_timestamp,
-            sections=paper_sections,
-            bibliography=paper_bibliography,
+            domain=result.primary_category,
+            timestamp=int(result.published.timestamp()),
+            sections=paper_content['sections'],
+            bibliography=paper_content['bibliography'],
         )
-        papers_list.append(paper)
 
-    return papers_list
+    if not results:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(results))) as executor:
+        return list(
+            tqdm(
+                executor.map(collect_paper, results),
+                total=len(results),
+                desc=desc,
+                unit='Paper',
+            )
+        )
 
 
 def fetch_html_content(url: str) -> Optional[BeautifulSoup]:
@@ -167,7 +158,7 @@ def fetch_html_content(url: str) -> Optional[BeautifulSoup]:
         html_url = url
 
     try:
-        response = requests.get(html_url, timeout=60)
+        response = get_content_cache().get(html_url, timeout=60)
         if response.status_code == 200:
             return BeautifulSoup(response.text, 'lxml')
     except Exception:
@@ -175,11 +166,37 @@ def fetch_html_content(url: str) -> Optional[BeautifulSoup]:
     return None
 
 
-def get_section_contents(soup: BeautifulSoup) -> Optional[Dict[str, str]]:
-    section_contents = None
+# (tag, class) of every article element read by the extractors below
+ARTICLE_ELEMENTS = [
+    ('section', 'ltx_section'),
+    ('section', 'ltx_appendix'),
+    ('section', 'ltx_bibliography'),
+    ('figure', 'ltx_figure'),
+    ('figure', 'ltx_table'),
+]
+
+
+def index_article(soup: BeautifulSoup) -> Dict[str, List[Tag]]:
+    # a single walk over the article collects what every extractor needs,
+    # keyed by class and in document order
+    elements: Dict[str, List[Tag]] = {
+        class_name: [] for _, class_name in ARTICLE_ELEMENTS
+    }
     article = soup.find('article', class_='ltx_document')
-    sections = article.find_all('section', class_='ltx_section')
-    sections.extend(article.find_all('section', class_='ltx_appendix'))
+    if article is None:
+        return elements
+    for element in article.find_all(['section', 'figure']):
+        for class_name in element.get_attribute_list('class'):
+            if (element.name, class_name) in ARTICLE_ELEMENTS:
+                elements[class_name].append(element)
+    return elements
+
+
+def extract_section_contents(
+    elements: Dict[str, List[Tag]],
+) -> Optional[Dict[str, str]]:
+    section_contents = None
+    sections = elements['ltx_section'] + elements['ltx_appendix']
 
     if len(sections) > 0:
         section_contents = {}
@@ -201,10 +218,9 @@ def get_section_contents(soup: BeautifulSoup) -> Optional[Dict[str, str]]:
     return section_contents
 
 
-def get_table_captions(soup: BeautifulSoup) -> Optional[Dict[str, str]]:
+def extract_table_captions(elements: Dict[str, List[Tag]]) -> Optional[Dict[str, str]]:
     table_captions = None
-    article = soup.find('article', class_='ltx_document')
-    tables = article.find_all('figure', class_='ltx_table')
+    tables = elements['ltx_table']
 
     if len(tables) > 0:
         table_captions = {}
@@ -225,10 +241,11 @@ def get_table_captions(soup: BeautifulSoup) -> Optional[Dict[str, str]]:
     return table_captions
 
 
-def get_figure_captions(soup: BeautifulSoup) -> Optional[Dict[str, str]]:
+def extract_figure_captions(
+    elements: Dict[str, List[Tag]],
+) -> Optional[Dict[str, str]]:
     figure_captions = None
-    article = soup.find('article', class_='ltx_document')
-    figures = article.find_all('figure', class_='ltx_figure')
+    figures = elements['ltx_figure']
 
     if len(figures) > 0:
         figure_captions = {}
@@ -249,10 +266,9 @@ def get_figure_captions(soup: BeautifulSoup) -> Optional[Dict[str, str]]:
     return figure_captions
 
 
-def get_bibliography(soup: BeautifulSoup) -> Optional[Dict[str, str]]:
+def extract_bibliography(elements: Dict[str, List[Tag]]) -> Optional[Dict[str, str]]:
     bibliography = None
-    article = soup.find('article', class_='ltx_document')
-    bibliography_raw = article.find('section', class_='ltx_bibliography')
+    bibliography_raw = next(iter(elements['ltx_bibliography']), None)
 
     if bibliography_raw is not None:
         bibliography = {}
@@ -268,43 +284,153 @@ def get_bibliography(soup: BeautifulSoup) -> Optional[Dict[str, str]]:
     return bibliography
 
 
-def get_paper_content_from_html(url: str) -> Optional[Dict[str, str]]:
+PAPER_EXTRACTORS: Dict[
+    str, Callable[[Dict[str, List[Tag]]], Optional[Dict[str, str]]]
+] = {
+    'sections': extract_section_contents,
+    'bibliography': extract_bibliography,
+    'figure_captions': extract_figure_captions,
+    'table_captions': extract_table_captions,
+}
+
+
+def fetch_and_parse_paper(
+    url: str,
+    extractors: Sequence[str] = tuple(PAPER_EXTRACTORS),
+) -> Dict[str, Optional[Dict[str, str]]]:
+    """
+    Download and parse the arXiv HTML of a paper once and run the selected
+    extractors ('sections', 'bibliography', 'figure_captions', 'table_captions')
+    on it. Every selected key maps to None if the HTML is unavailable.
+    """
+    for name in extractors:
+        if name not in PAPER_EXTRACTORS:
+            raise ValueError(f'Unknown paper extractor: {name}')
+    cache = get_content_cache()
+    paper: Dict[str, Optional[Dict[str, str]]] = {}
+    missing = []
+    for name in extractors:
+        found, paper[name] = cache.load(f'paper_{name}', url)
+        if not found:
+            missing.append(name)
+    if not missing:
+        return paper
     soup = fetch_html_content(url)
     if soup is None:
-        return None
+        return paper
+    elements = index_article(soup)
+    for name in missing:
+        paper[name] = PAPER_EXTRACTORS[name](elements)
+        cache.save(f'paper_{name}', url, paper[name])
+    return paper
 
-    section_contents = get_section_contents(soup)
-    return section_contents
 
+def get_section_contents(soup: BeautifulSoup) -> Optional[Dict[str, str]]:
+    return extract_section_contents(index_article(soup))
 
-def get_paper_figure_captions_from_html(url: str) -> Optional[Dict[str, str]]:
-    soup = fetch_html_content(url)
-    if soup is None:
-        return None
 
-    figure_captions = get_figure_captions(soup)
-    return figure_captions
+def get_table_captions(soup: BeautifulSoup) -> Optional[Dict[str, str]]:
+    return extract_table_captions(index_article(soup))
 
 
-def get_paper_table_captions_from_html(url: str) -> Optional[Dict[str, str]]:
-    soup = fetch_html_content(url)
-    if soup is None:
-        return None
+def get_figure_captions(soup: BeautifulSoup) -> Optional[Dict[str, str]]:
+    return extract_figure_captions(index_article(soup))
 
-    table_captions = get_table_captions(soup)
-    return table_captions
 
+def get_bibliography(soup: BeautifulSoup) -> Optional[Dict[str, str]]:
+    return extract_bibliography(index_article(soup))
 
-def get_paper_bibliography_from_html(url: str) -> Optional[Dict[str, str]]:
-    soup = fetch_html_content(url)
-    if soup is None:
-        return None
 
-    bibliography = get_bibliography(soup)
-    return bibliography
+def get_paper_content_from_html(url: str) -> Optional[Dict[str, str]]:
+    return fetch_and_parse_paper(url, ['sections'])['sections']
+
+
+def get_paper_figure_captions_from_html(url: str) -> Optional[Dict[str, str]]:
+    return fetch_and_parse_paper(url, ['figure_captions'])['figure_captions']
 
 
-def get_paper_content_from_pdf(url: str) -> Optional[Dict[str, str]]:
+def get_paper_table_captions_from_html(url: str) -> Optional[Dict[str, str]]:
+    return fetch_and_parse_paper(url, ['table_captions'])['table_captions']
+
+
+def get_paper_bibliography_from_html(url: str) -> Optional[Dict[str, str]]:
+    return fetch_and_parse_paper(url, ['bibliography'])['bibliography']
+
+
+PDF_SECTION_TITLES = [
+    'Abstract',
+    'Introduction',
+    'Related Work',
+    'Background',
+    'Methods',
+    'Experiments',
+    'Results',
+    'Discussion',
+    'Conclusion',
+    'Conclusions',
+    'Acknowledgments',
+    'References',
+    'Appendix',
+    'Materials and Methods',
+]
+
+PDF_SECTION_PATTERN = re.compile(
+    r'\b(' + '|'.join(re.escape(title) for title in PDF_SECTION_TITLES) + r')\b',
+    re.IGNORECASE,
+)
+
+
+def iter_pdf_pages(content: bytes) -> Iterator[str]:
+    # pages are only decoded when the consumer asks for them
+    reader = PdfReader(BytesIO(content))
+    for page in reader.pages:
+        yield page.extract_text()
+
+
+def split_pdf_sections(pages: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """
+    Split streamed page text into (title, content) sections, yielding each one as
+    soon as the next title is seen. Content starts with its title, as in one
+    regex pass over the concatenated pages.
+    """
+    # a title that ends within this many characters of the text seen so far may
+    # continue on the next page, e.g. 'Conclusion' | 's'
+    margin = max(len(title) for title in PDF_SECTION_TITLES) + 1
+    name: Optional[str] = None
+    chunks: List[str] = []
+    # unconsumed text, after one character of context for the \b of the pattern
+    tail = ' '
+    for page in itertools.chain(pages, [None]):
+        final = page is None
+        text = tail + (page or '')
+        limit = len(text) if final else len(text) - margin
+        start = 1
+        consumed = max(start, limit)
+        for match in PDF_SECTION_PATTERN.finditer(text, start):
+            if match.end() > limit:
+                consumed = match.start()
+                break
+            chunks.append(text[start : match.start()])
+            if name is not None:
+                yield name, ''.join(chunks).strip()
+            name = match.group()
+            chunks = []
+            start = match.start()
+        consumed = max(consumed, start)
+        chunks.append(text[start:consumed])
+        tail = text[consumed - 1 :]
+    if name is not None:
+        yield name, ''.join(chunks).strip()
+
+
+def get_paper_content_from_pdf(
+    url: str, stop: Optional[Callable[[Dict[str, str]], bool]] = None
+) -> Optional[Dict[str, str]]:
+    """
+    Extract sections from the PDF of a paper, decoding pages lazily. If stop is
+    given, it is called with the sections found so far after each one completes,
+    and extraction ends as soon as it returns True.
+    """
     try:
         if 'abs' in url:
             pdf_url = url.replace('abs', 'pdf')
@@ -313,54 +439,36 @@ def get_paper_content_from_pdf(url: str) -> Optional[Dict[str, str]]:
         else:
             pdf_url = url
 
-        response = requests.get(pdf_url)
-        file_stream = BytesIO(response.content)
-        reader = PdfReader(file_stream)
+        cache = get_content_cache()
+        cached_sections: Optional[Dict[str, str]]
+        found, cached_sections = cache.load('pdf_sections', pdf_url)
+        if found:
+            return cached_sections
 
-        text = ''
-        for page in reader.pages:
-            text += page.extract_text()
-
-        if text == '':
-            return None
-
-        section_titles = [
-            'Abstract',
-            'Introduction',
-            'Related Work',
-            'Background',
-            'Methods',
-            'Experiments',
-            'Results',
-            'Discussion',
-            'Conclusion',
-            'Conclusions',
-            'Acknowledgments',
-            'References',
-            'Appendix',
-            'Materials and Methods',
-        ]
-
-        section_pattern = re.compile(
-            r'\b(' + '|'.join(re.escape(title) for title in section_titles) + r')\b',
-            re.IGNORECASE,
-        )
+        response = cache.get(pdf_url)
+        has_text = False
 
-        sections = {}
-        matches = list(section_pattern.finditer(text))
+        def pages() -> Iterator[str]:
+            nonlocal has_text
+            for page_text in iter_pdf_pages(response.content):
+                has_text = has_text or page_text != ''
+                yield page_text
 
-        for i, match in enumerate(matches):
-            section_name = match.group()
-            section_start = match.start()
-
-            if i + 1 < len(matches):
-                section_end = matches[i + 1].start()
-            else:
-                section_end = len(text)
-
-            section_content = text[section_start:section_end].strip()
+        sections: Dict[str, str] = {}
+        stopped = False
+        for section_name, section_content in split_pdf_sections(pages()):
             sections[section_name] = section_content
+            if stop is not None and stop(sections):
+                stopped = True
+                break
 
+        if not has_text:
+            cache.save('pdf_sections', pdf_url, None)
+            return None
+
+        # only a full extraction may answer later calls
+        if not stopped:
+            cache.save('pdf_sections', pdf_url, sections)
         return sections
 
     except requests.exceptions.RequestException as e:
@@ -373,9 +481,21 @@ def get_paper_content_from_pdf(url: str) -> Optional[Dict[str, str]]:
 
 def get_paper_introduction(url: str) -> Optional[str]:
     intro_length = 512
+
+    def has_introduction(sections: Dict[str, str]) -> bool:
+        # the introduction and what follows it already fill intro_length words
+        num_words = 0
+        on_and_after_introduction = False
+        for section_name, section_content in sections.items():
+            if 'introduction' in section_name.lower():
+                on_and_after_introduction = True
+            if on_and_after_introduction:
+                num_words += len(section_content.split(' '))
+        return num_words >= intro_length
+
     sections = get_paper_content_from_html(url)
     if not sections:
-        sections = get_paper_content_from_pdf(url)
+        sections = get_paper_content_from_pdf(url, stop=has_introduction)
     if not sections:
         return None
 
@@ -407,7 +527,7 @@ def get_references(arxiv_id: str, max_retries: int = 5) -> List[Dict[str, Any]]:
     headers = {'User-Agent': 'PaperProcessor/1.0'}
 
     for attempt in range(max_retries):
-        response = requests.get(url, params=params, headers=headers)  # type: ignore
+        response = get_content_cache().get(url, params=params, headers=headers)
         if response.status_code == 200:
             data = response.json()
             references = []
@@ -0,0 +1,205 @@
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# lower values are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_DEFAULT = 5
+PRIORITY_BATCH = 10
+
+_default_priority = PRIORITY_DEFAULT
+_priority: ContextVar[Optional[int]] = ContextVar('llm_priority', default=None)
+
+
+def set_default_priority(priority: int) -> None:
+    """
+    Set the priority of LLM calls made by this process, e.g. interactive for the
+    backend workers and batch for benchmark runs.
+    """
+    global _default_priority
+    _default_priority = priority
+
+
+@contextmanager
+def prompting_priority(priority: int) -> Iterator[None]:
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    priority = _priority.get()
+    return _default_priority if priority is None else priority
+
+
+def estimate_tokens(
+    messages: List[Dict[str, str]],
+    max_token_num: Optional[int] = None,
+    return_num: Optional[int] = None,
+) -> int:
+    # ~4 characters per token for English prompts, plus the completion budget,
+    # which providers reserve against the TPM limit when the request is admitted
+    prompt_tokens = sum(len(message.get('content', '')) for message in messages) // 4
+    prompt_tokens += 4 * len(messages)
+    return prompt_tokens + (max_token_num or 0) * (return_num or 1)
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        # a request larger than the whole bucket would never fit otherwise
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def consume(self, amount: float) -> None:
+        self.level -= amount
+
+
+class RateLimiter:
+    """
+    Per-model requests-per-minute and tokens-per-minute budgets shared by every
+    thread and asyncio task of the process. Callers queue per model and are
+    admitted by priority, then in arrival order, once both buckets can pay for
+    the request. Models without configured limits are never delayed.
+    """
+
+    def __init__(self) -> None:
+        self.condition = threading.Condition()
+        self.buckets: Dict[
+            str, Tuple[Optional[TokenBucket], Optional[TokenBucket]]
+        ] = {}
+        self.queues: Dict[str, List[Tuple[int, int]]] = {}
+        self.counter = itertools.count()
+
+    def configure(
+        self, model: str, rpm: Optional[float] = None, tpm: Optional[float] = None
+    ) -> None:
+        with self.condition:
+            self.buckets[model] = (
+                TokenBucket(rpm) if rpm else None,
+                TokenBucket(tpm) if tpm else None,
+            )
+            self.queues.setdefault(model, [])
+            self.condition.notify_all()
+
+    def acquire(self, model: str, tokens: int, priority: Optional[int] = None) -> None:
+        if model not in self.buckets:
+            return
+        ticket = self.enqueue(model, priority)
+        try:
+            with self.condition:
+                while True:
+                    wait_time = self.try_admit(model, ticket, tokens)
+                    if wait_time == 0.0:
+                        return
+                    self.condition.wait(wait_time)
+        except BaseException:
+            self.dequeue(model, ticket)
+            raise
+
+    async def acquire_async(
+        self, model: str, tokens: int, priority: Optional[int] = None
+    ) -> None:
+        if model not in self.buckets:
+            return
+        ticket = self.enqueue(model, priority)
+        try:
+            while True:
+                with self.condition:
+                    wait_time = self.try_admit(model, ticket, tokens)
+                if wait_time == 0.0:
+                    return
+                # tasks cannot wait on the condition, so they re-check regularly
+                await asyncio.sleep(min(wait_time, 0.05))
+        except BaseException:
+            self.dequeue(model, ticket)
+            raise
+
+    def record_usage(self, model: str, estimated: int, actual: int) -> None:
+        # settle the difference between the estimate and the reported usage
+        with self.condition:
+            _, token_bucket = self.buckets.get(model, (None, None))
+            if token_bucket is not None:
+                token_bucket.consume(actual - estimated)
+                self.condition.notify_all()
+
+    def enqueue(self, model: str, priority: Optional[int]) -> Tuple[int, int]:
+        ticket = (
+            current_priority() if priority is None else priority,
+            next(self.counter),
+        )
+        with self.condition:
+            heapq.heappush(self.queues[model], ticket)
+        return ticket
+
+    def dequeue(self, model: str, ticket: Tuple[int, int]) -> None:
+        with self.condition:
+            queue = self.queues[model]
+            if ticket in queue:
+                queue.remove(ticket)
+                heapq.heapify(queue)
+                self.condition.notify_all()
+
+    def try_admit(self, model: str, ticket: Tuple[int, int], tokens: int) -> float:
+        # must be called with the condition held, returns 0.0 once admitted
+        queue = self.queues[model]
+        if queue[0] != ticket:
+            return 1.0
+        now = time.monotonic()
+        request_bucket, token_bucket = self.buckets[model]
+        wait_time = max(
+            request_bucket.wait_time(1, now) if request_bucket else 0.0,
+            token_bucket.wait_time(tokens, now) if token_bucket else 0.0,
+        )
+        if wait_time > 0.0:
+            return wait_time
+        if request_bucket is not None:
+            request_bucket.consume(1)
+        if token_bucket is not None:
+            token_bucket.consume(tokens)
+        heapq.heappop(queue)
+        self.condition.notify_all()
+        return 0.0
+
+
+_rate_limiter: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Return the process-wide rate limiter, with budgets read from the
+    LLM_RATE_LIMITS env variable, e.g. '{"gpt-4o-mini": {"rpm": 500, "tpm": 200000}}'.
+    """
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter()
+            limits: Dict[str, Dict[str, float]] = json.loads(
+                os.getenv('LLM_RATE_LIMITS') or '{}'
+            )
+            for model, limit in limits.items():
+                _rate_limiter.configure(model, limit.get('rpm'), limit.get('tpm'))
+        return _rate_limiter
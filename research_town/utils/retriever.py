@@ -1,25 +1,116 @@
-from typing import List
+import threading
+from typing import Dict, List, Optional, Tuple
 
 import torch
 from transformers import BertModel, BertTokenizer
 
+from .embedding_cache import get_embedding_cache
+
+DEFAULT_RETRIEVER = 'facebook/contriever'
+
+_retrievers: Dict[str, Tuple[BertTokenizer, BertModel]] = {}
+_retrievers_lock = threading.Lock()
+
+
+def get_retriever(
+    model_name: str = DEFAULT_RETRIEVER,
+) -> Tuple[BertTokenizer, BertModel]:
+    """
+    Return the process-wide tokenizer and model for `model_name`, loading them on
+    first use. Every DB and utility shares this single copy of the weights.
+    """
+    retriever = _retrievers.get(model_name)
+    if retriever is None:
+        with _retrievers_lock:
+            retriever = _retrievers.get(model_name)
+            if retriever is None:
+                retriever = (
+                    BertTokenizer.from_pretrained(model_name),
+                    BertModel.from_pretrained(model_name).eval(),
+                )
+                _retrievers[model_name] = retriever
+    return retriever
+
+
+def preload_retriever(model_name: str = DEFAULT_RETRIEVER) -> None:
+    """
+    Load the retriever before forking worker processes, so that workers inherit
+    the weights copy-on-write instead of each loading their own copy.
+    """
+    get_retriever(model_name)
+
 
 def get_embed(
     instructions: List[str],
-    retriever_tokenizer: BertTokenizer = BertTokenizer.from_pretrained(
-        'facebook/contriever'
-    ),
-    retriever_model: BertModel = BertModel.from_pretrained('facebook/contriever'),
+    retriever_tokenizer: Optional[BertTokenizer] = None,
+    retriever_model: Optional[BertModel] = None,
+    batch_size: int = 32,
+    sort_by_length: bool = True,
+    use_cache: bool = True,
 ) -> List[torch.Tensor]:
-    encoded_input_all = [
-        retriever_tokenizer(text, return_tensors='pt', truncation=True, max_length=512)
-        for text in instructions
-    ]
+    if retriever_tokenizer is None or retriever_model is None:
+        retriever_tokenizer, retriever_model = get_retriever()
+
+    # only models that know their checkpoint name can be cached safely
+    model_name = getattr(retriever_model, 'name_or_path', None)
+    if not use_cache or not isinstance(model_name, str) or not model_name:
+        return encode(
+            instructions,
+            retriever_tokenizer,
+            retriever_model,
+            batch_size,
+            sort_by_length,
+        )
+
+    cache = get_embedding_cache()
+    cached: Dict[str, torch.Tensor] = {}
+    missing: List[str] = []
+    for text in dict.fromkeys(instructions):
+        embedding = cache.get(model_name, text)
+        if embedding is not None:
+            cached[text] = torch.from_numpy(embedding.copy()).unsqueeze(0)
+        else:
+            missing.append(text)
+
+    if missing:
+        embeddings = encode(
+            missing, retriever_tokenizer, retriever_model, batch_size, sort_by_length
+        )
+        for text, tensor in zip(missing, embeddings):
+            cache.put(model_name, text, tensor.squeeze(0).numpy())
+            cached[text] = tensor
+    return [cached[text] for text in instructions]
+
+
+def encode(
+    instructions: List[str],
+    retriever_tokenizer: BertTokenizer,
+    retriever_model: BertModel,
+    batch_size: int,
+    sort_by_length: bool,
+) -> List[torch.Tensor]:
+    # batching texts of similar length together keeps padding, and wasted compute, low
+    order = list(range(len(instructions)))
+    if sort_by_length:
+        order.sort(key=lambda i: len(instructions[i]))
+
+    emb_list: List[torch.Tensor] = [torch.empty(0)] * len(instructions)
     with torch.no_grad():
-        emb_list = []
-        for inter in encoded_input_all:
+        for start in range(0, len(order), batch_size):
+            batch = order[start : start + batch_size]
+            inter = retriever_tokenizer(
+                [instructions[i] for i in batch],
+                return_tensors='pt',
+                padding=True,
+                truncation=True,
+                max_length=512,
+            )
             emb = retriever_model(**inter)
-            emb_list.append(emb['last_hidden_state'].mean(1))
+            # mean over real tokens only, so padding does not change the embedding
+            mask = inter['attention_mask'].unsqueeze(-1).to(emb['last_hidden_state'])
+            pooled = (emb['last_hidden_state'] * mask).sum(1) / mask.sum(1).clamp(min=1)
+            for i, embedding in zip(batch, pooled):
+                emb_list[i] = embedding.unsqueeze(0)
     return emb_list
 
 
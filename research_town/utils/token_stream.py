@@ -0,0 +1,83 @@
+import threading
+import uuid
+from contextvars import ContextVar
+from functools import wraps
+
+from beartype.typing import Any, Callable, NamedTuple, Optional, TypeVar, cast
+
+from ..data import Progress
+
+F = TypeVar('F', bound=Callable[..., Any])
+
+
+class StreamChunk(NamedTuple):
+    # pk of the progress being written and the prompt of it that produced the text
+    pk: Optional[str]
+    part: Optional[str]
+    content: str
+    # the part was restarted, text streamed for it so far should be discarded
+    reset: bool = False
+
+
+StreamSink = Callable[[StreamChunk], None]
+
+_stream_sink: Optional[StreamSink] = None
+_stream_sink_lock = threading.Lock()
+_progress_pk: ContextVar[Optional[str]] = ContextVar('progress_pk', default=None)
+_stream_part: ContextVar[Optional[str]] = ContextVar('stream_part', default=None)
+
+
+def set_stream_sink(sink: Optional[StreamSink]) -> None:
+    """
+    Register a callback that receives a StreamChunk for every token chunk
+    streamed from the LLM in this process. Pass None to stop streaming.
+    """
+    global _stream_sink
+    _stream_sink = sink
+
+
+def set_stream_part(part: Optional[str]) -> None:
+    """
+    Tag text streamed from the current context, so that prompts of one progress
+    that run in parallel can be told apart.
+    """
+    _stream_part.set(part)
+
+
+def emit(chunk: StreamChunk) -> None:
+    sink = _stream_sink
+    if sink is not None:
+        # sinks usually write to a pipe or socket, keep chunks from interleaving
+        with _stream_sink_lock:
+            sink(chunk)
+
+
+def emit_delta(delta: str) -> None:
+    if delta:
+        emit(StreamChunk(_progress_pk.get(), _stream_part.get(), delta))
+
+
+def emit_reset() -> None:
+    emit(StreamChunk(_progress_pk.get(), _stream_part.get(), '', reset=True))
+
+
+def progress_streaming(method: F) -> F:
+    """
+    Give the progress an agent method is about to produce its pk up front, so that
+    text streamed while it is written can be tagged with the pk of the final item.
+    """
+
+    @wraps(method)
+    def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+        pk = str(uuid.uuid4())
+        token = _progress_pk.set(pk)
+        try:
+            result = method(self, *args, **kwargs)
+        finally:
+            _progress_pk.reset(token)
+        progress = result[-1] if isinstance(result, tuple) else result
+        if isinstance(progress, Progress):
+            progress.pk = pk
+        return result
+
+    return cast(F, wrapper)
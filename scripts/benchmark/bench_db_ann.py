@@ -0,0 +1,122 @@
+import argparse
+import os
+import time
+from tempfile import TemporaryDirectory
+from typing import List, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from research_town.configs import DatabaseConfig
+from research_town.dbs.db_provider.local import LocalDatabaseClient
+
+
+def clustered_embeddings(
+    size: int, dim: int, clusters: int, rng: np.random.Generator
+) -> npt.NDArray[np.float32]:
+    # real abstracts cluster by topic, uniform noise would make every index look bad
+    centers = rng.normal(size=(clusters, dim))
+    labels = rng.integers(clusters, size=size)
+    embeddings: npt.NDArray[np.float32] = (
+        centers[labels] + 0.5 * rng.normal(size=(size, dim))
+    ).astype(np.float32)
+    return embeddings
+
+
+def timed_search(
+    client: LocalDatabaseClient,
+    queries: List[npt.NDArray[np.float32]],
+    num: int,
+) -> Tuple[List[List[str]], float]:
+    results = []
+    start_time = time.perf_counter()
+    for query in queries:
+        matches = client.search('Paper', [query], num=num)
+        results.append([data['pk'] for data in matches[0]])
+    return results, (time.perf_counter() - start_time) / len(queries)
+
+
+def recall(results: List[List[str]], exact_results: List[List[str]]) -> float:
+    hits = sum(
+        len(set(result) & set(exact)) for result, exact in zip(results, exact_results)
+    )
+    return hits / sum(len(exact) for exact in exact_results)
+
+
+def build_client(
+    config: DatabaseConfig, embeddings: npt.NDArray[np.float32]
+) -> LocalDatabaseClient:
+    client = LocalDatabaseClient(config)
+    client.register_namespace('Paper', with_embeddings=True)
+    records = [{'pk': f'paper{i}'} for i in range(len(embeddings))]
+    # fill the in-memory state directly, persisting is not measured here
+    client.data['Paper'] = {record['pk']: record for record in records}
+    for record, embedding in zip(records, embeddings):
+        client.data_embed['Paper'].put(record['pk'], embedding)
+    return client
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Recall and latency of ANN search against the exact path'
+    )
+    parser.add_argument('--size', type=int, default=200000)
+    parser.add_argument('--embed_dim', type=int, default=128)
+    parser.add_argument('--clusters', type=int, default=500)
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--num', type=int, default=10)
+    parser.add_argument('--nlist', type=int, default=512)
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--ef_search', type=int, nargs='+', default=[16, 64, 256])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    embeddings = clustered_embeddings(args.size, args.embed_dim, args.clusters, rng)
+    queries = list(
+        clustered_embeddings(args.queries, args.embed_dim, args.clusters, rng)
+    )
+
+    with TemporaryDirectory() as temp_dir:
+        os.environ['DATABASE_FOLDER_PATH'] = temp_dir
+        client = build_client(DatabaseConfig(provider='local'), embeddings)
+        exact_results, t_exact = timed_search(client, queries, args.num)
+    print(
+        f'{"index":>6} {"knob":>14} {"recall":>7} {"latency (ms)":>13} {"speedup":>8}'
+    )
+    print(f'{"exact":>6} {"-":>14} {1.0:>7.3f} {t_exact * 1000:>13.2f} {1.0:>7.1f}x')
+
+    settings: List[Tuple[str, str, int]] = [
+        ('ivf', 'nprobe', nprobe) for nprobe in args.nprobe
+    ]
+    try:
+        import hnswlib  # noqa: F401
+
+        settings += [('hnsw', 'ef_search', ef) for ef in args.ef_search]
+    except ImportError:
+        print('hnswlib is not installed, skipping the HNSW index')
+
+    for index, knob, value in settings:
+        with TemporaryDirectory() as temp_dir:
+            os.environ['DATABASE_FOLDER_PATH'] = temp_dir
+            config = DatabaseConfig(
+                provider='local',
+                ann_index=index,
+                ann_min_size=0,
+                ann_nlist=args.nlist,
+                ann_nprobe=value,
+                ann_ef_search=value,
+            )
+            client = build_client(config, embeddings)
+            start_time = time.perf_counter()
+            client.data_embed['Paper'].train_ann()
+            t_train = time.perf_counter() - start_time
+            results, t_ann = timed_search(client, queries, args.num)
+        print(
+            f'{index:>6} {f"{knob}={value}":>14} '
+            f'{recall(results, exact_results):>7.3f} {t_ann * 1000:>13.2f} '
+            f'{t_exact / t_ann:>7.1f}x  (build {t_train:.1f}s)'
+        )
+
+
+if __name__ == '__main__':
+    main()
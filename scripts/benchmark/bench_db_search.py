@@ -0,0 +1,100 @@
+import argparse
+import os
+import time
+from tempfile import TemporaryDirectory
+from typing import Any, Dict, List
+
+import numpy as np
+import numpy.typing as npt
+
+from research_town.configs import DatabaseConfig
+from research_town.dbs.db_provider.local import LocalDatabaseClient
+
+
+def legacy_search(
+    data: Dict[str, Dict[str, Any]],
+    data_embed: Dict[str, npt.NDArray[np.float32]],
+    query_embeddings: List[npt.NDArray[np.float32]],
+    num: int,
+    **conditions: Any,
+) -> List[List[Dict[str, Any]]]:
+    # search path of LocalDatabaseClient before the memmap store and top-k selection
+    candidates = [
+        record
+        for record in data.values()
+        if all(record[key] == value for key, value in conditions.items())
+    ]
+    pks = [record['pk'] for record in candidates]
+    candidate_embeddings = np.asarray([data_embed[pk] for pk in pks], dtype=np.float32)
+    candidate_embeddings = candidate_embeddings / np.linalg.norm(
+        candidate_embeddings, axis=1, keepdims=True
+    )
+    q_embeddings = np.asarray(query_embeddings, dtype=np.float32)
+    q_embeddings = q_embeddings / np.linalg.norm(q_embeddings, axis=1, keepdims=True)
+    similarities = q_embeddings @ candidate_embeddings.T
+    matches = []
+    for sorted_indices in np.argsort(similarities, axis=1):
+        sorted_indices = sorted_indices[::-1][:num]
+        matches.append([candidates[i] for i in sorted_indices])
+    return matches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='LocalDatabaseClient search latency')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--embed_dim', type=int, default=256)
+    parser.add_argument('--num', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(
+        f'{"records":>10} {"filter":>8} {"legacy (ms)":>12} {"current (ms)":>13} {"speedup":>8}'
+    )
+    for size in args.sizes:
+        with TemporaryDirectory() as temp_dir:
+            os.environ['DATABASE_FOLDER_PATH'] = temp_dir
+            client = LocalDatabaseClient(DatabaseConfig(provider='local', journal=True))
+            client.register_namespace('Profile', with_embeddings=True)
+
+            embeddings = np.random.rand(size, args.embed_dim).astype(np.float32)
+            records = [
+                {'pk': f'profile{i}', 'is_reviewer_candidate': i % 4 != 0}
+                for i in range(size)
+            ]
+            # fill the in-memory state directly, persisting is not measured here
+            client.data['Profile'] = {record['pk']: record for record in records}
+            for record, embedding in zip(records, embeddings):
+                client.data_embed['Profile'].put(record['pk'], embedding)
+            data_embed = {
+                record['pk']: embeddings[i] for i, record in enumerate(records)
+            }
+            query = [np.random.rand(args.embed_dim).astype(np.float32)]
+
+            for conditions in [{}, {'is_reviewer_candidate': True}]:
+                start_time = time.perf_counter()
+                for _ in range(args.repeat):
+                    legacy_search(
+                        client.data['Profile'],
+                        data_embed,
+                        query,
+                        args.num,
+                        **conditions,
+                    )
+                t_legacy = (time.perf_counter() - start_time) / args.repeat
+
+                # the first filtered call materializes the condition column
+                client.search('Profile', query, num=args.num, **conditions)
+                start_time = time.perf_counter()
+                for _ in range(args.repeat):
+                    client.search('Profile', query, num=args.num, **conditions)
+                t_current = (time.perf_counter() - start_time) / args.repeat
+
+                print(
+                    f'{size:>10} {"yes" if conditions else "no":>8} '
+                    f'{t_legacy * 1000:>12.2f} {t_current * 1000:>13.2f} '
+                    f'{t_legacy / t_current:>7.1f}x'
+                )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+import argparse
+import os
+import time
+from tempfile import TemporaryDirectory
+from typing import List
+
+import numpy as np
+
+from research_town.configs import DatabaseConfig
+from research_town.dbs.db_provider.local import LocalDatabaseClient
+
+
+def measure_write_latency(
+    journal: bool, sizes: List[int], probe_num: int, embed_dim: int
+) -> List[float]:
+    latencies = []
+    with TemporaryDirectory() as temp_dir:
+        os.environ['DATABASE_FOLDER_PATH'] = temp_dir
+        client = LocalDatabaseClient(DatabaseConfig(provider='local', journal=journal))
+        client.register_namespace('Paper', with_embeddings=True)
+
+        # bulk-load up to each size without timing, then time single-record writes
+        for size in sizes:
+            num = size - client.count('Paper')
+            client.add(
+                'Paper',
+                [
+                    {'pk': f'fill-{size}-{i}', 'title': 'title', 'abstract': 'abstract'}
+                    for i in range(num)
+                ],
+                list(np.random.rand(num, embed_dim).astype(np.float32)),
+            )
+            start_time = time.perf_counter()
+            for i in range(probe_num):
+                client.add(
+                    'Paper',
+                    [{'pk': f'probe-{size}-{i}', 'title': 'title'}],
+                    [np.random.rand(embed_dim).astype(np.float32)],
+                )
+            latencies.append((time.perf_counter() - start_time) / probe_num)
+            for i in range(probe_num):
+                client.delete('Paper', f'probe-{size}-{i}')
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='LocalDatabaseClient write latency')
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=[1000, 5000, 10000, 20000]
+    )
+    parser.add_argument('--probe_num', type=int, default=50)
+    parser.add_argument('--embed_dim', type=int, default=768)
+    args = parser.parse_args()
+
+    snapshot = measure_write_latency(False, args.sizes, args.probe_num, args.embed_dim)
+    journal = measure_write_latency(True, args.sizes, args.probe_num, args.embed_dim)
+
+    print(f'{"records":>10} {"snapshot (ms)":>15} {"journal (ms)":>15}')
+    for size, t_snapshot, t_journal in zip(args.sizes, snapshot, journal):
+        print(f'{size:>10} {t_snapshot * 1000:>15.3f} {t_journal * 1000:>15.3f}')
+
+
+if __name__ == '__main__':
+    main()
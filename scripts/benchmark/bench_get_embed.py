@@ -0,0 +1,82 @@
+import argparse
+import random
+import time
+from typing import List
+
+import torch
+from transformers import BertModel, BertTokenizer
+
+from research_town.utils.retriever import get_embed
+
+
+def legacy_get_embed(
+    instructions: List[str],
+    retriever_tokenizer: BertTokenizer,
+    retriever_model: BertModel,
+) -> List[torch.Tensor]:
+    # get_embed before batching: one unpadded forward pass per text
+    encoded_input_all = [
+        retriever_tokenizer(text, return_tensors='pt', truncation=True, max_length=512)
+        for text in instructions
+    ]
+    with torch.no_grad():
+        emb_list = []
+        for inter in encoded_input_all:
+            emb = retriever_model(**inter)
+            emb_list.append(emb['last_hidden_state'].mean(1))
+    return emb_list
+
+
+def synthetic_abstracts(num: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    words = (
+        'graph neural network language model retrieval agent reasoning benchmark '
+        'transformer attention embedding contrastive learning dataset evaluation'
+    ).split()
+    return [
+        ' '.join(rng.choice(words) for _ in range(rng.randint(20, 250)))
+        for _ in range(num)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='get_embed throughput on CPU')
+    parser.add_argument('--model', type=str, default='facebook/contriever')
+    parser.add_argument('--num', type=int, default=256)
+    parser.add_argument('--batch_sizes', type=int, nargs='+', default=[8, 32, 64])
+    args = parser.parse_args()
+
+    torch.set_grad_enabled(False)
+    tokenizer = BertTokenizer.from_pretrained(args.model)
+    model = BertModel.from_pretrained(args.model).eval()
+    texts = synthetic_abstracts(args.num)
+
+    start_time = time.perf_counter()
+    reference = legacy_get_embed(texts, tokenizer, model)
+    t_legacy = time.perf_counter() - start_time
+    print(f'{"mode":>22} {"emb/s":>9} {"speedup":>8} {"max abs diff":>13}')
+    print(f'{"per-item":>22} {args.num / t_legacy:>9.1f} {1.0:>7.1f}x {0.0:>13.2e}')
+
+    for batch_size in args.batch_sizes:
+        for sort_by_length in [False, True]:
+            start_time = time.perf_counter()
+            result = get_embed(
+                texts,
+                tokenizer,
+                model,
+                batch_size=batch_size,
+                sort_by_length=sort_by_length,
+            )
+            elapsed = time.perf_counter() - start_time
+            diff = max(
+                (t1 - t2).abs().max().item() for t1, t2 in zip(result, reference)
+            )
+            mode = f'batch={batch_size}' + (' sorted' if sort_by_length else '')
+            print(
+                f'{mode:>22} {args.num / elapsed:>9.1f} '
+                f'{t_legacy / elapsed:>7.1f}x {diff:>13.2e}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+import argparse
+import random
+import time
+from typing import Callable, List
+from unittest.mock import MagicMock, patch
+
+from research_town.utils.keyword_extractor import (
+    KeywordExtractor,
+    get_keyword_extractor,
+)
+from research_town.utils.paper_collector import get_related_papers
+from research_town.utils.retriever import preload_retriever
+
+
+def synthetic_queries(num: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    words = (
+        'graph neural network language model retrieval agent reasoning benchmark '
+        'transformer attention embedding contrastive learning dataset evaluation'
+    ).split()
+    return [
+        ' '.join(rng.choice(words) for _ in range(rng.randint(30, 120)))
+        for _ in range(num)
+    ]
+
+
+def time_calls(
+    queries: List[str], get_extractor: Callable[[], KeywordExtractor]
+) -> float:
+    # arXiv returns nothing, so only the query building is measured
+    with (
+        patch('arxiv.Client') as mock_client,
+        patch(
+            'research_town.utils.paper_collector.get_keyword_extractor', get_extractor
+        ),
+    ):
+        mock_client.return_value = MagicMock(results=MagicMock(return_value=[]))
+        start_time = time.perf_counter()
+        for query in queries:
+            get_related_papers(num_results=5, query=query)
+        return (time.perf_counter() - start_time) / len(queries)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='get_related_papers latency with and without the shared extractor'
+    )
+    parser.add_argument(
+        '--legacy_model',
+        type=str,
+        default='all-MiniLM-L6-v2',
+        help='model KeyBERT() loaded on every call before the shared extractor',
+    )
+    parser.add_argument('--num', type=int, default=8)
+    parser.add_argument(
+        '--researchers', type=int, default=4, help='identical queries per step'
+    )
+    args = parser.parse_args()
+
+    preload_retriever()
+    queries = synthetic_queries(args.num)
+    # as in ProposalWritingwithRAGEnv, every researcher searches with the same query
+    env_queries = [query for query in queries for _ in range(args.researchers)]
+
+    print(f'{"mode":>28} {"s/call":>8} {"speedup":>8}')
+    t_legacy = time_calls(env_queries, lambda: KeywordExtractor(args.legacy_model))
+    print(f'{"KeyBERT per call":>28} {t_legacy:>8.3f} {1.0:>7.1f}x')
+
+    extractor = get_keyword_extractor()
+    t_shared = time_calls(env_queries, lambda: extractor)
+    print(f'{"shared, memoized":>28} {t_shared:>8.3f} {t_legacy / t_shared:>7.1f}x')
+
+    extractor.memory.clear()
+    start_time = time.perf_counter()
+    extractor.extract_keywords_batch(queries)
+    t_batch = (time.perf_counter() - start_time) / len(env_queries)
+    print(f'{"shared, one batch":>28} {t_batch:>8.3f} {t_legacy / t_batch:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
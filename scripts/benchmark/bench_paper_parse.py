@@ -0,0 +1,126 @@
+import argparse
+import os
+import random
+import time
+from typing import Any, Dict, List
+from unittest.mock import MagicMock, patch
+
+from research_town.utils.paper_collector import (
+    fetch_and_parse_paper,
+    get_paper_bibliography_from_html,
+    get_paper_content_from_html,
+    get_paper_figure_captions_from_html,
+    get_paper_table_captions_from_html,
+)
+
+URL = 'https://arxiv.org/abs/2403.05534v1'
+
+
+def synthetic_arxiv_html(
+    num_sections: int = 12, num_refs: int = 80, seed: int = 0
+) -> str:
+    # LaTeXML-like page with the classes the extractors read, roughly arXiv sized
+    rng = random.Random(seed)
+    words = (
+        'graph neural network language model retrieval agent reasoning benchmark '
+        'transformer attention embedding contrastive learning dataset evaluation'
+    ).split()
+
+    def paragraph() -> str:
+        return ' '.join(rng.choice(words) for _ in range(rng.randint(80, 200)))
+
+    parts = ['<html><body><article class="ltx_document">']
+    for i in range(num_sections):
+        parts.append(
+            f'<section class="ltx_section"><h2 class="ltx_title ltx_title_section">'
+            f'{i + 1} Section</h2>'
+        )
+        parts.extend(f'<p class="ltx_p">{paragraph()}</p>' for _ in range(10))
+        parts.append(
+            f'<figure class="ltx_figure"><span class="ltx_tag">Figure {i + 1}</span>'
+            f'<figcaption class="ltx_caption">{paragraph()}</figcaption></figure>'
+            f'<figure class="ltx_table"><span class="ltx_tag">Table {i + 1}</span>'
+            f'<figcaption class="ltx_caption">{paragraph()}</figcaption></figure>'
+            '</section>'
+        )
+    parts.append('<section class="ltx_bibliography"><ul>')
+    parts.extend(
+        f'<li class="ltx_bibitem"><span class="ltx_tag">[{i + 1}]</span>'
+        f'{paragraph()}</li>'
+        for i in range(num_refs)
+    )
+    parts.append('</ul></section></article></body></html>')
+    return ''.join(parts)
+
+
+def legacy_parse(url: str, extractors: List[str]) -> Dict[str, Any]:
+    # one fetch_html_content call per helper, as before fetch_and_parse_paper
+    helpers = {
+        'sections': get_paper_content_from_html,
+        'bibliography': get_paper_bibliography_from_html,
+        'figure_captions': get_paper_figure_captions_from_html,
+        'table_captions': get_paper_table_captions_from_html,
+    }
+    return {name: helpers[name](url) for name in extractors}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='per-paper cost of separate vs single-fetch HTML parsing'
+    )
+    parser.add_argument(
+        '--html', type=str, default=None, help='saved arXiv HTML page to parse'
+    )
+    parser.add_argument('--num', type=int, default=10)
+    parser.add_argument(
+        '--latency', type=float, default=0.0, help='simulated download seconds'
+    )
+    args = parser.parse_args()
+
+    if args.html:
+        with open(args.html, encoding='utf-8') as f:
+            html = f.read()
+    else:
+        html = synthetic_arxiv_html()
+    print(f'fixture size: {len(html) / 1e6:.2f} MB')
+
+    # downloads are simulated, so the arXiv politeness delay would only add sleep
+    os.environ['HTTP_POLITENESS_DELAYS'] = '{"arxiv.org": 0}'
+    fetches = [0]
+
+    def fake_get(url: str, **kwargs: Any) -> MagicMock:
+        fetches[0] += 1
+        time.sleep(args.latency)
+        return MagicMock(status_code=200, text=html)
+
+    selections = [
+        ['sections', 'bibliography'],
+        ['sections', 'bibliography', 'figure_captions', 'table_captions'],
+    ]
+    print(
+        f'{"extractors":>12} {"mode":>8} {"fetches":>8} {"s/paper":>8} {"speedup":>8}'
+    )
+    with patch('requests.Session.get', side_effect=fake_get):
+        for extractors in selections:
+            timings = {}
+            for mode, parse in [('legacy', legacy_parse), ('single', None)]:
+                fetches[0] = 0
+                start_time = time.perf_counter()
+                for _ in range(args.num):
+                    if parse is None:
+                        result = fetch_and_parse_paper(URL, extractors)
+                    else:
+                        result = parse(URL, extractors)
+                timings[mode] = (time.perf_counter() - start_time) / args.num
+                if mode == 'legacy':
+                    reference = result
+                else:
+                    assert result == reference, 'extracted content differs'
+                print(
+                    f'{len(extractors):>12} {mode:>8} {fetches[0] // args.num:>8} '
+                    f'{timings[mode]:>8.3f} {timings["legacy"] / timings[mode]:>7.1f}x'
+                )
+
+
+if __name__ == '__main__':
+    main()
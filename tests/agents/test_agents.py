@@ -1,5 +1,8 @@
+import threading
 from unittest.mock import MagicMock, patch
 
+from beartype.typing import Any, Dict, List
+
 from research_town.agents.agent import Agent
 from research_town.data import Idea, Insight, MetaReview, Proposal, Rebuttal, Review
 from tests.constants.config_constants import example_config
@@ -95,6 +98,43 @@ def test_write_review(mock_model_prompting: MagicMock) -> None:
     assert review.score == 8
 
 
+@patch('research_town.utils.agent_prompter.model_prompting')
+def test_write_review_concurrent_prompts(mock_model_prompting: MagicMock) -> None:
+    templates = example_config.agent_prompt_template
+    independent_prompts = [
+        templates.write_review_strength['sys_prompt'],
+        templates.write_review_weakness['sys_prompt'],
+        templates.write_review_ethical['sys_prompt'],
+    ]
+    # the barrier only opens if all three independent prompts are in flight at once
+    barrier = threading.Barrier(len(independent_prompts), timeout=5)
+
+    def concurrent_prompting(
+        llm_model: str, prompt: List[Dict[str, str]], *args: Any
+    ) -> List[str]:
+        if prompt[0]['content'] in independent_prompts:
+            barrier.wait()
+        return mock_prompting(llm_model, prompt, *args)
+
+    mock_model_prompting.side_effect = concurrent_prompting
+    agent = Agent(
+        profile=profile_A,
+        model_name='gpt-4o-mini',
+        role='reviewer',
+    )
+    review = agent.write_review(
+        proposal=research_proposal_A,
+        config=example_config,
+    )
+    assert review.strength == 'Strength of the paper1'
+    assert review.weakness == 'Weakness of the paper1'
+    assert review.score == 8
+    assert review.strength_prompt_messages is not None
+    assert review.strength_prompt_messages[0]['content'] == independent_prompts[0]
+    assert review.weakness_prompt_messages is not None
+    assert review.weakness_prompt_messages[0]['content'] == independent_prompts[1]
+
+
 @patch('research_town.utils.agent_prompter.model_prompting')
 def test_write_metareview(mock_model_prompting: MagicMock) -> None:
     mock_model_prompting.side_effect = mock_prompting
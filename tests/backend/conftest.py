@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the backend is not installed, its modules import as app.* from backend/
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import os
+import time
+from tempfile import TemporaryDirectory
+
+from app.job_registry import JobRecord, JobRegistry
+from app.worker_pool import WorkerPool
+from beartype.typing import Any, Dict, Iterator, List
+
+
+def fake_run_job(url: str, job_id: str) -> Iterator[Any]:
+    if url == 'crash':
+        time.sleep(0.1)
+        os._exit(1)
+    if url == 'error':
+        raise ValueError('engine failed')
+    for i in range(100 if url == 'long' else 3):
+        time.sleep(0.05)
+        yield i
+
+
+def format_result(result: Any) -> Dict[str, Any]:
+    return {'type': 'idea', 'content': str(result)}
+
+
+async def read(registry: JobRegistry, record: JobRecord, offset: int = 0) -> List[Any]:
+    async def collect() -> List[Any]:
+        return [json.loads(line) async for line in registry.stream(record, offset)]
+
+    return await asyncio.wait_for(collect(), timeout=30)
+
+
+async def wait_idle(registry: JobRegistry) -> None:
+    await asyncio.wait_for(asyncio.gather(*registry.tasks), timeout=30)
+
+
+def test_job_registry_dedupes_and_resumes_after_restart() -> None:
+    with TemporaryDirectory() as folder:
+
+        async def run() -> str:
+            pool = WorkerPool(fake_run_job, num_workers=1)
+            pool.start()
+            try:
+                registry = JobRegistry(pool, format_result, folder)
+                record = registry.submit('paper')
+                # a second request for a running paper joins the run
+                assert registry.submit(' paper ') is record
+                items = await read(registry, record)
+                assert [item['offset'] for item in items] == [0, 1, 2]
+                await wait_idle(registry)
+                assert record.status == 'finished'
+                # a finished run is reused unless a fresh one is asked for
+                assert registry.submit('paper') is record
+                fresh = registry.submit('paper', fresh=True)
+                assert fresh is not record
+                await wait_idle(registry)
+                return str(record.id)
+            finally:
+                pool.shutdown()
+
+        job_id = asyncio.run(run())
+
+        async def restart() -> List[Any]:
+            registry = JobRegistry(WorkerPool(fake_run_job), format_result, folder)
+            record = registry.get(job_id)
+            assert record is not None and record.status == 'finished'
+            return await read(registry, record, offset=1)
+
+        items = asyncio.run(restart())
+        assert [item['offset'] for item in items] == [1, 2]
+        assert [item['content'] for item in items] == ['1', '2']
+
+
+def test_job_registry_load_fails_interrupted_runs() -> None:
+    with TemporaryDirectory() as folder:
+        index = {
+            'job': {
+                'url': 'paper',
+                'config_hash': '',
+                'status': 'running',
+                'created_at': time.time(),
+                'finished_at': None,
+            }
+        }
+        with open(os.path.join(folder, 'jobs.json'), 'w') as f:
+            json.dump(index, f)
+        with open(os.path.join(folder, 'job.jsonl'), 'w') as f:
+            f.write(json.dumps({'type': 'idea', 'content': '0', 'offset': 0}) + '\n')
+
+        async def run() -> None:
+            pool = WorkerPool(fake_run_job, num_workers=1)
+            pool.start()
+            try:
+                registry = JobRegistry(pool, format_result, folder)
+                record = registry.get('job')
+                assert record is not None and record.status == 'failed'
+                # replaying the interrupted run ends instead of waiting for it
+                assert [item['offset'] for item in await read(registry, record)] == [0]
+                # and it is neither joined nor served from the cache
+                new_record = registry.submit('paper')
+                assert new_record is not record
+                await wait_idle(registry)
+                assert new_record.status == 'finished'
+            finally:
+                pool.shutdown()
+
+        asyncio.run(run())
+
+
+def test_job_registry_cancel_error_and_crash() -> None:
+    with TemporaryDirectory() as folder:
+
+        async def run() -> None:
+            pool = WorkerPool(fake_run_job, num_workers=2)
+            pool.start()
+            try:
+                registry = JobRegistry(pool, format_result, folder)
+                cancelled = registry.submit('long')
+                failed = registry.submit('error')
+                while not cancelled.items:
+                    await asyncio.sleep(0.05)
+                registry.cancel(cancelled.id)
+                await wait_idle(registry)
+                assert cancelled.status == 'cancelled'
+                assert len(cancelled.items) < 100
+                assert failed.status == 'failed'
+                assert failed.items[-1]['content'] == 'engine failed'
+
+                crashed = registry.submit('crash')
+                await wait_idle(registry)
+                assert crashed.status == 'failed'
+                assert crashed.items[-1]['content'] == 'Engine worker crashed.'
+
+                # none of them is reused, each request starts a new run
+                for record in [cancelled, failed, crashed]:
+                    assert registry.submit(record.url) is not record
+                await wait_idle(registry)
+            finally:
+                pool.shutdown()
+
+        asyncio.run(run())
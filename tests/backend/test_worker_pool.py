@@ -0,0 +1,97 @@
+import asyncio
+import os
+import time
+
+from app.worker_pool import Job, WorkerPool
+from beartype.typing import Any, Iterator, List
+
+from research_town.utils.token_stream import emit_delta
+
+
+def fake_run_job(url: str, job_id: str) -> Iterator[Any]:
+    if url == 'crash':
+        os._exit(1)
+    if url == 'error':
+        raise ValueError('engine failed')
+    for i in range(100 if url == 'long' else 3):
+        emit_delta(f'{url}-delta{i}')
+        time.sleep(0.05)
+        yield (url, i)
+
+
+async def drain(job: Job) -> List[Any]:
+    items: List[Any] = []
+    while True:
+        item = await asyncio.wait_for(job.results.get(), timeout=30)
+        if item is None:
+            return items
+        items.append(item)
+
+
+def progress_items(items: List[Any]) -> List[Any]:
+    return [item for item in items if isinstance(item, tuple)]
+
+
+def test_worker_pool_dispatch() -> None:
+    async def run() -> List[List[Any]]:
+        pool = WorkerPool(fake_run_job, num_workers=1)
+        pool.start()
+        try:
+            jobs = [pool.submit('a'), pool.submit('b')]
+            # one worker, so the second job waits for the first one
+            assert list(pool.pending) == [jobs[1]]
+            return list(await asyncio.gather(*(drain(job) for job in jobs)))
+        finally:
+            pool.shutdown()
+
+    items_a, items_b = asyncio.run(run())
+    assert progress_items(items_a) == [('a', 0), ('a', 1), ('a', 2)]
+    assert progress_items(items_b) == [('b', 0), ('b', 1), ('b', 2)]
+    deltas = [item for item in items_a if isinstance(item, dict)]
+    assert [delta['content'] for delta in deltas] == [f'a-delta{i}' for i in range(3)]
+    assert all(delta['type'] == 'delta' for delta in deltas)
+
+
+def test_worker_pool_cancel() -> None:
+    async def run() -> List[List[Any]]:
+        pool = WorkerPool(fake_run_job, num_workers=1)
+        pool.start()
+        try:
+            running, pending, after = (
+                pool.submit('long'),
+                pool.submit('b'),
+                pool.submit('c'),
+            )
+            pool.cancel(pending.id)
+            assert await drain(pending) == []
+
+            items: List[Any] = []
+            while len(progress_items(items)) < 2:
+                items.append(await asyncio.wait_for(running.results.get(), 30))
+            pool.cancel(running.id)
+            items += await drain(running)
+            # the same worker goes on with the next job
+            return [items, await drain(after)]
+        finally:
+            pool.shutdown()
+
+    cancelled_items, after_items = asyncio.run(run())
+    assert len(progress_items(cancelled_items)) < 100
+    assert progress_items(after_items) == [('c', 0), ('c', 1), ('c', 2)]
+
+
+def test_worker_pool_job_errors_and_worker_crash() -> None:
+    async def run() -> List[List[Any]]:
+        pool = WorkerPool(fake_run_job, num_workers=1)
+        pool.start()
+        try:
+            jobs = [pool.submit('error'), pool.submit('crash'), pool.submit('a')]
+            return [await drain(job) for job in jobs]
+        finally:
+            pool.shutdown()
+
+    error_items, crash_items, items = asyncio.run(run())
+    assert error_items == [{'type': 'error', 'content': 'engine failed'}]
+    assert crash_items == [{'type': 'error', 'content': 'Engine worker crashed.'}]
+    # the crashed worker was replaced and the queued job still ran
+    assert progress_items(items) == [('a', 0), ('a', 1), ('a', 2)]
@@ -1,7 +1,10 @@
+import os
 from unittest.mock import MagicMock, patch
 
+import numpy as np
 from beartype.typing import Any, Dict, List
 
+from research_town.configs import DatabaseConfig
 from research_town.data import (
     Idea,
     MetaReviewWritingLog,
@@ -11,6 +14,8 @@ from research_town.data import (
     ReviewWritingLog,
 )
 from research_town.dbs import LogDB, PaperDB, ProfileDB, ProgressDB
+from research_town.dbs.db_provider.local import LocalDatabaseClient
+from research_town.dbs.db_provider.local.ann_index import IVFIndex
 from tests.constants.config_constants import example_config
 from tests.mocks.mocking_func import mock_prompting
 
@@ -270,6 +275,247 @@ def test_paper_match() -> None:
     assert len(match_papers) == 2
 
 
+def test_local_client_journal() -> None:
+    config = DatabaseConfig(provider='local', journal=True, journal_compact_threshold=5)
+    client = LocalDatabaseClient(config)
+    client.register_namespace('Paper', with_embeddings=True)
+
+    for i in range(3):
+        client.add(
+            'Paper',
+            [{'pk': f'paper{i}', 'title': f'title{i}'}],
+            [np.full(3, i + 1, dtype=np.float32)],
+        )
+    assert client.update('Paper', 'paper0', {'title': 'updated title0'})
+    assert client.delete('Paper', 'paper1')
+    assert client.journal_size['Paper'] == 0  # compacted after the fifth entry
+
+    client.add(
+        'Paper',
+        [{'pk': 'paper3', 'title': 'title3'}],
+        [np.array([0, 4, 0], dtype=np.float32)],
+    )
+    assert client.update(
+        'Paper', 'paper2', {'embedding': np.array([5, 0, 0], dtype=np.float32)}
+    )
+    assert client.journal_size['Paper'] == 2
+
+    reloaded_client = LocalDatabaseClient(config)
+    assert reloaded_client.count('Paper') == 3
+    assert reloaded_client.get('Paper', pk='paper0')[0]['title'] == 'updated title0'
+    assert reloaded_client.count('Paper', pk='paper1') == 0
+    assert reloaded_client.count('Paper', pk='paper3') == 1
+    assert np.allclose(reloaded_client.data_embed['Paper'].get('paper2'), [1, 0, 0])
+    assert np.allclose(reloaded_client.data_embed['Paper'].get('paper3'), [0, 1, 0])
+
+
+def test_local_client_journal_torn_write() -> None:
+    config = DatabaseConfig(provider='local', journal=True)
+    client = LocalDatabaseClient(config)
+    client.register_namespace('Paper', with_embeddings=False)
+    client.add('Paper', [{'pk': 'paper0', 'title': 'title0'}], [])
+
+    # simulate a crash in the middle of writing the next entry
+    with open(os.path.join(client.folder_path, 'Paper.log'), 'a') as f:
+        f.write('{"op": "add", "data": {"pk": "pap')
+
+    client = LocalDatabaseClient(config)
+    assert client.count('Paper') == 1
+    for i in range(1, 3):
+        client.add('Paper', [{'pk': f'paper{i}', 'title': f'title{i}'}], [])
+
+    reloaded_client = LocalDatabaseClient(config)
+    assert reloaded_client.count('Paper') == 3
+
+
+def test_local_client_embedding_store() -> None:
+    client = LocalDatabaseClient()
+    client.register_namespace('Paper', with_embeddings=True)
+    store = client.data_embed['Paper']
+    store.initial_capacity = 2
+
+    vectors = np.eye(3, dtype=np.float32) * 2
+    client.add(
+        'Paper',
+        [{'pk': f'paper{i}', 'title': f'title{i}'} for i in range(3)],
+        list(vectors),
+    )
+    assert store.capacity == 4
+    assert np.allclose(np.linalg.norm(store.view(), axis=1), 1)
+
+    assert client.delete('Paper', 'paper1')
+    assert store.free_rows == [1]
+    client.add(
+        'Paper', [{'pk': 'paper3', 'title': 'title3'}], [np.ones(3, dtype=np.float32)]
+    )
+    assert store.rows['paper3'] == 1
+    assert store.size == 3
+
+    matches = client.search('Paper', [np.array([0, 0, 1], dtype=np.float32)], num=2)
+    assert [match['pk'] for match in matches[0]] == ['paper2', 'paper3']
+    matches = client.search(
+        'Paper', [np.array([0, 0, 1], dtype=np.float32)], num=2, title='title0'
+    )
+    assert [match['pk'] for match in matches[0]] == ['paper0']
+
+    reloaded_client = LocalDatabaseClient()
+    reloaded_store = reloaded_client.data_embed['Paper']
+    assert reloaded_store.rows == store.rows
+    assert isinstance(reloaded_store.matrix, np.memmap)
+    assert np.allclose(reloaded_store.view(), store.view())
+
+
+def test_local_client_read_only() -> None:
+    client = LocalDatabaseClient()
+    client.register_namespace('Paper', with_embeddings=True)
+    client.data_embed['Paper'].initial_capacity = 2
+    client.add(
+        'Paper',
+        [{'pk': f'paper{i}', 'title': f'title{i}'} for i in range(2)],
+        list(np.eye(2, dtype=np.float32)),
+    )
+
+    reader = LocalDatabaseClient(DatabaseConfig(provider='local', read_only=True))
+    reader.add(
+        'Paper',
+        [{'pk': 'paper2', 'title': 'title2'}],
+        [np.ones(2, dtype=np.float32)],
+    )
+    assert reader.update(
+        'Paper', 'paper0', {'embedding': np.array([0, 1], dtype=np.float32)}
+    )
+    assert reader.delete('Paper', 'paper1')
+    assert reader.count('Paper') == 2
+    assert reader.data_embed['Paper'].capacity == 4
+
+    # nothing the reader changed reached the folder
+    reloaded_client = LocalDatabaseClient()
+    reloaded_store = reloaded_client.data_embed['Paper']
+    assert reloaded_client.count('Paper') == 2
+    assert reloaded_store.capacity == 2
+    assert np.allclose(reloaded_store.view(), np.eye(2))
+
+
+def test_local_client_search_with_scores() -> None:
+    client = LocalDatabaseClient()
+    client.register_namespace('Profile', with_embeddings=True)
+    vectors = np.array([[1, 0], [1, 1], [0, 1], [1, 0.1]], dtype=np.float32)
+    client.add(
+        'Profile',
+        [
+            {'pk': f'profile{i}', 'is_reviewer_candidate': i != 3}
+            for i in range(len(vectors))
+        ],
+        list(vectors),
+    )
+
+    query = [np.array([1, 0], dtype=np.float32)]
+    matches = client.search_with_scores('Profile', query, num=3)
+    assert [data['pk'] for data, _ in matches[0]] == [
+        'profile0',
+        'profile3',
+        'profile1',
+    ]
+    assert np.isclose(matches[0][0][1], 1.0)
+    assert np.isclose(matches[0][2][1], np.sqrt(0.5))
+
+    matches = client.search_with_scores(
+        'Profile', query, num=3, is_reviewer_candidate=True
+    )
+    assert [data['pk'] for data, _ in matches[0]] == [
+        'profile0',
+        'profile1',
+        'profile2',
+    ]
+
+    client.update('Profile', 'profile0', {'is_reviewer_candidate': False})
+    results = client.search('Profile', query, num=5, is_reviewer_candidate=True)
+    assert [data['pk'] for data in results[0]] == ['profile1', 'profile2']
+
+
+def test_local_client_ivf_index() -> None:
+    config = DatabaseConfig(
+        provider='local', ann_index='ivf', ann_min_size=8, ann_nlist=4, ann_nprobe=4
+    )
+    client = LocalDatabaseClient(config)
+    client.register_namespace('Paper', with_embeddings=True)
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(40, 8)).astype(np.float32)
+    client.add(
+        'Paper',
+        [{'pk': f'paper{i}', 'domain': f'domain{i % 2}'} for i in range(40)],
+        list(vectors),
+    )
+    queries = list(rng.normal(size=(3, 8)).astype(np.float32))
+
+    # probing every list is an exhaustive search and must match the exact path
+    matches = client.search_with_scores('Paper', queries, num=5, domain='domain0')
+    ann = client.data_embed['Paper'].ann
+    assert isinstance(ann, IVFIndex) and ann.is_trained
+    client.ann_min_size = 100
+    exact_matches = client.search_with_scores('Paper', queries, num=5, domain='domain0')
+    client.ann_min_size = 8
+    for match, exact_match in zip(matches, exact_matches):
+        assert [data['pk'] for data, _ in match] == [
+            data['pk'] for data, _ in exact_match
+        ]
+        assert np.allclose(
+            [score for _, score in match], [score for _, score in exact_match]
+        )
+
+    # inserts after training go to the nearest list, deletes leave the index
+    client.add('Paper', [{'pk': 'paper40', 'domain': 'domain0'}], [queries[0]])
+    assert client.search('Paper', [queries[0]], num=1)[0][0]['pk'] == 'paper40'
+    client.delete('Paper', 'paper40')
+    assert client.search('Paper', [queries[0]], num=1)[0][0]['pk'] != 'paper40'
+    client.save(with_embed=True)
+
+    reloaded_client = LocalDatabaseClient(config)
+    reloaded_ann = reloaded_client.data_embed['Paper'].ann
+    assert isinstance(reloaded_ann, IVFIndex) and reloaded_ann.is_trained
+    assert np.array_equal(reloaded_ann.assignment, ann.assignment)
+    assert (
+        reloaded_client.search_with_scores('Paper', queries, num=5, domain='domain0')
+        == matches
+    )
+
+
+def test_local_client_field_index() -> None:
+    client = LocalDatabaseClient()
+    client.register_namespace('Review', with_embeddings=False)
+    client.add(
+        'Review',
+        [
+            {'pk': f'review{i}', 'proposal_pk': f'proposal{i % 2}', 'score': i}
+            for i in range(5)
+        ],
+        [],
+    )
+    # indexes declared on an already populated namespace are built from its data
+    client.register_namespace('Review', False, indexed_fields=['proposal_pk'])
+    index = client.indexes['Review']
+    assert set(index.buckets['proposal_pk']) == {'proposal0', 'proposal1'}
+
+    results = client.get('Review', proposal_pk='proposal0')
+    assert [data['pk'] for data in results] == ['review0', 'review2', 'review4']
+    assert client.count('Review', proposal_pk='proposal1', score=3) == 1
+    assert client.get('Review', pk='review3')[0]['score'] == 3
+    assert client.get('Review', pk='review3', score=4) == []
+
+    client.update('Review', 'review0', {'proposal_pk': 'proposal1'})
+    client.delete('Review', 'review4')
+    client.add('Review', [{'pk': 'review5', 'proposal_pk': 'proposal1'}], [])
+    results = client.get('Review', proposal_pk='proposal1')
+    assert [data['pk'] for data in results] == [
+        'review0',
+        'review1',
+        'review3',
+        'review5',
+    ]
+    assert client.count('Review', proposal_pk='proposal0') == 1
+    assert client.count('Review', proposal_pk='proposal2') == 0
+
+
 @patch('research_town.utils.profile_collector.model_prompting')
 def test_pull_profiles(mock_model_prompting: MagicMock) -> None:
     mock_model_prompting.side_effect = mock_prompting
@@ -1,11 +1,18 @@
+import threading
+import time
 from unittest.mock import MagicMock, patch
 
+from beartype.typing import Any, List, Tuple
+
 from research_town.agents import AgentManager
+from research_town.data import Paper
 from research_town.dbs import LogDB, PaperDB, ProfileDB, ProgressDB
 from research_town.envs import ProposalWritingwithRAGEnv, ReviewWritingEnv
 from tests.constants.config_constants import example_config
 from tests.constants.data_constants import (
     profile_A,
+    profile_B,
+    profile_C,
     research_proposal_A,
     research_proposal_B,
 )
@@ -47,6 +54,88 @@ def test_review_writing_env(
     assert exit_dict['metareviews'] is not None
 
 
+@patch('research_town.utils.agent_prompter.model_prompting')
+def test_review_writing_env_concurrent(
+    mock_model_prompting: MagicMock,
+    example_log_db: LogDB,
+    example_progress_db: ProgressDB,
+    example_paper_db: PaperDB,
+    example_agent_manager: AgentManager,
+) -> None:
+    mock_model_prompting.side_effect = mock_prompting
+
+    def run_env(max_concurrency: int) -> List[Tuple[str, str]]:
+        config = example_config.model_copy(deep=True)
+        config.param.max_concurrency = max_concurrency
+        env = ReviewWritingEnv(
+            name='review_writing',
+            log_db=example_log_db,
+            progress_db=example_progress_db,
+            paper_db=example_paper_db,
+            config=config,
+            agent_manager=example_agent_manager,
+        )
+        env.on_enter(
+            proposals=[research_proposal_A, research_proposal_B],
+            leader=example_agent_manager.create_agent(profile_A, role='leader'),
+            chair=example_agent_manager.create_agent(profile_C, role='chair'),
+            reviewers=[
+                example_agent_manager.create_agent(profile, role='reviewer')
+                for profile in [profile_A, profile_B, profile_C]
+            ],
+        )
+        steps = [
+            (progress.__class__.__name__, agent.profile.pk)
+            for progress, agent in env.run()
+        ]
+        assert len(env.metareviews) == 2
+        # both paths leave the reviews and rebuttals of the last proposal
+        assert [review.reviewer_pk for review in env.reviews] == [
+            rebuttal.reviewer_pk for rebuttal in env.rebuttals
+        ]
+        assert {progress.proposal_pk for progress in env.reviews + env.rebuttals} == {
+            research_proposal_B.pk
+        }
+        return steps
+
+    sequential_steps = run_env(max_concurrency=1)
+    assert len(sequential_steps) == 2 * (3 + 3 + 1)
+    assert run_env(max_concurrency=4) == sequential_steps
+
+    # closing the run early stops the pipelines before close() returns
+    def slow_prompting(*args: Any, **kwargs: Any) -> List[str]:
+        time.sleep(0.05)
+        return mock_prompting(*args, **kwargs)
+
+    mock_model_prompting.reset_mock()
+    mock_model_prompting.side_effect = slow_prompting
+    config = example_config.model_copy(deep=True)
+    config.param.max_concurrency = 2
+    env = ReviewWritingEnv(
+        name='review_writing',
+        log_db=example_log_db,
+        progress_db=example_progress_db,
+        paper_db=example_paper_db,
+        config=config,
+        agent_manager=example_agent_manager,
+    )
+    env.on_enter(
+        proposals=[research_proposal_A, research_proposal_B],
+        leader=example_agent_manager.create_agent(profile_A, role='leader'),
+        chair=example_agent_manager.create_agent(profile_C, role='chair'),
+        reviewers=[
+            example_agent_manager.create_agent(profile, role='reviewer')
+            for profile in [profile_A, profile_B, profile_C]
+        ],
+    )
+    run = env.run()
+    next(run)
+    run.close()
+    call_count = mock_model_prompting.call_count
+    time.sleep(0.3)
+    assert mock_model_prompting.call_count == call_count
+
+
 @patch('research_town.utils.agent_prompter.model_prompting')
 def test_proposal_writing_env(
     mock_model_prompting: MagicMock,
@@ -85,3 +174,52 @@ def test_proposal_writing_env(
     for proposal in proposals:
         assert proposal.content is not None
         assert proposal.content == 'Paper abstract1'
+
+
+@patch('research_town.utils.agent_prompter.model_prompting')
+def test_proposal_writing_env_concurrent(
+    mock_model_prompting: MagicMock,
+    example_log_db: LogDB,
+    example_progress_db: ProgressDB,
+    example_paper_db: PaperDB,
+    example_agent_manager: AgentManager,
+) -> None:
+    mock_model_prompting.side_effect = mock_prompting
+    barrier = threading.Barrier(3, timeout=5)
+
+    def mock_search_papers(**kwargs: Any) -> List[Paper]:
+        # all three researchers must be brainstorming at the same time to pass
+        if kwargs.get('author') is not None and concurrent:
+            barrier.wait()
+        return []
+
+    def run_env(max_concurrency: int) -> List[Tuple[str, str]]:
+        config = example_config.model_copy(deep=True)
+        config.param.max_concurrency = max_concurrency
+        env = ProposalWritingwithRAGEnv(
+            name='proposal_writing',
+            log_db=example_log_db,
+            progress_db=example_progress_db,
+            paper_db=example_paper_db,
+            config=config,
+            agent_manager=example_agent_manager,
+        )
+        env.on_enter(
+            leader=example_agent_manager.create_agent(profile_A, role='leader'),
+            members=[
+                example_agent_manager.create_agent(profile, role='member')
+                for profile in [profile_B, profile_C]
+            ],
+            contexts=['Relational deep learning on multi-table databases.'],
+        )
+        return [
+            (progress.__class__.__name__, agent.profile.pk)
+            for progress, agent in env.run()
+        ]
+
+    with patch.object(example_paper_db, 'search_papers', mock_search_papers):
+        concurrent = False
+        sequential_steps = run_env(max_concurrency=1)
+        concurrent = True
+        assert run_env(max_concurrency=4) == sequential_steps
+    assert len(sequential_steps) == 3 + 3 + 2 * example_config.param.proposal_num
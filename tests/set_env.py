@@ -17,6 +17,8 @@ def set_env_variable(monkeypatch: MonkeyPatch) -> Generator[None, None, None]:
 
     # Set the environment variable to the temporary directory path
     monkeypatch.setenv('DATABASE_FOLDER_PATH', temp_dir.name)
+    # requests are mocked, so they need not wait for the arXiv politeness delay
+    monkeypatch.setenv('HTTP_POLITENESS_DELAYS', '{"arxiv.org": 0}')
 
     # Yield control to the tests
     yield
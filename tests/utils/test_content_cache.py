@@ -0,0 +1,159 @@
+import sqlite3
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from beartype.typing import Dict, Optional
+
+from research_town.utils.content_cache import ContentCache
+from research_town.utils.paper_collector import fetch_and_parse_paper
+
+PAPER_HTML = (
+    '<html><body><article class="ltx_document">'
+    '<section class="ltx_section"><h2 class="ltx_title ltx_title_section">'
+    '1 Introduction</h2><p>Cached paper.</p></section>'
+    '</article></body></html>'
+)
+
+
+def mock_response(
+    status_code: int = 200,
+    content: bytes = b'body',
+    headers: Optional[Dict[str, str]] = None,
+) -> MagicMock:
+    response = MagicMock(status_code=status_code, content=content)
+    response.headers = headers or {}
+    return response
+
+
+@patch('requests.Session.get')
+def test_content_cache_serves_fresh_responses(
+    mock_get: MagicMock, tmp_path: Path
+) -> None:
+    mock_get.return_value = mock_response()
+    cache = ContentCache(str(tmp_path / 'content.db'))
+
+    first = cache.get('https://arxiv.org/html/1', params={'a': 1})
+    second = cache.get('https://arxiv.org/html/1', params={'a': 1})
+    cache.get('https://arxiv.org/html/1', params={'a': 2})
+
+    assert first.content == second.content == b'body'
+    assert second.status_code == 200
+    assert mock_get.call_count == 2
+    assert cache.stats()['hits'] == 1
+
+    # a second process opening the same file sees the stored responses
+    reopened = ContentCache(str(tmp_path / 'content.db'))
+    assert reopened.get('https://arxiv.org/html/1', params={'a': 1}).text == 'body'
+    assert mock_get.call_count == 2
+
+
+@patch('requests.Session.get')
+def test_content_cache_revalidates_stale_responses(
+    mock_get: MagicMock, tmp_path: Path
+) -> None:
+    mock_get.return_value = mock_response(
+        headers={'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jul 2024 00:00:00 GMT'}
+    )
+    cache = ContentCache(str(tmp_path / 'content.db'), max_age=0)
+    cache.get('https://arxiv.org/html/1')
+
+    mock_get.return_value = mock_response(status_code=304, content=b'')
+    response = cache.get('https://arxiv.org/html/1')
+
+    assert response.content == b'body'
+    headers = mock_get.call_args.kwargs['headers']
+    assert headers['If-None-Match'] == '"v1"'
+    assert headers['If-Modified-Since'] == 'Mon, 01 Jul 2024 00:00:00 GMT'
+    assert cache.stats()['revalidated'] == 1
+
+
+@patch('requests.Session.get')
+def test_content_cache_evicts_least_recently_used(
+    mock_get: MagicMock, tmp_path: Path
+) -> None:
+    mock_get.return_value = mock_response(content=b'x' * 40)
+    cache = ContentCache(str(tmp_path / 'content.db'), max_bytes=100)
+
+    cache.get('https://arxiv.org/html/1')
+    cache.get('https://arxiv.org/html/2')
+    cache.get('https://arxiv.org/html/1')
+    cache.get('https://arxiv.org/html/3')
+
+    assert cache.stats()['entries'] == 2
+    assert cache.stats()['bytes'] == 80
+    cache.get('https://arxiv.org/html/1')
+    assert mock_get.call_count == 3
+    cache.get('https://arxiv.org/html/2')
+    assert mock_get.call_count == 4
+
+
+def test_content_cache_tracks_total_size(tmp_path: Path) -> None:
+    path = str(tmp_path / 'content.db')
+    cache = ContentCache(path, max_bytes=100)
+    cache.store('a', 'response', 200, b'x' * 30, None, None)
+    cache.store('b', 'response', 200, b'x' * 30, None, None)
+    # replacing an entry swaps its size instead of adding to it
+    cache.store('a', 'response', 200, b'x' * 50, None, None)
+    assert cache.stats()['bytes'] == 80
+
+    # a file written before the total was tracked is summed up on open
+    connection = sqlite3.connect(path)
+    connection.execute('DROP TABLE meta')
+    connection.commit()
+    connection.close()
+    reopened = ContentCache(path, max_bytes=100)
+    assert reopened.stats()['bytes'] == 80
+
+    # both processes see each other's writes and evictions
+    reopened.store('c', 'response', 200, b'x' * 40, None, None)
+    assert cache.stats()['entries'] == 2
+    assert cache.stats()['bytes'] == 90
+    cache.clear()
+    assert reopened.stats()['bytes'] == 0
+
+
+@patch('requests.Session.get')
+def test_fetch_and_parse_paper_reuses_parsed_sections(
+    mock_get: MagicMock, tmp_path: Path
+) -> None:
+    mock_get.return_value = mock_response(content=PAPER_HTML.encode())
+    cache = ContentCache(str(tmp_path / 'content.db'))
+
+    with patch(
+        'research_town.utils.paper_collector.get_content_cache', return_value=cache
+    ):
+        first = fetch_and_parse_paper('https://arxiv.org/abs/1', ['sections'])
+        with patch('research_town.utils.paper_collector.fetch_html_content') as fetch:
+            second = fetch_and_parse_paper('https://arxiv.org/abs/1', ['sections'])
+        fetch.assert_not_called()
+        # the bibliography was never parsed, but the page itself is cached
+        fetch_and_parse_paper('https://arxiv.org/abs/1', ['bibliography'])
+
+    assert first == second
+    assert first['sections'] is not None
+    assert 'Cached paper.' in first['sections']['1 Introduction']
+    assert mock_get.call_count == 1
+
+
+@patch('requests.Session.get')
+def test_content_cache_expires_negative_results_early(
+    mock_get: MagicMock, tmp_path: Path
+) -> None:
+    mock_get.return_value = mock_response(status_code=404, content=b'missing')
+    cache = ContentCache(str(tmp_path / 'content.db'), negative_max_age=60)
+    cache.save('paper_bibliography', 'https://arxiv.org/abs/1', None)
+    cache.get('https://arxiv.org/html/1')
+    assert cache.get('https://arxiv.org/html/1').status_code == 404
+    assert mock_get.call_count == 1
+    assert cache.load('paper_bibliography', 'https://arxiv.org/abs/1') == (True, None)
+
+    # an hour later the page exists and the parsed None is forgotten
+    mock_get.return_value = mock_response()
+    with patch('time.time', return_value=time.time() + 3600):
+        assert cache.get('https://arxiv.org/html/1').status_code == 200
+        assert cache.load('paper_bibliography', 'https://arxiv.org/abs/1') == (
+            False,
+            None,
+        )
+    assert mock_get.call_count == 2
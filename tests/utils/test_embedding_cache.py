@@ -0,0 +1,65 @@
+from tempfile import TemporaryDirectory
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import torch
+from beartype.typing import Any, Dict, List
+
+from research_town.utils.embedding_cache import EmbeddingCache
+from research_town.utils.retriever import get_embed
+
+
+def test_embedding_cache_lru_and_disk() -> None:
+    with TemporaryDirectory() as cache_dir:
+        cache = EmbeddingCache(cache_dir, max_memory_items=2)
+        for i in range(3):
+            cache.put('facebook/contriever', f'text{i}', np.full(4, i, np.float32))
+        assert len(cache.memory) == 2
+        assert cache.get('other/model', 'text0') is None
+
+        # text0 was evicted from memory but is still on disk
+        embedding = cache.get('facebook/contriever', 'text0')
+        assert embedding is not None and np.allclose(embedding, 0)
+        embedding = cache.get('facebook/contriever', 'text2')
+        assert embedding is not None and np.allclose(embedding, 2)
+        assert cache.stats() == {
+            'hits': 1,
+            'disk_hits': 1,
+            'misses': 1,
+            'memory_items': 2,
+        }
+
+        reloaded_cache = EmbeddingCache(cache_dir)
+        embedding = reloaded_cache.get('facebook/contriever', 'text1')
+        assert embedding is not None and np.allclose(embedding, 1)
+        assert reloaded_cache.disk_hits == 1
+
+
+def test_get_embed_uses_cache() -> None:
+    def mock_tokenize(texts: List[str], **kwargs: Any) -> Dict[str, torch.Tensor]:
+        return {
+            'input_ids': torch.tensor([[len(text)] for text in texts]),
+            'attention_mask': torch.ones((len(texts), 1), dtype=torch.long),
+        }
+
+    def mock_forward(**kwargs: Any) -> Dict[str, torch.Tensor]:
+        return {'last_hidden_state': kwargs['input_ids'].float().unsqueeze(-1)}
+
+    tokenizer = MagicMock(side_effect=mock_tokenize)
+    model = MagicMock(side_effect=mock_forward)
+    model.name_or_path = 'mock/model'
+    cache = EmbeddingCache()
+
+    with patch('research_town.utils.retriever.get_embedding_cache', return_value=cache):
+        first = get_embed(['a', 'bb', 'a'], tokenizer, model)
+        assert tokenizer.call_count == 1
+        assert tokenizer.call_args[0][0] == ['a', 'bb']
+        assert cache.misses == 2
+
+        second = get_embed(['bb', 'ccc'], tokenizer, model)
+        assert tokenizer.call_args[0][0] == ['ccc']
+        assert cache.hits == 1
+
+    assert [t.item() for t in first] == [1.0, 2.0, 1.0]
+    assert [t.item() for t in second] == [2.0, 3.0]
+    assert all(t.shape == (1, 1) for t in first + second)
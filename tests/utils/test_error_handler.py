@@ -1,7 +1,15 @@
+import asyncio
 import time
 
+import pytest
+from beartype.typing import Awaitable, List
+
 from research_town.utils.error_handler import (
+    RetryMetrics,
     api_calling_error_exponential_backoff,
+    async_api_calling_error_exponential_backoff,
+    async_parsing_error_exponential_backoff,
+    backoff_wait_time,
     parsing_error_exponential_backoff,
 )
 from tests.mocks.mocking_func import (
@@ -27,17 +35,19 @@ def test_api_calling_error_exponential_backoff_success() -> None:
     assert result == ['Success']
 
 
-def test_api_calling_error_exponential_backoff_failure() -> None:
+def test_api_calling_error_exponential_backoff_failure(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    sleeps: List[float] = []
+    monkeypatch.setattr(time, 'sleep', sleeps.append)
     decorated_func = api_calling_error_exponential_backoff(retries=3, base_wait_time=1)(
         mock_api_call_failure
     )
-    start_time = time.time()
-    result = decorated_func()
-    end_time = time.time()
-    assert result is None
-    assert (
-        3 <= end_time - start_time < 15
-    )  # Considering 1 + 2 + 4 + 8 seconds of wait time
+    with pytest.raises(Exception, match='API call failed'):
+        decorated_func()
+    # no sleep after the last attempt, each wait is jittered below its cap
+    assert len(sleeps) == 2
+    assert all(0 <= wait <= cap for wait, cap in zip(sleeps, [1, 2]))
 
 
 def test_parsing_error_exponential_backoff_success() -> None:
@@ -46,12 +56,116 @@ def test_parsing_error_exponential_backoff_success() -> None:
     assert result == MockModel(data='Success')
 
 
-def test_parsing_error_exponential_backoff_failure() -> None:
+def test_parsing_error_exponential_backoff_failure(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    sleeps: List[float] = []
+    monkeypatch.setattr(time, 'sleep', sleeps.append)
     mock_instance = MockClass()
+    with pytest.raises(Exception, match='Parsing call failed'):
+        mock_instance.mock_parsing_call_failure()
+    assert len(sleeps) == 2
+
+
+def test_backoff_wait_time() -> None:
+    error = Exception('failed')
+    assert backoff_wait_time(3, 1, error, jitter=False) == 8
+    assert backoff_wait_time(3, 1, error, jitter=False, max_wait_time=5) == 5
+    assert all(0 <= backoff_wait_time(3, 1, error) <= 8 for _ in range(100))
+    # jitter never cuts a Retry-After short
+    assert backoff_wait_time(0, 1, MockRateLimitError('2')) == 2
+
+
+class MockRateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after: str) -> None:
+        super().__init__('Rate limit reached')
+        self.litellm_response_headers = {'retry-after': retry_after}
+
+
+class MockBadRequestError(Exception):
+    status_code = 400
+
+
+def test_api_calling_error_honours_retry_after() -> None:
+    metrics: List[RetryMetrics] = []
+    errors = [MockRateLimitError('0.2')]
+
+    @api_calling_error_exponential_backoff(
+        retries=3, base_wait_time=0, metrics_hook=metrics.append
+    )
+    def mock_api_call() -> List[str]:
+        if errors:
+            raise errors.pop()
+        return ['Success']
+
+    start_time = time.time()
+    assert mock_api_call() == ['Success']
+    assert time.time() - start_time >= 0.2
+    assert metrics[0].attempts == 1
+    assert metrics[0].wait_time == pytest.approx(0.2)
+
+
+def test_api_calling_error_not_retryable() -> None:
+    metrics: List[RetryMetrics] = []
+
+    @api_calling_error_exponential_backoff(
+        retries=5, base_wait_time=1, metrics_hook=metrics.append
+    )
+    def mock_api_call() -> List[str]:
+        raise MockBadRequestError('Context window exceeded')
+
+    with pytest.raises(MockBadRequestError):
+        mock_api_call()
+    assert metrics[0].attempts == 1
+    assert metrics[0].wait_time == 0.0
+    assert not metrics[0].succeeded
+
+
+def test_async_api_calling_error_does_not_block_event_loop() -> None:
+    metrics: List[RetryMetrics] = []
+
+    def make_call() -> Awaitable[List[str]]:
+        errors = [MockRateLimitError('0.2')]
+
+        @async_api_calling_error_exponential_backoff(
+            retries=3, base_wait_time=0, metrics_hook=metrics.append
+        )
+        async def mock_api_call() -> List[str]:
+            if errors:
+                raise errors.pop()
+            return ['Success']
+
+        return mock_api_call()
+
+    async def run() -> List[List[str]]:
+        return await asyncio.gather(*[make_call() for _ in range(5)])
+
     start_time = time.time()
-    result = mock_instance.mock_parsing_call_failure()
-    end_time = time.time()
-    assert result is None
-    assert (
-        3 <= end_time - start_time < 15
-    )  # Considering 1 + 2 + 4 + 8 seconds of wait time
+    assert asyncio.run(run()) == [['Success']] * 5
+    # the five waits overlap instead of adding up
+    assert time.time() - start_time < 0.2 * 5
+    assert [m.attempts for m in metrics] == [1] * 5
+
+
+def test_async_api_calling_error_not_retryable() -> None:
+    @async_api_calling_error_exponential_backoff(retries=5, base_wait_time=1)
+    async def mock_api_call() -> List[str]:
+        raise MockBadRequestError('Context window exceeded')
+
+    with pytest.raises(MockBadRequestError):
+        asyncio.run(mock_api_call())
+
+
+def test_async_parsing_error_exponential_backoff_failure() -> None:
+    calls: List[int] = []
+
+    @async_parsing_error_exponential_backoff(retries=3, base_wait_time=0)
+    async def mock_parsing_call() -> MockModel:
+        calls.append(1)
+        raise Exception('Parsing call failed')
+
+    with pytest.raises(Exception, match='Parsing call failed'):
+        asyncio.run(mock_parsing_call())
+    assert len(calls) == 3
@@ -0,0 +1,141 @@
+import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock, patch
+
+import pytest
+from beartype.typing import Any, Dict, Iterator, List, Set
+
+from research_town.utils import http_client
+from research_town.utils.http_client import HttpClient, get_http_client
+from research_town.utils.paper_collector import get_recent_papers
+
+PAPER_HTML = (
+    '<html><body><article class="ltx_document">'
+    '<section class="ltx_section"><h2 class="ltx_title ltx_title_section">'
+    '1 Introduction</h2><p>Stub paper.</p></section>'
+    '</article></body></html>'
+).encode()
+
+
+class StubServer(ThreadingHTTPServer):
+    def __init__(self) -> None:
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.start_times: List[float] = []
+        self.client_ports: Set[int] = set()
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # keep-alive, so connection reuse shows up as a small set of client ports
+    protocol_version = 'HTTP/1.1'
+    server: StubServer
+
+    def do_GET(self) -> None:
+        with self.server.lock:
+            self.server.active += 1
+            self.server.max_active = max(self.server.max_active, self.server.active)
+            self.server.start_times.append(time.monotonic())
+            self.server.client_ports.add(self.client_address[1])
+        time.sleep(0.1)
+        with self.server.lock:
+            self.server.active -= 1
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(PAPER_HTML)))
+        self.end_headers()
+        self.wfile.write(PAPER_HTML)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+@pytest.fixture
+def stub_server() -> Iterator[StubServer]:
+    server = StubServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_client_bounds_connections_per_host(stub_server: StubServer) -> None:
+    client = HttpClient(max_connections_per_host=2)
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        responses = list(
+            executor.map(lambda i: client.get(f'{stub_server.url}/{i}'), range(6))
+        )
+
+    assert all(response.status_code == 200 for response in responses)
+    assert stub_server.max_active == 2
+    # the six requests were served over the two pooled connections
+    assert len(stub_server.client_ports) == 2
+
+
+def test_http_client_politeness_delay(stub_server: StubServer) -> None:
+    client = HttpClient(
+        max_connections_per_host=4, politeness_delays={'127.0.0.1': 0.2}
+    )
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        list(executor.map(lambda i: client.get(f'{stub_server.url}/{i}'), range(3)))
+
+    start_times = sorted(stub_server.start_times)
+    gaps = [later - earlier for earlier, later in zip(start_times, start_times[1:])]
+    assert len(gaps) == 2
+    assert all(gap >= 0.18 for gap in gaps)
+
+
+def test_http_client_politeness_delay_covers_subdomains() -> None:
+    client = HttpClient(politeness_delays={'arxiv.org': 1.0})
+    assert client.politeness_delay('export.arxiv.org') == 1.0
+    assert client.politeness_delay('arxiv.org') == 1.0
+    assert client.politeness_delay('notarxiv.org') == 0.0
+    # arXiv is throttled unless told otherwise
+    assert HttpClient().politeness_delay('export.arxiv.org') == 0.5
+    assert HttpClient(politeness_delays={}).politeness_delay('arxiv.org') == 0.0
+
+
+def test_http_client_default_politeness_delay(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # tests zero the arXiv delay through the env, the default applies without it
+    monkeypatch.delenv('HTTP_POLITENESS_DELAYS')
+    monkeypatch.setattr(http_client, '_http_client', None)
+    assert get_http_client().politeness_delay('arxiv.org') == 0.5
+
+    monkeypatch.setenv('HTTP_POLITENESS_DELAYS', '{"arxiv.org": 3}')
+    monkeypatch.setattr(http_client, '_http_client', None)
+    assert get_http_client().politeness_delay('export.arxiv.org') == 3
+
+
+@patch('arxiv.Client')
+def test_get_recent_papers_fetches_in_parallel(
+    mock_client: MagicMock, stub_server: StubServer
+) -> None:
+    def mock_result(i: int) -> MagicMock:
+        result = MagicMock()
+        result.title = f'Paper {i}'
+        result.entry_id = f'{stub_server.url}/arxiv/abs/{i}'
+        result.summary = f'Summary {i}'
+        result.primary_category = 'cs'
+        result.published = datetime.datetime(2023, 7, 1)
+        return result
+
+    mock_client.return_value.results.return_value = [mock_result(i) for i in range(4)]
+
+    papers = get_recent_papers(domain='cs.AI', max_results=4)
+
+    assert [paper.title for paper in papers] == [f'Paper {i}' for i in range(4)]
+    sections: List[Dict[str, str]] = [paper.sections or {} for paper in papers]
+    assert all('Stub paper.' in section['1 Introduction'] for section in sections)
+    assert len(stub_server.start_times) == 4
+    assert stub_server.max_active > 1
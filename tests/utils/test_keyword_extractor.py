@@ -0,0 +1,156 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+from beartype.typing import Any, List
+
+from research_town.utils.keyword_extractor import KeywordExtractor, RetrieverEmbedder
+
+
+def test_keyword_extractor_batches_and_memoizes() -> None:
+    extractor = KeywordExtractor()
+    kw_model = MagicMock()
+    kw_model.extract_keywords.side_effect = lambda docs, **kwargs: (
+        [[(doc.split()[0], 1.0)] for doc in docs]
+        if len(docs) > 1
+        else [(docs[0].split()[0], 1.0)]
+    )
+    extractor.kw_model = kw_model
+
+    assert extractor.extract_keywords('graph networks') == [('graph', 1.0)]
+    keywords = extractor.extract_keywords_batch(
+        ['language agents', 'graph networks', 'retrieval models', 'language agents']
+    )
+
+    assert keywords == [
+        [('language', 1.0)],
+        [('graph', 1.0)],
+        [('retrieval', 1.0)],
+        [('language', 1.0)],
+    ]
+    # the repeated and already seen queries were not extracted again
+    assert kw_model.extract_keywords.call_count == 2
+    assert kw_model.extract_keywords.call_args[0][0] == [
+        'language agents',
+        'retrieval models',
+    ]
+    assert (extractor.hits, extractor.misses) == (2, 3)
+
+
+def test_keyword_extractor_evicts_least_recently_used() -> None:
+    extractor = KeywordExtractor(max_memory_items=2)
+    kw_model = MagicMock()
+    kw_model.extract_keywords.side_effect = lambda docs, **kwargs: [(docs[0], 1.0)]
+    extractor.kw_model = kw_model
+
+    extractor.extract_keywords('a')
+    extractor.extract_keywords('b')
+    extractor.extract_keywords('a')
+    extractor.extract_keywords('c')
+
+    assert list(extractor.memory) == ['a', 'c']
+
+
+def test_keyword_extractor_batch_larger_than_memory() -> None:
+    extractor = KeywordExtractor(max_memory_items=1)
+    kw_model = MagicMock()
+    kw_model.extract_keywords.side_effect = lambda docs, **kwargs: [
+        [(doc, 1.0)] for doc in docs
+    ]
+    extractor.kw_model = kw_model
+
+    # the batch evicts its own first query before it returns
+    assert extractor.extract_keywords_batch(['a', 'b']) == [[('a', 1.0)], [('b', 1.0)]]
+    assert list(extractor.memory) == ['b']
+
+
+def test_keyword_extractor_extracts_outside_the_lock() -> None:
+    extractor = KeywordExtractor()
+    barrier = threading.Barrier(2, timeout=10)
+
+    def extract_keywords(docs: List[str], **kwargs: Any) -> Any:
+        # only returns once both threads are extracting at the same time
+        barrier.wait()
+        return [(docs[0], 1.0)]
+
+    extractor.kw_model = MagicMock()
+    extractor.kw_model.extract_keywords.side_effect = extract_keywords
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        keywords = list(executor.map(extractor.extract_keywords, ['a', 'b']))
+    assert keywords == [[('a', 1.0)], [('b', 1.0)]]
+
+
+def wait_for_hits(extractor: KeywordExtractor, hits: int) -> None:
+    # a query found in flight is counted as a hit before it is waited for
+    deadline = time.monotonic() + 10
+    while extractor.hits < hits and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_keyword_extractor_shares_in_flight_extractions() -> None:
+    extractor = KeywordExtractor()
+    started = threading.Event()
+    release = threading.Event()
+
+    def extract_keywords(docs: List[str], **kwargs: Any) -> Any:
+        started.set()
+        release.wait(timeout=10)
+        return [(docs[0], 1.0)]
+
+    extractor.kw_model = MagicMock()
+    extractor.kw_model.extract_keywords.side_effect = extract_keywords
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(extractor.extract_keywords, 'a')
+        assert started.wait(timeout=10)
+        second = executor.submit(extractor.extract_keywords_batch, ['a', 'b'])
+        wait_for_hits(extractor, 1)
+        release.set()
+        assert first.result() == [('a', 1.0)]
+        assert second.result() == [[('a', 1.0)], [('b', 1.0)]]
+    # the second batch waited for 'a' and only extracted 'b'
+    assert [c[0][0] for c in extractor.kw_model.extract_keywords.call_args_list] == [
+        ['a'],
+        ['b'],
+    ]
+    assert not extractor.in_flight
+
+
+def test_keyword_extractor_shares_in_flight_failures() -> None:
+    extractor = KeywordExtractor()
+    started = threading.Event()
+    release = threading.Event()
+
+    def extract_keywords(docs: List[str], **kwargs: Any) -> Any:
+        started.set()
+        release.wait(timeout=10)
+        raise RuntimeError('extraction failed')
+
+    extractor.kw_model = MagicMock()
+    extractor.kw_model.extract_keywords.side_effect = extract_keywords
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(extractor.extract_keywords, 'a')
+        assert started.wait(timeout=10)
+        second = executor.submit(extractor.extract_keywords, 'a')
+        wait_for_hits(extractor, 1)
+        release.set()
+        for future in [first, second]:
+            with pytest.raises(RuntimeError):
+                future.result()
+    assert extractor.kw_model.extract_keywords.call_count == 1
+    assert not extractor.in_flight
+
+
+def test_retriever_embedder_shapes() -> None:
+    embeddings = RetrieverEmbedder().embed(['graph neural network', 'agents'])
+    assert embeddings.ndim == 2 and embeddings.shape[0] == 2
+
+    keywords = KeywordExtractor().extract_keywords(
+        'Large language model agents simulate research communities'
+    )
+    assert 0 < len(keywords) <= 5
+    assert all(isinstance(word, str) for word, _ in keywords)
@@ -0,0 +1,114 @@
+import os
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from research_town.utils.llm_cache import LLMCache
+from research_town.utils.model_prompting import model_prompting
+
+
+def mock_completion(content: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))]
+    )
+
+
+def test_llm_cache_ttl_and_eviction() -> None:
+    with TemporaryDirectory() as cache_dir:
+        path = os.path.join(cache_dir, 'llm.sqlite')
+        cache = LLMCache(path, max_entries=2)
+        key = LLMCache.key(model='gpt-4o-mini', messages=[{'role': 'user'}])
+        assert key == LLMCache.key(messages=[{'role': 'user'}], model='gpt-4o-mini')
+
+        for i in range(3):
+            cache.put(f'key{i}', 'gpt-4o-mini', [f'response{i}'])
+        assert cache.get('key0') is None
+        assert cache.get('key2') == ['response2']
+        assert cache.stats() == {'hits': 1, 'misses': 1, 'entries': 2}
+
+        expired_cache = LLMCache(path, ttl=-1)
+        assert expired_cache.get('key1') is None
+        assert expired_cache.stats()['entries'] == 1
+
+
+def test_model_prompting_cache_modes() -> None:
+    messages = [{'role': 'user', 'content': 'Summarize relational deep learning.'}]
+    with TemporaryDirectory() as cache_dir:
+        path = os.path.join(cache_dir, 'llm.sqlite')
+        with patch('litellm.completion') as completion:
+            completion.return_value = mock_completion('first')
+            with patch(
+                'research_town.utils.model_prompting.get_llm_cache',
+                return_value=LLMCache(path, mode='read_through'),
+            ):
+                assert model_prompting('gpt-4o-mini', messages) == ['first']
+                assert model_prompting('gpt-4o-mini', messages) == ['first']
+                assert completion.call_count == 1
+
+            completion.return_value = mock_completion('second')
+            with patch(
+                'research_town.utils.model_prompting.get_llm_cache',
+                return_value=LLMCache(path, mode='write_only'),
+            ):
+                assert model_prompting('gpt-4o-mini', messages) == ['second']
+                assert completion.call_count == 2
+
+            with patch(
+                'research_town.utils.model_prompting.get_llm_cache',
+                return_value=LLMCache(path, mode='replay'),
+            ):
+                assert model_prompting('gpt-4o-mini', messages) == ['second']
+                with pytest.raises(ValueError):
+                    model_prompting('gpt-4o-mini', messages, temperature=0.7)
+                assert completion.call_count == 2
+
+
+def test_model_prompting_cache_skips_sampled_requests() -> None:
+    messages = [{'role': 'user', 'content': 'Summarize relational deep learning.'}]
+    with TemporaryDirectory() as cache_dir:
+        path = os.path.join(cache_dir, 'llm.sqlite')
+        with patch('litellm.completion') as completion:
+            completion.side_effect = [mock_completion(f'sample{i}') for i in range(3)]
+            with patch(
+                'research_town.utils.model_prompting.get_llm_cache',
+                return_value=LLMCache(path, mode='read_through'),
+            ):
+                # a retry of a sampled request gets a new sample
+                assert model_prompting('gpt-4o-mini', messages, temperature=0.6) == [
+                    'sample0'
+                ]
+                assert model_prompting('gpt-4o-mini', messages, temperature=0.6) == [
+                    'sample1'
+                ]
+
+            with patch(
+                'research_town.utils.model_prompting.get_llm_cache',
+                return_value=LLMCache(path, mode='read_through', cache_sampled=True),
+            ):
+                assert model_prompting('gpt-4o-mini', messages, temperature=0.6) == [
+                    'sample1'
+                ]
+            assert completion.call_count == 2
+
+
+def test_model_prompting_cache_treats_default_temperature_as_sampled() -> None:
+    messages = [{'role': 'user', 'content': 'Summarize relational deep learning.'}]
+    with TemporaryDirectory() as cache_dir:
+        path = os.path.join(cache_dir, 'llm.sqlite')
+        with patch('litellm.completion') as completion:
+            completion.side_effect = [mock_completion(f'sample{i}') for i in range(4)]
+            with patch(
+                'research_town.utils.model_prompting.get_llm_cache',
+                return_value=LLMCache(path, mode='read_through'),
+            ):
+                for i in range(2):
+                    assert model_prompting(
+                        'gpt-4o-mini', messages, temperature=None
+                    ) == [f'sample{i}']
+                for i in range(2, 4):
+                    assert model_prompting(
+                        'gpt-4o-mini', messages, return_num=2, temperature=0.0
+                    ) == [f'sample{i}']
+            assert completion.call_count == 4
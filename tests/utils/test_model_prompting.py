@@ -1,4 +1,7 @@
-from research_town.utils.model_prompting import model_prompting
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from research_town.utils.model_prompting import best_of_n, model_prompting
 
 
 def test_openai_call() -> None:
@@ -29,3 +32,23 @@ def test_togetherai_mistral_call() -> None:
     assert response is not None
     assert len(response) > 0
     assert len(response[0]) > 0
+
+
+def test_model_prompting_returns_all_choices() -> None:
+    completion = SimpleNamespace(
+        choices=[
+            SimpleNamespace(message=SimpleNamespace(content=content))
+            for content in ['Overall Score: 7', 'Overall Score: 8', 'No score']
+        ]
+    )
+    prompt = [{'role': 'user', 'content': 'Score this insight.'}]
+    with patch('litellm.completion', return_value=completion):
+        response = model_prompting('gpt-4o-mini', prompt, return_num=3)
+    assert len(response) == 3
+
+    def scorer(text: str) -> float:
+        return float(text.split(': ')[1])
+
+    assert best_of_n(response, scorer) == 'Overall Score: 8'
+    assert best_of_n(['No score', 'Overall Score: 7'], scorer) == 'Overall Score: 7'
+    assert best_of_n(response) == 'Overall Score: 7'
@@ -1,13 +1,18 @@
 import datetime
 from unittest.mock import MagicMock, patch
 
+from beartype.typing import Iterator, List
+
 from research_town.utils.paper_collector import (
+    fetch_and_parse_paper,
     get_paper_by_arxiv_id,
     get_paper_content_from_html,
+    get_paper_content_from_pdf,
     get_paper_introduction,
     get_recent_papers,
     get_references,
     get_related_papers,
+    split_pdf_sections,
 )
 
 
@@ -94,6 +99,92 @@ def test_get_paper_content_from_html() -> None:
     assert len(sections['1 Introduction']) > 0
 
 
+ARXIV_HTML = """
+<html><body><article class="ltx_document">
+<section class="ltx_section"><h2 class="ltx_title ltx_title_section">1 Introduction</h2>
+<p>Agents simulate research.</p>
+<figure class="ltx_figure"><span class="ltx_tag">Figure 1</span>
+<figcaption class="ltx_caption">Overview.</figcaption></figure>
+<figure class="ltx_table"><span class="ltx_tag">Table 1</span>
+<figcaption class="ltx_caption">Results.</figcaption></figure>
+</section>
+<section class="ltx_appendix"><h2 class="ltx_title ltx_title_appendix">A Prompts</h2>
+<p>Prompt text.</p></section>
+<section class="ltx_bibliography"><ul>
+<li class="ltx_bibitem"><span class="ltx_tag">[1]</span> A cited paper.</li>
+</ul></section>
+</article></body></html>
+"""
+
+
+@patch('requests.Session.get')
+def test_fetch_and_parse_paper(mock_get: MagicMock) -> None:
+    mock_get.return_value = MagicMock(status_code=200, text=ARXIV_HTML)
+
+    paper = fetch_and_parse_paper('https://arxiv.org/abs/2403.05534v1')
+
+    mock_get.assert_called_once()
+    assert mock_get.call_args[0][0] == 'https://arxiv.org/html/2403.05534v1'
+    assert paper['sections'] is not None
+    assert list(paper['sections']) == ['1 Introduction', 'A Prompts']
+    assert 'Agents simulate research.' in paper['sections']['1 Introduction']
+    assert paper['bibliography'] is not None
+    assert 'A cited paper.' in paper['bibliography']['[1]']
+    assert paper['figure_captions'] == {'Figure 1': 'Overview.'}
+    assert paper['table_captions'] == {'Table 1': 'Results.'}
+
+    paper = fetch_and_parse_paper('https://arxiv.org/abs/2403.05534v1', ['sections'])
+    assert list(paper) == ['sections']
+
+    assert fetch_and_parse_paper('https://example.com/paper') == {
+        'sections': None,
+        'bibliography': None,
+        'figure_captions': None,
+        'table_captions': None,
+    }
+
+
+def test_split_pdf_sections() -> None:
+    # titles split across page breaks are still found, as in the joined text
+    pages = [
+        'Abstract We study agents. Intro',
+        'duction Agents ',
+        'matter. Conclu',
+        'sions Done.',
+    ]
+    sections = dict(split_pdf_sections(pages))
+
+    assert sections == {
+        'Abstract': 'Abstract We study agents.',
+        'Introduction': 'Introduction Agents matter.',
+        'Conclusions': 'Conclusions Done.',
+    }
+    assert dict(split_pdf_sections([])) == {}
+
+
+@patch('requests.Session.get')
+def test_get_paper_content_from_pdf_stops_early(mock_get: MagicMock) -> None:
+    mock_get.return_value = MagicMock(status_code=200, content=b'%PDF')
+    filler = ' text' * 10
+    decoded: List[str] = []
+
+    def iter_pdf_pages(content: bytes) -> Iterator[str]:
+        for title in ['Abstract', 'Introduction', 'Methods', 'Results', 'Conclusion']:
+            decoded.append(title)
+            yield f'{title}{filler}. '
+
+    with patch('research_town.utils.paper_collector.iter_pdf_pages', iter_pdf_pages):
+        sections = get_paper_content_from_pdf(
+            'https://arxiv.org/abs/2409.16928',
+            stop=lambda sections: 'Introduction' in sections,
+        )
+
+    assert sections is not None
+    assert list(sections) == ['Abstract', 'Introduction']
+    assert sections['Introduction'] == f'Introduction{filler}.'
+    assert decoded == ['Abstract', 'Introduction', 'Methods']
+
+
 def test_get_paper_introduction() -> None:
     test_url1 = 'https://arxiv.org/pdf/2409.16928'
     test_url2 = 'https://openreview.net/pdf?id=NnMEadcdyD'
@@ -115,7 +206,7 @@ def test_get_paper_by_arxiv_id() -> None:
     assert result is not None
 
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_get_references(mock_get: MagicMock) -> None:
     mock_response = MagicMock()
     mock_response.status_code = 200
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+import time
+
+from beartype.typing import List
+
+from research_town.utils.rate_limiter import (
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    RateLimiter,
+    estimate_tokens,
+    prompting_priority,
+)
+
+
+def test_rate_limiter_token_budget() -> None:
+    limiter = RateLimiter()
+    limiter.acquire('unlimited', 10**9)
+
+    limiter.configure('gpt-4o-mini', rpm=600, tpm=6000)
+    start_time = time.monotonic()
+    limiter.acquire('gpt-4o-mini', 6000)
+    assert time.monotonic() - start_time < 0.05
+    # the token bucket refills at 100 tokens per second
+    limiter.acquire('gpt-4o-mini', 20)
+    assert time.monotonic() - start_time >= 0.15
+
+    tokens = estimate_tokens([{'role': 'user', 'content': 'x' * 400}], 50, 2)
+    assert tokens == 100 + 4 + 100
+
+
+def test_rate_limiter_priority_order() -> None:
+    limiter = RateLimiter()
+    limiter.configure('gpt-4o-mini', rpm=1200)
+    limiter.acquire('gpt-4o-mini', 1)
+    # drain the bucket so that every waiter below has to queue
+    limiter.buckets['gpt-4o-mini'][0].level = 0  # type: ignore[union-attr]
+    order: List[str] = []
+
+    def worker(name: str, priority: int) -> None:
+        limiter.acquire('gpt-4o-mini', 1, priority=priority)
+        order.append(name)
+
+    threads = [
+        threading.Thread(target=worker, args=(f'batch{i}', PRIORITY_BATCH))
+        for i in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.01)
+
+    async def interactive() -> None:
+        with prompting_priority(PRIORITY_INTERACTIVE):
+            await limiter.acquire_async('gpt-4o-mini', 1)
+        order.append('interactive')
+
+    asyncio.run(interactive())
+    for thread in threads:
+        thread.join()
+    assert order == ['interactive', 'batch0', 'batch1']
@@ -1,9 +1,15 @@
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import MagicMock, patch
 
 import torch
-from beartype.typing import Any, Dict
+from beartype.typing import Any, Dict, List
 
-from research_town.utils.retriever import get_embed, rank_topk
+from research_town.utils.retriever import (
+    get_embed,
+    get_retriever,
+    preload_retriever,
+    rank_topk,
+)
 
 
 def test_get_embed() -> None:
@@ -16,10 +22,11 @@ def test_get_embed() -> None:
         mock_tokenizer.return_value = mock_tokenizer_instance
 
         def mock_tokenize(*args: Any, **kwargs: Any) -> Dict[str, torch.Tensor]:
+            batch_size = len(args[0])
             return {
                 # Example token IDs
-                'input_ids': torch.tensor([[101, 102, 103]]),
-                'attention_mask': torch.tensor([[1, 1, 1]]),
+                'input_ids': torch.tensor([[101, 102, 103]] * batch_size),
+                'attention_mask': torch.tensor([[1, 1, 1]] * batch_size),
             }
 
         mock_tokenizer_instance.side_effect = mock_tokenize
@@ -67,6 +74,60 @@ def test_get_embed() -> None:
         assert all(torch.equal(t1, t2) for t1, t2 in zip(result_1, result_2))
 
 
+def test_get_embed_batched_padding() -> None:
+    def mock_tokenize(texts: List[str], **kwargs: Any) -> Dict[str, torch.Tensor]:
+        # one token per word, padded with id 0 to the longest text in the batch
+        ids = [[len(word) for word in text.split()] for text in texts]
+        max_len = max(len(token_ids) for token_ids in ids)
+        return {
+            'input_ids': torch.tensor(
+                [token_ids + [0] * (max_len - len(token_ids)) for token_ids in ids]
+            ),
+            'attention_mask': torch.tensor(
+                [
+                    [1] * len(token_ids) + [0] * (max_len - len(token_ids))
+                    for token_ids in ids
+                ]
+            ),
+        }
+
+    def mock_forward(**kwargs: Any) -> Dict[str, torch.Tensor]:
+        hidden = kwargs['input_ids'].float().unsqueeze(-1)
+        return {'last_hidden_state': torch.cat([hidden, 2 * hidden], dim=-1)}
+
+    tokenizer = MagicMock(side_effect=mock_tokenize)
+    model = MagicMock(side_effect=mock_forward)
+    instructions = ['a bb ccc', 'dddd', 'ee f ggg hhhh iiiii', 'jj kk']
+
+    result = get_embed(instructions, tokenizer, model, batch_size=3)
+    expected = [
+        get_embed([instruction], tokenizer, model)[0] for instruction in instructions
+    ]
+    assert len(result) == len(instructions)
+    assert all(torch.allclose(t1, t2) for t1, t2 in zip(result, expected))
+    assert torch.allclose(result[0], torch.tensor([[2.0, 4.0]]))
+    assert tokenizer.call_count == 2 + len(instructions)
+
+    unsorted_result = get_embed(instructions, tokenizer, model, sort_by_length=False)
+    assert all(torch.allclose(t1, t2) for t1, t2 in zip(unsorted_result, expected))
+
+
+def test_get_retriever_shared() -> None:
+    with (
+        patch.dict('research_town.utils.retriever._retrievers', clear=True),
+        patch('transformers.BertTokenizer.from_pretrained') as mock_tokenizer,
+        patch('transformers.BertModel.from_pretrained') as mock_model,
+    ):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            retrievers = list(executor.map(lambda _: get_retriever(), range(16)))
+        preload_retriever()
+
+        assert mock_tokenizer.call_count == 1
+        assert mock_model.call_count == 1
+        assert all(retriever is retrievers[0] for retriever in retrievers)
+        assert get_retriever() is retrievers[0]
+
+
 def test_rank_topk() -> None:
     query_embed = [torch.tensor([[1.0, 2.0, 3.0]])]
     corpus_embed = [torch.tensor([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])]
@@ -0,0 +1,130 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from beartype.typing import Any, Iterator, List, Optional
+
+from research_town.agents import AgentManager
+from research_town.utils.agent_prompter import concurrent_model_prompting
+from research_town.utils.model_prompting import model_prompting
+from research_town.utils.rate_limiter import RateLimiter
+from research_town.utils.token_stream import StreamChunk, set_stream_sink
+from tests.constants.config_constants import example_config
+from tests.constants.data_constants import profile_A, research_idea_A
+
+
+def mock_stream(deltas: List[Optional[str]]) -> Iterator[SimpleNamespace]:
+    for delta in deltas:
+        yield SimpleNamespace(
+            choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))]
+        )
+
+
+def test_model_prompting_stream() -> None:
+    streamed: List[StreamChunk] = []
+    set_stream_sink(streamed.append)
+    try:
+        with patch(
+            'litellm.completion', return_value=mock_stream(['Hello', None, ' world'])
+        ):
+            response = model_prompting(
+                'gpt-4o-mini', [{'role': 'user', 'content': 'Hi'}], stream=True
+            )
+    finally:
+        set_stream_sink(None)
+    assert response == ['Hello world']
+    assert streamed == [
+        StreamChunk(None, None, 'Hello'),
+        StreamChunk(None, None, ' world'),
+    ]
+
+
+def test_agent_stream_tagged_with_progress_pk(
+    example_agent_manager: AgentManager,
+) -> None:
+    config = example_config.model_copy(deep=True)
+    config.param.stream = True
+    streamed: List[StreamChunk] = []
+
+    def mock_completion(**kwargs: Any) -> Iterator[SimpleNamespace]:
+        return mock_stream(['[Question 1] Why?', ' [Question 2] How?'])
+
+    leader = example_agent_manager.create_agent(profile_A, role='leader')
+    set_stream_sink(streamed.append)
+    try:
+        with patch('litellm.completion', side_effect=mock_completion):
+            proposal = leader.write_proposal(idea=research_idea_A, config=config)
+    finally:
+        set_stream_sink(None)
+    assert proposal.q1 == 'Why?'
+    assert [chunk.pk for chunk in streamed] == [proposal.pk, proposal.pk]
+
+
+def test_concurrent_stream_tagged_with_part() -> None:
+    streamed: List[StreamChunk] = []
+
+    def mock_completion(**kwargs: Any) -> Iterator[SimpleNamespace]:
+        return mock_stream([kwargs['messages'][0]['content'], ' done'])
+
+    set_stream_sink(streamed.append)
+    try:
+        with patch('litellm.completion', side_effect=mock_completion):
+            responses = concurrent_model_prompting(
+                'gpt-4o-mini',
+                [[{'role': 'user', 'content': name}] for name in ['s', 'w']],
+                stream=True,
+                parts=['strength', 'weakness'],
+            )
+    finally:
+        set_stream_sink(None)
+    assert responses == ['s done', 'w done']
+    for part, content in [('strength', 's'), ('weakness', 'w')]:
+        assert [chunk.content for chunk in streamed if chunk.part == part] == [
+            content,
+            ' done',
+        ]
+
+
+def test_stream_retry_resets_part() -> None:
+    streamed: List[StreamChunk] = []
+
+    def broken_stream() -> Iterator[SimpleNamespace]:
+        yield from mock_stream(['Hel'])
+        raise ConnectionError('stream interrupted')
+
+    set_stream_sink(streamed.append)
+    try:
+        with (
+            patch(
+                'litellm.completion',
+                side_effect=[broken_stream(), mock_stream(['Hello'])],
+            ),
+            patch('time.sleep'),
+        ):
+            response = model_prompting(
+                'gpt-4o-mini', [{'role': 'user', 'content': 'Hi'}], stream=True
+            )
+    finally:
+        set_stream_sink(None)
+    assert response == ['Hello']
+    assert [(chunk.content, chunk.reset) for chunk in streamed] == [
+        ('Hel', False),
+        ('', True),
+        ('Hello', False),
+    ]
+
+
+def test_stream_records_usage() -> None:
+    chunks = list(mock_stream(['Hello']))
+    chunks.append(SimpleNamespace(choices=[], usage=SimpleNamespace(total_tokens=42)))
+    rate_limiter = RateLimiter()
+    with (
+        patch('litellm.completion', return_value=iter(chunks)),
+        patch(
+            'research_town.utils.model_prompting.get_rate_limiter',
+            return_value=rate_limiter,
+        ),
+        patch.object(rate_limiter, 'record_usage') as record_usage,
+    ):
+        model_prompting('gpt-4o-mini', [{'role': 'user', 'content': 'Hi'}], stream=True)
+    assert record_usage.call_args[0][0] == 'gpt-4o-mini'
+    assert record_usage.call_args[0][2] == 42